@@ -1,37 +1,58 @@
 import json
 import time
+from datetime import datetime
 import os
 import asyncio
 import base64
-import sphn
-from pydantic import BaseModel, Field, TypeAdapter, ValidationError, computed_field
-from typing import Annotated
+from pydantic import Field, TypeAdapter, ValidationError
+from typing import TYPE_CHECKING, Annotated
 from fastapi import (
+    Body,
     FastAPI,
-    File,
-    Form,
+    Header,
     HTTPException,
-    UploadFile,
+    Query,
+    Request,
     WebSocket,
     WebSocketDisconnect,
-    status,
 )
-import requests
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 import numpy as np
-from collections import Counter
-import re
-import math
-from io import BytesIO
 import logging
 import traceback
 from fastapi.websockets import WebSocketState
 
-from backend.handlers.chat_handler import ChatHandler
+# The handlers pull in langchain, torch and openai: they are imported on the
+# first connection, once `MeetingMemory.warm_up` has loaded them anyway.
 from backend.utils.utils import WebSocketClosedError
+from backend.utils.outbound_queue import OutboundQueue, OUTBOUND_QUEUES
 import backend.openai_realtime_api_events as ora
-from backend.handlers.main_handler import MeetingHandler
-from backend.models.meeting import Meeting
 from backend.services.meeting_memory import MeetingMemory
+from backend.services.answer_cache import AnswerCache
+from backend.services.sessions import RealtimeSession, SessionRegistry
+from backend.services.uploads import (
+    SESSION_ID_RE,
+    UPLOADS_DIR,
+    ChunkedUpload,
+    UploadedMeeting,
+    UploadError,
+    iter_audio_frames,
+    remove_stale_uploads,
+)
+from backend.services.audio_clips import AudioClip, ClipError, parse_range
+from backend.services.recorder import audio_path, catalog_path
+from backend.services.meeting_catalog import CursorError, MeetingCatalog
+from backend.services.transcript_journal import recover_journals
+from backend.configs import RECORDINGS_DIR
+from backend.models.meeting import Meeting
+from backend.utils.metrics import REGISTRY
+from backend.utils.loop_monitor import LoopMonitor
+from backend.utils import cpu_pool
+from backend.constants import LOOP_MONITOR, LOOP_MONITOR_THRESHOLD, MEETING_INDEX_URL
+
+if TYPE_CHECKING:
+    from backend.handlers.chat_handler import ChatHandler
+    from backend.handlers.main_handler import MeetingHandler
 
 # --- Configuration ---
 app = FastAPI()
@@ -39,12 +60,40 @@ app = FastAPI()
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 STT_API = os.environ.get("LLM_STT_URL", "https://ungoaded-tashina-trustily.ngrok-free.dev/stt")
-# --- In-Memory Database (Simulating a Vector DB) ---
-# Stores: { id: str, title: str, transcript: str, timestamp: float, vector: dict }
-MEETING_NOTES = []
-GLOBAL_VOCABULARY = set()
 
 SAMPLE_RATE = 24000
+# How long the pipeline of a disconnected client is kept for it to resume
+SESSION_GRACE_PERIOD = float(os.environ.get("SESSION_GRACE_PERIOD", "30"))
+# How often received audio is acknowledged to the client
+AUDIO_ACK_INTERVAL = 1.0
+# Audio frames of an uploaded file waiting for the STT, decoding pauses above
+UPLOAD_MAX_QUEUED_FRAMES = 50
+# Uploads without a request for that long are abandoned, their chunks are deleted
+UPLOAD_TTL = float(os.environ.get("UPLOAD_TTL", "86400"))
+UPLOAD_SWEEP_INTERVAL = 300.0
+# Fields of a meeting in the REST API, listings leave out the transcript by default
+MEETING_FIELDS = ("id", "title", "participants", "start_time", "transcript", "digest")
+MEETING_LIST_FIELDS = tuple(field for field in MEETING_FIELDS if field != "transcript")
+MAX_MEETINGS_PAGE = 200
+
+OPUS_DECODE_TIME = REGISTRY.histogram("opus_decode_seconds", "Time to decode one Ogg/Opus page from a client.")
+WS_SEND_TIME = REGISTRY.histogram("websocket_send_seconds", "Time to write one server event to a WebSocket.")
+REGISTRY.gauge(
+    "realtime_sessions", "Realtime sessions alive, connected or waiting to be resumed.",
+    lambda: len(app.state.sessions.sessions),
+)
+REGISTRY.gauge(
+    "outbound_queue_depth", "Events waiting in all outbound queues.",
+    lambda: sum(q.qsize() for q in OUTBOUND_QUEUES),
+)
+REGISTRY.gauge(
+    "outbound_queue_dropped", "Events dropped by the outbound queues alive.",
+    lambda: sum(q.n_dropped for q in OUTBOUND_QUEUES),
+)
+REGISTRY.gauge(
+    "answer_cache_hits", "Chat answers served from the cache since startup.",
+    lambda: app.state.answer_cache.hits,
+)
 
 ClientEventAdapter = TypeAdapter(
     Annotated[ora.ClientEvent, Field(discriminator="type")]
@@ -53,7 +102,305 @@ ClientEventAdapter = TypeAdapter(
 
 @app.on_event("startup")
 async def startup_event():
-    app.state.meeting_memory = MeetingMemory()
+    if MEETING_INDEX_URL:
+        from backend.services.index_client import IndexClient
+        app.state.meeting_memory = IndexClient(MEETING_INDEX_URL)
+    else:
+        app.state.meeting_memory = MeetingMemory()
+    # one catalog for the process, shared by the recorders of all sessions
+    app.state.catalog = MeetingCatalog(catalog_path(RECORDINGS_DIR))
+    # Loads the embedding model and the vector store while we already serve /ready
+    app.state.warm_up = asyncio.create_task(app.state.meeting_memory.awarm_up())
+    # Asks the LLM server for its model once, sessions then start without a round trip
+    app.state.llm_warm_up = asyncio.create_task(_resolve_llm_model())
+    app.state.recovery = asyncio.create_task(_recover_meetings())
+    app.state.answer_cache = AnswerCache()
+    app.state.sessions = SessionRegistry(grace_period=SESSION_GRACE_PERIOD)
+    app.state.uploads = {}
+    app.state.upload_sweeper = asyncio.create_task(_sweep_uploads())
+    app.state.loop_monitor = None
+    if LOOP_MONITOR:
+        app.state.loop_monitor = LoopMonitor(threshold=LOOP_MONITOR_THRESHOLD)
+        app.state.loop_monitor.start()
+
+
+async def _recover_meetings():
+    """Store and index the meetings interrupted by a crash, from their transcript journals."""
+    try:
+        await asyncio.shield(app.state.warm_up)
+        recovered = await recover_journals(app.state.meeting_memory, RECORDINGS_DIR, app.state.catalog)
+    except Exception as e:
+        logger.error(f"Meeting recovery failed: {e}")
+        return
+    if recovered:
+        logger.info(f"Recovered {recovered} interrupted meetings")
+
+
+async def _resolve_llm_model():
+    from backend.services.llm_service import resolve_model
+
+    try:
+        logger.info(f"LLM model: {await resolve_model()}")
+    except Exception as e:
+        # sessions retry it when they start
+        logger.warning(f"Could not get the LLM model at startup: {e}")
+
+
+async def _sweep_uploads():
+    """Delete the uploads abandoned for `UPLOAD_TTL`, in memory and those left on disk by a restart."""
+    while True:
+        try:
+            for session_id, upload in list(app.state.uploads.items()):
+                if upload.expired(UPLOAD_TTL):
+                    del app.state.uploads[session_id]
+                    await asyncio.to_thread(upload.cleanup)
+                    logger.info(f"Upload {session_id} expired")
+            await asyncio.to_thread(remove_stale_uploads, UPLOADS_DIR, UPLOAD_TTL, set(app.state.uploads))
+        except Exception as e:
+            logger.warning(f"Upload sweep failed: {e}")
+        await asyncio.sleep(UPLOAD_SWEEP_INTERVAL)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    app.state.upload_sweeper.cancel()
+    app.state.llm_warm_up.cancel()
+    if app.state.loop_monitor is not None:
+        await app.state.loop_monitor.stop()
+    await app.state.sessions.close_all()
+    await app.state.meeting_memory.aclose()
+    cpu_pool.shutdown()
+
+
+@app.get("/ready")
+async def ready():
+    """Readiness probe, 503 until the embedding model and vector store are loaded."""
+    memory = app.state.meeting_memory
+    if memory.warm_up_error is not None:
+        return JSONResponse({"status": "failed", "error": repr(memory.warm_up_error)}, status_code=503)
+    if not memory.is_ready:
+        return JSONResponse({"status": "warming_up"}, status_code=503)
+    return {"status": "ready"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Latency histograms and gauges in the Prometheus text format."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+def _get_upload(session_id: str) -> ChunkedUpload:
+    upload = app.state.uploads.get(session_id)
+    if upload is None:
+        try:
+            upload = ChunkedUpload(session_id)
+        except UploadError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        app.state.uploads[session_id] = upload
+    return upload
+
+
+@app.put("/upload_chunk/{session_id}/{chunk_index}")
+async def upload_chunk(session_id: str, chunk_index: int, request: Request):
+    """Store one chunk of an audio upload, streamed from the request body."""
+    try:
+        index = await _get_upload(session_id).write_chunk(request.stream(), chunk_index)
+    except UploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"success": True, "chunk_index": index}
+
+
+@app.post("/upload_chunk/{session_id}")
+async def append_chunk(session_id: str, request: Request):
+    """Store the next chunk of an audio upload, for clients that don't number them."""
+    return await upload_chunk(session_id, None, request)
+
+
+@app.post("/finish_upload/{session_id}")
+async def finish_upload(session_id: str, details: UploadedMeeting | None = Body(default=None)):
+    """Assemble the chunks of an upload and transcribe and index it as a meeting.
+
+    The chunks are only deleted once the meeting is stored: after a failure
+    the client can call it again.
+    """
+    upload = _get_upload(session_id)
+    details = details or UploadedMeeting()
+    assembled = f"{upload.dir}/assembled"
+    with upload.active():
+        try:
+            async with upload.lock:
+                size = await asyncio.to_thread(upload.assemble, assembled)
+        except UploadError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        logger.info(f"Assembled upload {session_id}, {size} bytes")
+
+        meeting = Meeting(
+            id=session_id,
+            title=details.title or f"Uploaded meeting {session_id}",
+            participants=details.participants,
+            start_time=details.start_time or datetime.now(),
+        )
+        await _transcribe_file(assembled, meeting)
+    app.state.uploads.pop(session_id, None)
+    await asyncio.to_thread(upload.cleanup)
+    return {"success": True, "meeting": meeting._to_dict()}
+
+
+async def _transcribe_file(path: str, meeting: Meeting):
+    """Feed an audio file through the meeting pipeline, as if it was recorded live."""
+    await asyncio.shield(app.state.warm_up)
+    from backend.handlers.main_handler import MeetingHandler
+    from backend.services.digest import MeetingDigester
+    from backend.services.llm_service import LLMService, resolve_model
+
+    llm = LLMService(await resolve_model())
+    handler = MeetingHandler(
+        STT_API, app.state.meeting_memory, digester=MeetingDigester(llm), catalog=app.state.catalog
+    )
+    handler.record_audio = False
+    async with handler:  # finalizes the meeting on exit
+        handler.start_meeting(meeting)
+        async for frame in iter_audio_frames(path, SAMPLE_RATE):
+            await handler.receive((SAMPLE_RATE, frame))
+            # decode at the pace of the STT, so that only a few frames are in memory
+            while handler.stt.audio_queue.qsize() > UPLOAD_MAX_QUEUED_FRAMES:
+                await asyncio.sleep(0.05)
+
+
+def _fields(fields: str | None, default: tuple[str, ...]) -> tuple[str, ...]:
+    if fields is None:
+        return default
+    requested = tuple(field for field in fields.split(",") if field)
+    unknown = set(requested) - set(MEETING_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return ("id",) + tuple(field for field in requested if field != "id")
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+def _cached_json(request: Request, etag: str, content) -> Response:
+    """`content` with its ETag, or a 304 if the client has it already."""
+    # revalidated on every use, the catalog can change anytime
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content, headers=headers)
+
+
+@app.get("/meetings")
+async def list_meetings(
+    request: Request,
+    cursor: str | None = None,
+    limit: int = Query(50, ge=1, le=MAX_MEETINGS_PAGE),
+    fields: str | None = None,
+):
+    """Stored meetings, newest first, a page at a time.
+
+    `fields` is a comma-separated projection, the transcript is left out unless
+    asked for. The ETag changes with the catalog, `If-None-Match` gets a 304.
+    """
+    catalog: MeetingCatalog = app.state.catalog
+    fields = _fields(fields, MEETING_LIST_FIELDS)
+
+    def page():
+        # reloads the catalog if it changed, off the event loop
+        version = catalog.version
+        if _not_modified(request, f'"{version}"'):
+            return version, None
+        try:
+            entries, next_cursor = catalog.page(cursor, limit)
+        except CursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if "transcript" in fields:
+            entries = [{**entry, "transcript": catalog.transcript(entry["id"])} for entry in entries]
+        return version, {
+            "meetings": [{field: entry.get(field) for field in fields} for entry in entries],
+            "next_cursor": next_cursor,
+        }
+
+    version, content = await asyncio.to_thread(page)
+    return _cached_json(request, f'"{version}"', content)
+
+
+@app.get("/meetings/{meeting_id}")
+async def get_meeting(request: Request, meeting_id: str, fields: str | None = None):
+    """A stored meeting, with its transcript unless `fields` says otherwise."""
+    catalog: MeetingCatalog = app.state.catalog
+    fields = _fields(fields, MEETING_FIELDS)
+
+    def get():
+        version = catalog.version
+        entry = catalog.get(meeting_id)
+        if entry is None or _not_modified(request, f'"{version}"'):
+            return version, entry
+        if "transcript" in fields:
+            # not kept in memory, read for this response only
+            entry = {**entry, "transcript": catalog.transcript(meeting_id)}
+        return version, {field: entry.get(field) for field in fields}
+
+    version, content = await asyncio.to_thread(get)
+    if content is None:
+        raise HTTPException(status_code=404, detail="Unknown meeting")
+    return _cached_json(request, f'"{version}"', content)
+
+
+@app.get("/meetings/{meeting_id}/audio")
+async def meeting_audio(
+    meeting_id: str,
+    start: float = 0.0,
+    end: float | None = None,
+    format: str = Query("wav", pattern="^(wav|opus)$"),
+    range_header: str | None = Header(None, alias="Range"),
+):
+    """Audio of a meeting between `start` and `end` seconds, e.g. behind a retrieved chunk.
+
+    Wav clips support range requests, Opus clips are encoded while they are sent.
+    """
+    if not SESSION_ID_RE.match(meeting_id):
+        raise HTTPException(status_code=400, detail="Invalid meeting id")
+    path = audio_path(RECORDINGS_DIR, meeting_id)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="No recording for this meeting")
+    try:
+        clip = await asyncio.to_thread(AudioClip, path, start, end)
+    except ClipError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if format == "opus":
+        return StreamingResponse(clip.iter_opus(), media_type="audio/ogg")
+
+    size = clip.wav_size
+    try:
+        byte_range = parse_range(range_header, size) if range_header else None
+    except ClipError as e:
+        raise HTTPException(status_code=416, detail=str(e), headers={"Content-Range": f"bytes */{size}"})
+    if byte_range is None:
+        return StreamingResponse(
+            clip.iter_wav(), media_type="audio/wav",
+            headers={"Accept-Ranges": "bytes", "Content-Length": str(size)},
+        )
+    first, last = byte_range
+    return StreamingResponse(
+        clip.iter_wav(first, last), status_code=206, media_type="audio/wav",
+        headers={
+            "Accept-Ranges": "bytes",
+            "Content-Length": str(last - first + 1),
+            "Content-Range": f"bytes {first}-{last}/{size}",
+        },
+    )
+
+
+@app.get("/debug/outbound_queues")
+async def outbound_queues_stats():
+    """Depth and send rate of the outbound queue of every connection."""
+    return {"queues": [{"name": q.name, **q.stats()} for q in OUTBOUND_QUEUES]}
 
 
 @app.websocket("/v1/realtime")
@@ -65,34 +412,54 @@ async def websocket_route(websocket: WebSocket):
         # will not connect.
         await websocket.accept(subprotocol="realtime")
 
-        handler = MeetingHandler(STT_API, app.state.meeting_memory) #TODO handle to be defined
-        chat_handler = ChatHandler(app.state.meeting_memory, handler.recorder)
-        async with handler:
-            try:
-                await _run_route(websocket, handler, chat_handler=chat_handler)
-            except Exception as e:
-                print("Exception in _run_route():", e)
-                traceback.print_exc()
+        token = websocket.query_params.get("session_token")
+        session = app.state.sessions.resume(token) if token else None
+        resumed = session is not None
+        if session is None:
+            await asyncio.shield(app.state.warm_up)
+            from backend.handlers.chat_handler import ChatHandler
+            from backend.handlers.main_handler import MeetingHandler
+            from backend.services.digest import MeetingDigester
+            from backend.services.llm_service import LLMService, resolve_model
+
+            llm = LLMService(await resolve_model())
+            handler = MeetingHandler(
+                STT_API, app.state.meeting_memory, digester=MeetingDigester(llm), catalog=app.state.catalog
+            ) #TODO handle to be defined
+            chat_handler = ChatHandler(
+                app.state.meeting_memory, handler.recorder, answer_cache=app.state.answer_cache, llm=llm
+            )
+            session = await app.state.sessions.create(handler, chat_handler)
+
+        connection_id = app.state.sessions.attach(session, websocket)
+        try:
+            await websocket.send_text(ora.SessionResumable(
+                session_token=session.token,
+                resumed=resumed,
+                last_audio_seq=session.last_audio_seq,
+            ).model_dump_json())
+            await _run_route(websocket, session)
+        except Exception as e:
+            print("Exception in _run_route():", e)
+            traceback.print_exc()
+        finally:
+            # Keeps the pipeline alive for a while unless the meeting was finalized
+            await app.state.sessions.detach(session, connection_id)
     except Exception as exc:
         print(f"WebSocket connection error: {exc}")
         traceback.print_exc()
 
 
-async def _run_route(websocket: WebSocket, handler: MeetingHandler, chat_handler: ChatHandler = None):
+async def _run_route(websocket: WebSocket, session: RealtimeSession):
     logger.info("Starting _run_route")
-    emit_queue: asyncio.Queue[ora.ServerEvent] = asyncio.Queue()
-    async def consume_emit_queue():
-        while True:
-            event = await emit_queue.get()
-            print("Emit queue event:", event)
-            emit_queue.task_done()
+    emit_queue = OutboundQueue(name="emit")
     try:
         async with asyncio.TaskGroup() as tg:
             tg.create_task(
-                receive_loop(websocket, handler, emit_queue, chat_handler), name="receive_loop()"
+                receive_loop(websocket, session, emit_queue), name="receive_loop()"
             )
             tg.create_task(
-                send_loop(websocket, emit_queue, handler, chat_handler), name="emit_queue_consumer"
+                send_loop(websocket, emit_queue, session.handler, session.chat_handler), name="emit_queue_consumer"
                 )
     except Exception as e:
         import traceback
@@ -101,20 +468,25 @@ async def _run_route(websocket: WebSocket, handler: MeetingHandler, chat_handler
     
 
 
+def _decode_opus(session: RealtimeSession, opus_bytes: bytes) -> np.ndarray:
+    with OPUS_DECODE_TIME.time():
+        return session.opus_reader.append_bytes(opus_bytes)
+
+
 async def receive_loop(
     websocket: WebSocket,
-    handler: MeetingHandler,
-    emit_queue: asyncio.Queue[ora.ServerEvent],
-    chat_handler: ChatHandler = None,
+    session: RealtimeSession,
+    emit_queue: OutboundQueue,
 ):
     """Receive messages from the WebSocket.
 
     Can decide to send messages via `emit_queue`.
     """
-    opus_reader = sphn.OpusStreamReader(SAMPLE_RATE)
-    wait_for_first_opus = True
+    handler = session.handler
+    chat_handler = session.chat_handler
+    last_ack = time.monotonic()
+    logger.info("WebSocket connected, entering receive loop")
     while True:
-        logger.info("WebSocket connected, entering receive loop")
         try:
             message_raw = await websocket.receive_text()
             
@@ -131,65 +503,99 @@ async def receive_loop(
 
             logger.info("receive_loop() stopped because WebSocket disconnected.")
             raise WebSocketClosedError() from e
-        
-        try:
-            message: ora.ClientEvent = ClientEventAdapter.validate_json(message_raw)
-        except json.JSONDecodeError as e:
-            print("Invalid JSON received:", e)
-            await emit_queue.put(
-                ora.Error(
-                    error=ora.ErrorDetails(
-                        type="invalid_request_error",
-                        message=f"Invalid JSON: {e}",
+
+        # Audio appends are most of the traffic, skip the full validation for them
+        audio_append = ora.parse_audio_append(message_raw)
+        message = None
+        if audio_append is None:
+            try:
+                message = ClientEventAdapter.validate_json(message_raw)
+            except json.JSONDecodeError as e:
+                print("Invalid JSON received:", e)
+                await emit_queue.put(
+                    ora.Error(
+                        error=ora.ErrorDetails(
+                            type="invalid_request_error",
+                            message=f"Invalid JSON: {e}",
+                        )
                     )
                 )
-            )
-            continue
-        except ValidationError as e:
-            await emit_queue.put(
-                ora.Error(
-                    error=ora.ErrorDetails(
-                        type="invalid_request_error",
-                        message="Invalid message",
-                        details=json.loads(e.json()),
+                continue
+            except ValidationError as e:
+                await emit_queue.put(
+                    ora.Error(
+                        error=ora.ErrorDetails(
+                            type="invalid_request_error",
+                            message="Invalid message",
+                            details=json.loads(e.json()),
+                        )
                     )
                 )
-            )
-            continue
-
-        message_to_record = message
-        
-        if isinstance(message, ora.InputAudioBufferAppend):
-            opus_bytes = base64.b64decode(message.audio)
-            if wait_for_first_opus:
-                # Somehow the UI is sending us potentially old messages from a previous
+                continue
+            if isinstance(message, ora.InputAudioBufferAppend):
+                audio_append = (message.audio, message.seq)
+
+        if audio_append is not None:
+            audio, seq = audio_append
+            if not session.accept_audio_seq(seq):
+                continue  # replayed after a reconnect, already decoded
+            try:
+                opus_bytes = base64.b64decode(audio)
+            except ValueError as e:
+                await emit_queue.put(
+                    ora.Error(
+                        error=ora.ErrorDetails(
+                            type="invalid_request_error",
+                            message=f"Invalid audio: {e}",
+                        )
+                    )
+                )
+                continue
+            if session.wait_for_first_opus:
+                # Clients without sequence numbers may send old messages from a previous
                 # connection on reconnect, so that we might get some old OGG packets,
                 # waiting for the bit set for first packet to feed to the decoder.
-                if opus_bytes[5] & 2:
-                    wait_for_first_opus = False
+                if len(opus_bytes) > 5 and opus_bytes[5] & 2:
+                    session.wait_for_first_opus = False
                 else:
                     continue
-            pcm = await asyncio.to_thread(opus_reader.append_bytes, opus_bytes)
-
-            message_to_record = ora.UnmuteInputAudioBufferAppendAnonymized(
-                number_of_samples=pcm.size,
-            )
+            pcm = await asyncio.to_thread(_decode_opus, session, opus_bytes)
 
             if pcm.size:
                 asyncio.create_task(handler.receive((SAMPLE_RATE, pcm)))
+            if seq is not None and time.monotonic() - last_ack >= AUDIO_ACK_INTERVAL:
+                last_ack = time.monotonic()
+                emit_queue.put_nowait(ora.InputAudioBufferAck(seq=session.last_audio_seq))
         elif isinstance(message, ora.InputUserChatQuery):
             logger.info("Received chat query:", message.query)
-            asyncio.create_task(chat_handler.handle_query(message.query))
+            # a new query preempts the answer still streaming, if any
+            await chat_handler.submit_query(message.query)
+        elif isinstance(message, ora.InputUserChatCancel):
+            await chat_handler.cancel_generation()
         elif isinstance(message, ora.InputAudioBufferStart):
+            # the id names the files of the meeting, it must not be a path
+            if not SESSION_ID_RE.match(message.meeting.meeting_id):
+                await emit_queue.put(
+                    ora.Error(
+                        error=ora.ErrorDetails(
+                            type="invalid_request_error",
+                            message=f"Invalid meeting id: {message.meeting.meeting_id!r}",
+                            param="meeting.id",
+                        )
+                    )
+                )
+                continue
             print("Starting new meeting recording session")
-            handler.meeting = message.meeting
+            handler.start_meeting(message.meeting)
 
         elif isinstance(message, ora.InputAudioBufferFinalize):
+            session.finished = True
             await handler.finalize_recording()
             print("meeting finished, finalizing")
             #await websocket.close(code=1000, reason="Meeting finalized")
             return
         elif isinstance(message, ora.RecordingStopped):
+            session.finished = True
             await handler.finalize_recording()
             await websocket.close(code=1000, reason="Recording stopped")
             break
@@ -198,9 +604,8 @@ async def receive_loop(
             await emit_queue.put(ora.SessionUpdated(session=message.session))
 
         elif isinstance(message, ora.UnmuteAdditionalOutputs):
-            # Don't record this: it's a debugging message and can be verbose. Anything
-            # important to store should be in the other event types.
-            message_to_record = None
+            # Debugging message, nothing to do
+            pass
 
         else:
             logger.info("Ignoring message:", str(message)[:100])
@@ -208,9 +613,9 @@ async def receive_loop(
 
 async def send_loop(
     websocket: WebSocket,
-    emit_queue: asyncio.Queue[ora.ServerEvent],
-    handler: MeetingHandler,
-    chat_handler: ChatHandler = None,
+    emit_queue: OutboundQueue,
+    handler: "MeetingHandler",
+    chat_handler: "ChatHandler" = None,
 ):
     """Send messages from the emit queue  and handler output queue to the WebSocket."""
     while True:
@@ -219,6 +624,7 @@ async def send_loop(
             logger.info("send_loop() stopping because WebSocket is disconnected.")
             raise WebSocketClosedError()
         emission = None
+        source_queue = emit_queue
         try:
             emission = emit_queue.get_nowait()
             
@@ -229,6 +635,7 @@ async def send_loop(
                 logger.warning("Error in handler.emit():", e)
 
             if emission is None and chat_handler is not None:
+                source_queue = chat_handler.output_queue
                 try:
                     emission = await chat_handler.emit_responses()
                 except Exception as e:
@@ -240,8 +647,12 @@ async def send_loop(
                 continue
             if isinstance(emission, ora.Error):
                 print("Emit queue event:", emission)
-            else:
-                await websocket.send_text(emission.model_dump_json())
+            payload = emission.model_dump_json()
+            send_start = time.perf_counter()
+            await websocket.send_text(payload)
+            send_time = time.perf_counter() - send_start
+            source_queue.record_sent(len(payload), send_time)
+            WS_SEND_TIME.observe(send_time)
         except (WebSocketDisconnect, RuntimeError) as e:
             if isinstance(e, RuntimeError):
                 logger.info("error in send_loop():", e)
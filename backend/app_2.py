@@ -1,8 +1,31 @@
-from flask import Flask
+import json
+import os
+import time
+
+import requests
+from flask import Flask, jsonify, request
+
+from backend.utils.sparse_tfidf import SparseTfidfIndex
 
 # Create the application instance
 app = Flask(__name__)
 
+GEMINI_API_URL = os.environ.get("GEMINI_API_URL", "")
+# --- In-Memory Database ---
+# Stores: { id: str, title: str, transcript: str, timestamp: float }
+MEETING_NOTES = []
+# TF-IDF index of the transcripts, rows are note ids
+NOTES_INDEX = SparseTfidfIndex()
+# notes of the search results, by id
+NOTES_BY_ID = {}
+
+
+def add_note(note):
+    """Store a note and index it for search."""
+    MEETING_NOTES.append(note)
+    NOTES_BY_ID[note['id']] = note
+    NOTES_INDEX.add(note['id'], note['transcript'])
+
 # Define the route for the homepage
 # --- STT Mocking (Replace with actual Kyutai STT Model Logic) ---
 def transcribe_audio(audio_file_data):
@@ -34,68 +57,16 @@ def transcribe_audio(audio_file_data):
     return transcript, title
 
 
-# --- Vector Embedding & Search Simulation (Lightweight TF-IDF Approximation) ---
-def tokenize(text):
-    """Simple tokenizer."""
-    return re.findall(r'\b\w+\b', text.lower())
-
-def generate_embedding(text):
-    """
-    Generates a TF (Term Frequency) vector for the document based on the global vocabulary.
-    This simulates creating a dense vector for storage and search.
-    """
-    tokens = tokenize(text)
-    token_counts = Counter(tokens)
-    
-    # Update global vocabulary
-    global GLOBAL_VOCABULARY
-    GLOBAL_VOCABULARY.update(tokens)
-
-    # Return the raw token frequency count as the "vector"
-    return token_counts
-
-
-def cosine_similarity(vec1, vec2):
-    """Calculates cosine similarity between two Counter vectors (TF vectors)."""
-    
-    # 1. Calculate Dot Product
-    intersection = set(vec1.keys()) & set(vec2.keys())
-    dot_product = sum(vec1[token] * vec2[token] for token in intersection)
-    
-    # 2. Calculate Magnitudes
-    magnitude1 = math.sqrt(sum(val**2 for val in vec1.values()))
-    magnitude2 = math.sqrt(sum(val**2 for val in vec2.values()))
-    
-    # 3. Calculate Similarity
-    if magnitude1 * magnitude2 == 0:
-        return 0
-    return dot_product / (magnitude1 * magnitude2)
-
-
+# --- Vector Search (sparse TF-IDF) ---
 def vector_search(query_text, k=3):
     """
-    Simulates a vector search by generating a query vector and finding the
-    top k most similar documents in the in-memory database.
+    Finds the top k notes by TF-IDF cosine similarity with the query.
     """
     if not MEETING_NOTES:
         return []
 
-    # 1. Generate Query Vector
-    query_vector = generate_embedding(query_text)
+    top_results = [NOTES_BY_ID[note_id]['transcript'] for note_id, _ in NOTES_INDEX.search(query_text, k=k)]
 
-    # 2. Calculate Similarity for all notes
-    similarities = []
-    for note in MEETING_NOTES:
-        # Note: The stored 'vector' is the Counter object
-        similarity = cosine_similarity(query_vector, note['vector'])
-        similarities.append((similarity, note))
-    
-    # 3. Sort and select top K results
-    similarities.sort(key=lambda x: x[0], reverse=True)
-    
-    # Return the transcript texts of the top K results
-    top_results = [note['transcript'] for score, note in similarities if score > 0][:k]
-    
     print(f"Vector Search retrieved {len(top_results)} documents.")
     return top_results
 
@@ -154,9 +125,7 @@ def query_gemini(user_query, context_documents):
 @app.route('/api/notes', methods=['GET'])
 def get_notes():
     """Returns the list of stored meeting notes."""
-    # Strip the vector data for cleaner JSON transfer
-    clean_notes = [{k: v for k, v in note.items() if k != 'vector'} for note in MEETING_NOTES]
-    return jsonify({'notes': clean_notes})
+    return jsonify({'notes': MEETING_NOTES})
 
 
 @app.route('/api/upload_chunk', methods=['POST'])
@@ -226,19 +195,17 @@ def finish_upload():
         # 1. STT Transcription (Simulated)
         transcript, title = transcribe_audio(audio_data)
 
-        # 2. Vector Embedding
-        vector = generate_embedding(transcript)
 
-        # 3. Store in Database
+        # 2. Build the note
         note_id = str(len(MEETING_NOTES) + 1).zfill(4)
         new_note = {
             'id': note_id,
             'title': title,
             'transcript': transcript,
             'timestamp': time.time(),
-            'vector': vector
         }
-        MEETING_NOTES.append(new_note)
+        # 3. Store it and index it for search
+        add_note(new_note)
 
         # Cleanup: remove uploaded chunks and assembled file
         try:
@@ -248,7 +215,7 @@ def finish_upload():
         except Exception:
             pass
 
-        return jsonify({'success': True, 'note': {k: v for k, v in new_note.items() if k != 'vector'}})
+        return jsonify({'success': True, 'note': new_note})
 
     except Exception as e:
         print('Error assembling chunks:', e)
@@ -257,7 +224,7 @@ def finish_upload():
 @app.route('/api/transcribe', methods=['POST'])
 def handle_transcription():
     """
-    Handles audio file upload, performs simulated STT, creates vector embedding,
+    Handles audio file upload, performs simulated STT, indexes the transcript for search,
     and stores the result in the database.
     """
     if 'audio' not in request.files:
@@ -274,24 +241,22 @@ def handle_transcription():
         # 1. STT Transcription (Simulated)
         transcript, title = transcribe_audio(audio_data)
 
-        # 2. Vector Embedding
-        vector = generate_embedding(transcript)
         
-        # 3. Store in Database
+        # 2. Build the note
         note_id = str(len(MEETING_NOTES) + 1).zfill(4)
         new_note = {
             'id': note_id,
             'title': title,
             'transcript': transcript,
             'timestamp': time.time(),
-            'vector': vector # Store the vector (Counter object)
         }
-        MEETING_NOTES.append(new_note)
+        # 3. Store it and index it for search
+        add_note(new_note)
 
         return jsonify({
             'success': True, 
             'message': 'Transcription, embedding, and storage successful.', 
-            'note': {k: v for k, v in new_note.items() if k != 'vector'}
+            'note': new_note
         })
 
     except Exception as e:
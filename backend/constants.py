@@ -1,2 +1,20 @@
-LLM_SERVER = "https://ungoaded-tashina-trustily.ngrok-free.dev/"
-LLM_API_KEY = ""
\ No newline at end of file
+import os
+
+# OpenAI-compatible server, with a trailing slash
+LLM_SERVER = os.environ.get("LLM_SERVER", "https://ungoaded-tashina-trustily.ngrok-free.dev/")
+LLM_API_KEY = ""
+# Server worker processes, read by uvicorn as the default of --workers
+WEB_CONCURRENCY = max(1, int(os.environ.get("WEB_CONCURRENCY", "1")))
+# Admission control in front of the LLM server. The scheduler is per process:
+# the limit is for the whole server, each worker gets its share.
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "4"))
+LLM_MAX_CONCURRENCY_PER_WORKER = max(1, LLM_MAX_CONCURRENCY // WEB_CONCURRENCY)
+LLM_MAX_QUEUE_WAIT = float(os.environ.get("LLM_MAX_QUEUE_WAIT", "10"))
+# Opt-in event loop lag sampler and slow callback detector
+LOOP_MONITOR = os.environ.get("LOOP_MONITOR", "0") == "1"
+LOOP_MONITOR_THRESHOLD = float(os.environ.get("LOOP_MONITOR_THRESHOLD", "0.1"))
+# Index service shared by the workers, e.g. unix:/run/meeting_index.sock. Empty
+# keeps the meeting memory in-process, which only works with a single worker.
+MEETING_INDEX_URL = os.environ.get("MEETING_INDEX_URL", "")
+# Worker processes for embeddings, text splitting and audio conversion, 0 runs them in threads
+CPU_POOL_WORKERS = int(os.environ.get("CPU_POOL_WORKERS", "0"))
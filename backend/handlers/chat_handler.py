@@ -1,23 +1,72 @@
 from backend.models.chatbot import Chatbot
 import asyncio
-from fastrtc import wait_for_item
 import backend.openai_realtime_api_events as ora
 from backend.services.llm_service import LLMService
+from backend.services.llm_scheduler import LLMBusyError
+from backend.services.answer_cache import AnswerCache
+from backend.models.meeting import Meeting
+from backend.utils.tokens import TokenCounter
+from backend.utils.outbound_queue import OutboundQueue
 import json
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Used when the digest of the last meeting is not available (yet)
+MAX_TRANSCRIPT_EXCERPT_CHARS = 2000
+
+_SUMMARY_PROMPT = """
+Update the summary of a conversation between a user and a meeting assistant.
+Keep the facts, names, numbers and open questions, in a few sentences.
+
+Current summary:
+{summary}
+
+New turns:
+{turns}
+"""
 
 
 class ChatHandler:
-    def __init__(self, meeting_memory, recorder):
-        self.llm = LLMService()
+    def __init__(self, meeting_memory, recorder, answer_cache: AnswerCache | None = None, llm: LLMService | None = None):
+        self.llm = llm if llm is not None else LLMService()
         self.meeting_memory = meeting_memory
         self.recorder = recorder
-        self.chatbot = Chatbot()
-        self.output_queue = asyncio.Queue()
+        self.answer_cache = answer_cache
+        self.chatbot = Chatbot(token_counter=TokenCounter(self.llm.model))
+        self.output_queue = OutboundQueue(name="chat")
+        self.summary_task: asyncio.Task | None = None
+        self.generation_task: asyncio.Task | None = None
+
+    async def submit_query(self, query: str):
+        """Answer a query in the background, preempting the answer still streaming."""
+        await self.cancel_generation()
+        self.generation_task = asyncio.create_task(self.handle_query(query))
+
+    async def cancel_generation(self) -> bool:
+        """Cancel the in-flight answer, which also closes its stream to the LLM server."""
+        task = self.generation_task
+        if task is None or task.done():
+            return False
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return True
+
+    async def close(self):
+        await self.cancel_generation()
+        if self.summary_task is not None:
+            self.summary_task.cancel()
 
     async def handle_query(self, query: str):
         """Handle a user chat query"""
         llm = self.llm
-        context_chunks = self.meeting_memory.query(query, k=3)
+        query_vector = await self.meeting_memory.aembed_query(query)
+        version = self.meeting_memory.version
+        context_chunks = await self.meeting_memory.aquery(query, k=3, query_vector=query_vector)
         if not context_chunks:
             context_chunks = []
         context = "\n\n".join(
@@ -27,42 +76,113 @@ class ChatHandler:
         for c in context_chunks:
             c['metadata']['title'] = 'Meeting minute'
         sources = [{'text': r['content'], 'metadata': r['metadata']} for r in context_chunks]
+        source_ids = {r['id'] for r in context_chunks}
         
-        last_meeting_context = self.recorder.last_meeting
+        last_meeting_context = await self.recorder.last_meeting()
 
         if last_meeting_context is not None:
-            meeting_text = last_meeting_context.model_dump(by_alias=True)
-            meeting_text["start_time"] = meeting_text["start_time"].isoformat()
-            meeting_text = json.dumps(
-                meeting_text,
-                ensure_ascii=False
-            )
-            
             sources.append({
                 "title": "meeting minute",
-                "text": meeting_text,
+                "text": self.last_meeting_text(last_meeting_context),
                 "metadata": {"info": "Last recorded meeting"}
             })
+            digest_state = "digest" if last_meeting_context.digest is not None else "excerpt"
+            source_ids.add(f"last_meeting:{last_meeting_context.meeting_id}:{digest_state}")
         
-        await self.chatbot.add_chat_message_delta("user", query, None)
-        await self.generate_response(sources)
+        # a follow-up question depends on the earlier turns, not only on its sources
+        history = self.chatbot.history_digest()
+        # a new turn even if the last query was never answered
+        user_message = self.chatbot.start_message("user", query)
+
+        source_ids = frozenset(source_ids)
+        try:
+            if self.answer_cache is not None:
+                cached = self.answer_cache.lookup(query_vector, source_ids, version, history)
+                if cached is not None:
+                    await self.replay_response(cached)
+                    return
+            answer = await self.generate_response(sources)
+        except LLMBusyError as e:
+            # rejected before any answer, the query must not stay in the history
+            self.chatbot.discard(user_message)
+            await self.output_queue.put(ora.Error(
+                error=ora.ErrorDetails(type="server_busy", message=str(e))
+            ))
+            await self.output_queue.put(ora.ResponseTextDone(delta=""))
+            return
+        except asyncio.CancelledError:
+            # preempted before the first delta: drop the unanswered query
+            if self.chatbot.chat_history[-1] is user_message:
+                self.chatbot.discard(user_message)
+            raise
+        if self.answer_cache is not None and answer:
+            self.answer_cache.store(query_vector, source_ids, answer, version, history)
         return
     
-    async def generate_response(self, sources: list[dict] | None = None):
+    @staticmethod
+    def last_meeting_text(meeting: Meeting) -> str:
+        """Bounded description of the last meeting: its digest, or the end of its transcript."""
+        meeting_text = meeting.model_dump(by_alias=True, exclude={"transcript", "digest"})
+        meeting_text["start_time"] = meeting_text["start_time"].isoformat()
+        if meeting.digest is not None:
+            meeting_text.update(meeting.digest.model_dump())
+        else:
+            transcript = meeting.transcript or ""
+            meeting_text["transcript_excerpt"] = transcript[-MAX_TRANSCRIPT_EXCERPT_CHARS:]
+        return json.dumps(meeting_text, ensure_ascii=False)
+
+    async def generate_response(self, sources: list[dict] | None = None) -> str:
         """Generate a response from the chatbot using the LLM service."""
         llm = self.llm
         messages = self.chatbot.prerocessed()
         role = "assistant"
-        async for data in llm.stream_response(messages, sources):
-            await self.output_queue.put(ora.ResponseTextDelta(delta=data))
+        deltas = []
+        try:
+            async for data in llm.stream_response(messages, sources):
+                await self.output_queue.put(ora.ResponseTextDelta(delta=data))
+                deltas.append(data)
+
+                await self.chatbot.add_chat_message_delta(role, data)
+        except asyncio.CancelledError:
+            # Close the partial answer for the client, it is kept in the history
+            self.chatbot.complete_message()
+            self.output_queue.put_nowait(ora.ResponseTextDone(delta=""))
+            raise
+        self.chatbot.complete_message()
+        await self.output_queue.put(ora.ResponseTextDone(delta=""))
+        self.maybe_summarize_history()
+        return "".join(deltas)
 
-            await self.chatbot.add_chat_message_delta(role, data)
+    def maybe_summarize_history(self):
+        """Fold the turns that left the token window into the summary, in the background."""
+        if self.summary_task is not None and not self.summary_task.done():
+            return
+        if not self.chatbot.turns_to_summarize():
+            return
+        self.summary_task = asyncio.create_task(self._summarize_history())
+
+    async def _summarize_history(self):
+        turns = self.chatbot.turns_to_summarize()
+        prompt = _SUMMARY_PROMPT.format(
+            summary=self.chatbot.summary or "(empty)",
+            turns="\n".join(f"{m['role']}: {m['content']}" for m in turns),
+        )
+        try:
+            summary = await self.llm.complete([{"role": "user", "content": prompt}])
+        except Exception as e:
+            logger.warning(f"Chat history summarization failed: {e}")
+            return
+        self.chatbot.set_summary(summary.strip(), len(turns))
+
+    async def replay_response(self, answer: str):
+        """Stream a cached answer the same way as a generated one."""
+        for delta in re.findall(r"\s*\S+", answer):
+            await self.output_queue.put(ora.ResponseTextDelta(delta=delta))
+            await self.chatbot.add_chat_message_delta("assistant", delta)
+        self.chatbot.complete_message()
         await self.output_queue.put(ora.ResponseTextDone(delta=""))
+        self.maybe_summarize_history()
         
 
     async def emit_responses(self):
-        output_queue_item = await wait_for_item(self.output_queue)
-        if output_queue_item is not None:
-            return output_queue_item
-        else:
-            return None
\ No newline at end of file
+        return await self.output_queue.get(timeout=0.1)
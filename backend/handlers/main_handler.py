@@ -1,14 +1,28 @@
+from backend.configs import RECORDINGS_DIR
 from backend.services.recorder import Recorder
 from fastrtc import AsyncStreamHandler
+import asyncio
+import logging
 import numpy as np
 from backend.services.stt import SpeechToText
 from backend.models.meeting import Meeting
 from backend.services.meeting_memory import MeetingMemory
+from backend.services.live_indexer import LiveMeetingIndexer
+from backend.services.digest import MeetingDigester
+from backend.services.meeting_catalog import MeetingCatalog
+
+logger = logging.getLogger(__name__)
 
 SAMPLE_RATE = 24000
-RECORDINGS_DIR = "recordings"
 class MeetingHandler(AsyncStreamHandler):
-    def __init__(self, stt_api, meeting_memory:MeetingMemory, sample_rate=SAMPLE_RATE):
+    def __init__(
+        self,
+        stt_api,
+        meeting_memory: MeetingMemory,
+        sample_rate=SAMPLE_RATE,
+        digester: MeetingDigester | None = None,
+        catalog: MeetingCatalog | None = None,
+    ):
         super().__init__(
             input_sample_rate=SAMPLE_RATE,
             output_frame_size=480,
@@ -17,9 +31,17 @@ class MeetingHandler(AsyncStreamHandler):
         self.sample_rate = sample_rate
         self.n_samples_received = 0
         self.meeting: Meeting | None = None
-        self.recorder = Recorder(RECORDINGS_DIR)
-        self.stt = SpeechToText(api=stt_api)
+        self.recorder = Recorder(RECORDINGS_DIR, sample_rate, catalog=catalog)
+        self.stt = SpeechToText(api=stt_api, sample_rate=sample_rate)
         self.meeting_memory = meeting_memory
+        self.live_indexer = LiveMeetingIndexer(meeting_memory)
+        # journaled first, the transcript is not kept in memory during the meeting
+        self.stt.segment_listeners.append(self.recorder.add_segment)
+        self.stt.segment_listeners.append(self.live_indexer.add_segment)
+        self.digester = digester
+        self.digest_task: asyncio.Task | None = None
+        # off for uploaded files, which are their own recording
+        self.record_audio = True
         self.current_buffer = []
         self.text_log = []
         self.closed = False
@@ -31,15 +53,21 @@ class MeetingHandler(AsyncStreamHandler):
         self.n_samples_received += audio.shape[-1]
 
         # Save audio
-        await self.recorder.add_audio(audio)
+        if self.record_audio:
+            await self.recorder.add_audio(audio)
 
         # Stream audio to STT (non-blocking)
         await self.stt.send_audio(audio)
-        self.meeting.transcript = self.stt.transcript_buffer
         
 
-    def get_transcript(self):
-        return self.meeting.transcript if self.meeting else ""
+    def start_meeting(self, meeting: Meeting):
+        """Attach the meeting being recorded, its transcript is indexed live."""
+        self.meeting = meeting
+        self.recorder.start_meeting(meeting)
+        self.live_indexer.start(meeting)
+
+    async def get_transcript(self):
+        return await self.recorder.read_transcript() if self.meeting else ""
     
     async def finalize_recording(self):
         """Finalize the recording session."""
@@ -51,15 +79,28 @@ class MeetingHandler(AsyncStreamHandler):
         # Save final transcript
         await self.stt.finalize()
         if self.meeting is not None:
-            self.meeting.transcript = self.stt.transcript_buffer
+            self.meeting.transcript = await self.recorder.read_transcript()
             await self.recorder.add_meeting(self.meeting)
             
-            await self.recorder.close()
-            if self.meeting.transcript.strip():
-                self.meeting_memory.add_meeting(self.meeting)
+            await self.recorder.close(self.meeting.meeting_id)
+            # Most chunks were indexed during the recording, only the tail is left
+            await self.live_indexer.commit()
+            if self.digester is not None:
+                self.digest_task = asyncio.create_task(self._digest_meeting(self.meeting))
             print("Recording finalized and saved.")
+        await self.recorder.remove_journal()
         self.closed = True
 
+    async def _digest_meeting(self, meeting: Meeting):
+        """Generate the meeting digest in the background and store it with the meeting."""
+        try:
+            meeting.digest = await self.digester.digest(meeting)
+        except Exception as e:
+            logger.warning(f"Digest generation failed for meeting {meeting.meeting_id}: {e}")
+            return
+        if meeting.digest is not None:
+            await self.recorder.update_meeting(meeting)
+
     async def emit(self):
         return None  # nothing to send to frontend
     
@@ -1,36 +1,145 @@
-from typing import Any, Literal
+import hashlib
+import json
+from typing import Literal
 from backend.utils.system_prompts import ConstantInstructions
+from backend.utils.tokens import TokenCounter
 
 
 ConversationState = Literal["waiting_for_user", "user_speaking", "bot_speaking"]
 
+# Tokens of conversation sent to the LLM, on top of the system prompt and sources
+HISTORY_TOKEN_BUDGET = 2048
+# Part of the budget reserved for the summary of older turns
+SUMMARY_TOKEN_BUDGET = 384
+
+
+class ChatMessage:
+    """A chat message whose content is accumulated from streamed deltas.
+
+    Deltas are appended to a list and only joined when the content is read, so
+    streaming a response is linear in its length.
+    """
+
+    __slots__ = ("role", "_parts", "_content", "_ends_with_space", "_n_tokens")
+
+    def __init__(self, role: str, content: str = ""):
+        self.role = role
+        self._parts: list[str] = [content] if content else []
+        self._content: str | None = content
+        self._ends_with_space = content.endswith(" ")
+        self._n_tokens: int | None = None
+
+    def append(self, delta: str):
+        """Append a delta, separating words with a space like the LLM server expects."""
+        if not delta:
+            return
+        if self._parts and not self._ends_with_space and not delta.startswith(" "):
+            self._parts.append(" ")
+        self._parts.append(delta)
+        self._ends_with_space = delta.endswith(" ")
+        self._content = None
+        self._n_tokens = None
+
+    @property
+    def content(self) -> str:
+        if self._content is None:
+            self._content = "".join(self._parts)
+            self._parts = [self._content]
+        return self._content
+
+    def n_tokens(self, token_counter: TokenCounter) -> int:
+        if self._n_tokens is None:
+            self._n_tokens = token_counter.count_message(self.to_dict())
+        return self._n_tokens
+
+    def to_dict(self) -> dict[str, str]:
+        return {"role": self.role, "content": self.content}
+
+
 class Chatbot():
-    def __init__(self, ):
-        self.chat_history: list[dict[Any, Any]]  = [
-            {"role": "system", "content": ConstantInstructions().make_system_prompt()}
+    def __init__(self, token_counter: TokenCounter | None = None, token_budget: int = HISTORY_TOKEN_BUDGET):
+        self.chat_history: list[ChatMessage] = [
+            ChatMessage("system", ConstantInstructions().make_system_prompt())
         ]
+        self.token_counter = token_counter if token_counter is not None else TokenCounter()
+        self.token_budget = token_budget
+        # summary of the turns that were dropped from `chat_history`
+        self.summary = ""
+
+
+    def start_message(self, role: Literal["user", "assistant"], content: str = "") -> ChatMessage:
+        """Append a new message, even if the last one has the same role."""
+        message = ChatMessage(role, content)
+        self.chat_history.append(message)
+        return message
+
+    def discard(self, message: ChatMessage) -> bool:
+        """Remove a message that was never answered, e.g. a query whose answer was cancelled."""
+        for i in range(len(self.chat_history) - 1, 0, -1):
+            if self.chat_history[i] is message:
+                del self.chat_history[i]
+                return True
+        return False
 
-    
     async def add_chat_message_delta(self, role: Literal["user", "assistant"], delta: str, generating_message_i: int|None=None) -> bool:
         """Add a delta message to the chat history."""
         if generating_message_i is not None and generating_message_i > len(self.chat_history):
             #TODO logging
             return False
-        if self.chat_history[-1]["role"] != role:
+        if self.chat_history[-1].role != role:
             # New message
-            self.chat_history.append({"role": role, "content": delta})
+            self.chat_history.append(ChatMessage(role, delta))
         else:
-            last_message = self.chat_history[-1]
-            needs_right_space = last_message != "" and not last_message["content"].endswith(" ")
-            needs_left_space = delta != "" and not delta.startswith(" ")
-            if needs_right_space and needs_left_space:
-                last_message["content"] += " " + delta
-            else:
-                last_message["content"] += delta
+            self.chat_history[-1].append(delta)
         return True
-    
+
+    def complete_message(self) -> str:
+        """Build the final content of the last message once it is fully streamed."""
+        return self.chat_history[-1].content
+
+    def _window_start(self) -> int:
+        """Index of the oldest message of the recent turns that fit in the budget.
+
+        The last message is always kept, even if it is over budget on its own.
+        """
+        budget = self.token_budget - SUMMARY_TOKEN_BUDGET
+        start = len(self.chat_history)
+        while start > 1:
+            cost = self.chat_history[start - 1].n_tokens(self.token_counter)
+            if budget - cost < 0 and start < len(self.chat_history):
+                break
+            budget -= cost
+            start -= 1
+        return start
+
+    def turns_to_summarize(self) -> list[dict[str, str]]:
+        """Messages that fell out of the window and are not in the summary yet."""
+        return [m.to_dict() for m in self.chat_history[1:self._window_start()]]
+
+    def set_summary(self, summary: str, n_summarized: int):
+        """Replace the first `n_summarized` turns (after the system prompt) by `summary`."""
+        self.summary = self.token_counter.truncate(summary, SUMMARY_TOKEN_BUDGET)
+        del self.chat_history[1:1 + n_summarized]
+
+    def history_digest(self) -> str:
+        """Digest of the conversation sent with the next query, empty before the first turn."""
+        messages = self.prerocessed()[1:]
+        if not messages:
+            return ""
+        return hashlib.sha1(json.dumps(messages, ensure_ascii=False).encode()).hexdigest()
+
     def prerocessed(self) -> list[dict[str, str]]:
-        """Get the preprocessed chat history for LLM input."""
-        return self.chat_history
+        """Get the preprocessed chat history for LLM input.
+
+        The system prompt, the summary of older turns and the most recent turns that
+        fit in the token budget.
+        """
+        messages = [self.chat_history[0].to_dict()]
+        if self.summary:
+            messages.append({
+                "role": "system",
+                "content": f"Summary of the earlier conversation:\n{self.summary}",
+            })
+        messages.extend(m.to_dict() for m in self.chat_history[self._window_start():])
+        return messages
 
-    
\ No newline at end of file
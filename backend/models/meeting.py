@@ -2,12 +2,20 @@ from pydantic import BaseModel, Field, ValidationError
 from datetime import datetime
 from typing import List, Optional
 
+class MeetingDigest(BaseModel):
+    """Bounded summary of a meeting, generated once at finalize."""
+    summary: str = ""
+    action_items: List[str] = Field(default_factory=list)
+    decisions: List[str] = Field(default_factory=list)
+
+
 class Meeting(BaseModel):
     meeting_id: str = Field(alias="id")
     title: str
     participants: List[str]
     start_time: datetime
     transcript: Optional[str] = ""
+    digest: Optional[MeetingDigest] = None
 
     def _to_dict(self):
         return {
@@ -16,6 +24,7 @@ class Meeting(BaseModel):
             "participants": self.participants,
             "start_time": self.start_time.isoformat(),
             "transcript": self.transcript,
+            "digest": self.digest.model_dump() if self.digest is not None else None,
         }
     
     @classmethod
@@ -4,6 +4,7 @@ https://platform.openai.com/docs/api-reference/realtime-client-events
 https://platform.openai.com/docs/api-reference/realtime-server-events
 """
 
+import itertools
 import random
 from typing import (
     Any,
@@ -23,17 +24,69 @@ from backend.models.meeting import Meeting
 
 T = TypeVar("T", bound=str)
 
+_ID_ALPHABET = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+
 
 def random_id(prefix: str) -> str:
     """e.g. event_BJhGUIswO2u7vA2Cxw3Jy"""
     n_characters = 21
-    alphabet = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
-    return prefix + "_" + "".join(random.choices(alphabet, k=n_characters))
+    return prefix + "_" + "".join(random.choices(_ID_ALPHABET, k=n_characters))
+
+
+# Random per process, so that ids of different workers don't collide
+_PROCESS_ID_TAG = "".join(random.choices(_ID_ALPHABET, k=8))
+_id_counter = itertools.count()
+
+
+def monotonic_id(prefix: str) -> str:
+    """e.g. event_BJhGUIsw000000000002a, same length as `random_id` but much cheaper"""
+    return f"{prefix}_{_PROCESS_ID_TAG}{next(_id_counter):013x}"
+
+
+_AUDIO_APPEND_PREFIX = '{"type":"input_audio_buffer.append"'
+_AUDIO_FIELD = '"audio":"'
+_SEQ_FIELD = ',"seq":'
+
+
+def parse_audio_append(message_raw: str) -> tuple[str, int | None] | None:
+    """Fast path for `input_audio_buffer.append`, the bulk of the client traffic.
+
+    Returns the base64 audio payload and its sequence number without building the
+    event, or None if the message is not an audio append in the compact layout the
+    frontend sends, with `seq` (if any) right after `audio`. In that case it has to
+    be validated with the full `ClientEvent` union.
+    """
+    if not message_raw.startswith(_AUDIO_APPEND_PREFIX):
+        return None
+    start = message_raw.find(_AUDIO_FIELD, len(_AUDIO_APPEND_PREFIX))
+    if start < 0:
+        return None
+    start += len(_AUDIO_FIELD)
+    end = message_raw.find('"', start)
+    if end < 0:
+        return None
+    audio = message_raw[start:end]
+    if "\\" in audio:
+        # escaped characters are not valid base64, let the full parser report it
+        return None
+    seq = None
+    if message_raw.startswith(_SEQ_FIELD, end + 1):
+        digits_start = end + 1 + len(_SEQ_FIELD)
+        digits_end = digits_start
+        while digits_end < len(message_raw) and message_raw[digits_end].isdigit():
+            digits_end += 1
+        if digits_end == digits_start:
+            return None
+        seq = int(message_raw[digits_start:digits_end])
+    elif '"seq"' in message_raw:
+        # a sequence number elsewhere than right after the audio, don't lose it
+        return None
+    return audio, seq
 
 
 class BaseEvent(BaseModel, Generic[T]):
     type: T = None  # type: ignore - will be set by validator below
-    event_id: str = Field(default_factory=lambda: random_id("event"))
+    event_id: str = Field(default_factory=lambda: monotonic_id("event"))
 
     @model_validator(mode="after")
     def set_type_from_generic(self) -> "BaseEvent":
@@ -82,10 +135,28 @@ class SessionUpdated(BaseEvent[Literal["session.updated"]]):
 
 class InputAudioBufferAppend(BaseEvent[Literal["input_audio_buffer.append"]]):
     audio: str  # Base64-encoded Opus data
+    # Client-side sequence number of the Ogg page, used to replay audio on resume
+    seq: int | None = None
+
+
+class InputAudioBufferAck(BaseEvent[Literal["input_audio_buffer.ack"]]):
+    """All audio up to `seq` was received, the client can forget it."""
+    seq: int
+
+
+class SessionResumable(BaseEvent[Literal["session.resumable"]]):
+    """Sent on connect. Reconnect with `?session_token=` to resume the session,
+    replaying the audio after `last_audio_seq`."""
+    session_token: str
+    resumed: bool
+    last_audio_seq: int
 
 class InputUserChatQuery(BaseEvent[Literal['input_chat.query']]):
     query: str
 
+class InputUserChatCancel(BaseEvent[Literal["input_chat.cancel"]]):
+    """Stop generating the answer to the last chat query."""
+
 class ResponseTextDone(BaseEvent[Literal["response.text.done"]]):
     delta: str
 
@@ -189,6 +260,8 @@ class UnmuteInterruptedByVAD(BaseEvent[Literal["unmute.interrupted_by_vad"]]):
 ServerEvent = Union[
     Error,
     SessionUpdated,
+    SessionResumable,
+    InputAudioBufferAck,
     ResponseTextDelta,
     ResponseTextDone,
     ResponseAudioDelta,
@@ -210,6 +283,7 @@ ClientEvent = Union[
     InputAudioBufferFinalize,
     InputAudioBufferAppend,
     InputUserChatQuery,
+    InputUserChatCancel,
     ResponseTextDone,
     # Used internally for recording, we're not expecting the user to send this
     UnmuteInputAudioBufferAppendAnonymized,
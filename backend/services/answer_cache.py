@@ -0,0 +1,91 @@
+import time
+import threading
+from dataclasses import dataclass
+import numpy as np
+
+
+@dataclass
+class CachedAnswer:
+    query_vector: np.ndarray
+    answer: str
+    created_at: float
+
+
+class AnswerCache:
+    """Process-wide cache of chat answers for repeated questions.
+
+    An answer is reused when it was generated from the same set of source chunks,
+    after the same conversation (`history`, a digest of the earlier turns, empty
+    for a first question) and for a query whose normalized embedding is at least
+    `threshold` similar. Entries expire after `ttl` seconds, and the whole cache
+    is dropped when the meeting memory changes chunks (its `version` changes).
+    """
+
+    def __init__(self, threshold: float = 0.95, ttl: float = 600.0, max_entries: int = 512):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: dict[tuple[frozenset[str], str], list[CachedAnswer]] = {}
+        self.size = 0
+        self.version: int | None = None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _check_version_locked(self, version: int):
+        if version != self.version:
+            self.entries.clear()
+            self.size = 0
+            self.version = version
+
+    def lookup(
+        self, query_vector: np.ndarray, source_ids: frozenset[str], version: int, history: str = ""
+    ) -> str | None:
+        """Return a cached answer for this query, sources and conversation, if any."""
+        now = time.monotonic()
+        with self._lock:
+            self._check_version_locked(version)
+            candidates = self.entries.get((source_ids, history), [])
+            best, best_similarity = None, self.threshold
+            for entry in candidates:
+                if now - entry.created_at > self.ttl:
+                    continue
+                similarity = float(entry.query_vector @ query_vector)
+                if similarity >= best_similarity:
+                    best, best_similarity = entry, similarity
+            if best is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return best.answer
+
+    def store(
+        self, query_vector: np.ndarray, source_ids: frozenset[str], answer: str, version: int, history: str = ""
+    ):
+        now = time.monotonic()
+        with self._lock:
+            self._check_version_locked(version)
+            if self.size >= self.max_entries:
+                self._evict_locked(now)
+            entry = CachedAnswer(query_vector=query_vector, answer=answer, created_at=now)
+            self.entries.setdefault((source_ids, history), []).append(entry)
+            self.size += 1
+
+    def _evict_locked(self, now: float):
+        """Drop expired entries, or the oldest half if nothing has expired."""
+        cutoff = now - self.ttl
+        if not any(e.created_at < cutoff for entries in self.entries.values() for e in entries):
+            ages = sorted(e.created_at for entries in self.entries.values() for e in entries)
+            cutoff = ages[len(ages) // 2]
+        for key in list(self.entries):
+            kept = [e for e in self.entries[key] if e.created_at >= cutoff]
+            if kept:
+                self.entries[key] = kept
+            else:
+                del self.entries[key]
+        self.size = sum(len(entries) for entries in self.entries.values())
+
+    def invalidate(self):
+        with self._lock:
+            self.entries.clear()
+            self.size = 0
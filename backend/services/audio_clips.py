@@ -0,0 +1,145 @@
+"""Time ranges of stored meeting recordings, read through a memory map.
+
+A clip is a view of the samples of the wav file mapped in memory: only the
+pages of the requested range are read from disk, and nothing is copied before
+the bytes are handed to the response.
+"""
+
+import os
+import re
+import struct
+from typing import Iterator
+
+import numpy as np
+
+# Bytes of a wav clip written to the response at once
+STREAM_BLOCK = 1 << 16
+# Seconds of audio encoded at once by the Opus writer
+OPUS_BLOCK_SECONDS = 1.0
+# Samples per frame of the Opus writer, it holds back an incomplete last frame
+OPUS_FRAME_SAMPLES = 960
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class ClipError(Exception):
+    """The recording or the requested range is invalid."""
+
+
+class WavLayout:
+    """Format and position of the samples of a PCM wav file."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            riff = f.read(12)
+            if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+                raise ClipError(f"Not a wav file: {path}")
+            fmt = None
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    raise ClipError(f"No data chunk in {path}")
+                chunk_id, size = struct.unpack("<4sI", header)
+                if chunk_id == b"fmt ":
+                    fmt = f.read(size)
+                elif chunk_id == b"data":
+                    self.data_offset = f.tell()
+                    # the size in the header is wrong when the writer was interrupted
+                    self.data_size = min(size, os.fstat(f.fileno()).st_size - self.data_offset)
+                    break
+                else:
+                    f.seek(size, 1)
+                if size % 2:
+                    f.seek(1, 1)  # chunks are word aligned
+        if fmt is None:
+            raise ClipError(f"No format chunk in {path}")
+        audio_format, self.channels, self.sample_rate, _, _, bits = struct.unpack("<HHIIHH", fmt[:16])
+        if audio_format != 1 or bits != 16:
+            raise ClipError(f"Only 16-bit PCM wav is supported: {path}")
+        self.n_frames = self.data_size // (2 * self.channels)
+
+    @property
+    def duration(self) -> float:
+        return self.n_frames / self.sample_rate
+
+
+class AudioClip:
+    """Samples of a recording between `start` and `end` seconds, memory-mapped."""
+
+    def __init__(self, path: str, start: float = 0.0, end: float | None = None):
+        layout = WavLayout(path)
+        end = layout.duration if end is None else min(end, layout.duration)
+        if start < 0 or start >= end:
+            raise ClipError(f"Invalid range {start}-{end}s of a {layout.duration:.2f}s recording")
+        self.sample_rate = layout.sample_rate
+        self.channels = layout.channels
+        samples = np.memmap(
+            path, dtype="<i2", mode="r", offset=layout.data_offset, shape=(layout.n_frames, layout.channels)
+        )
+        # a view, the pages are read when the response is sent
+        self.samples = samples[int(start * self.sample_rate):int(end * self.sample_rate)]
+
+    @property
+    def wav_header(self) -> bytes:
+        data_size = self.samples.nbytes
+        block_align = 2 * self.channels
+        return b"".join([
+            struct.pack("<4sI4s", b"RIFF", 36 + data_size, b"WAVE"),
+            struct.pack(
+                "<4sIHHIIHH", b"fmt ", 16, 1, self.channels, self.sample_rate,
+                self.sample_rate * block_align, block_align, 16,
+            ),
+            struct.pack("<4sI", b"data", data_size),
+        ])
+
+    @property
+    def wav_size(self) -> int:
+        return 44 + self.samples.nbytes
+
+    def iter_wav(self, first: int = 0, last: int | None = None) -> Iterator[bytes]:
+        """Bytes `first` to `last` (inclusive) of the clip as a wav file."""
+        last = self.wav_size - 1 if last is None else last
+        header = self.wav_header
+        if first < len(header):
+            yield header[first:last + 1]
+        data = memoryview(self.samples.reshape(-1).view(np.uint8))
+        position = max(first - len(header), 0)
+        stop = last + 1 - len(header)
+        while position < stop:
+            block = data[position:min(position + STREAM_BLOCK, stop)]
+            yield block.tobytes()
+            position += len(block)
+
+    def iter_opus(self) -> Iterator[bytes]:
+        """The clip as an Ogg/Opus stream, encoded block by block."""
+        import sphn
+
+        writer = sphn.OpusStreamWriter(self.sample_rate)
+        block = int(OPUS_BLOCK_SECONDS * self.sample_rate) // OPUS_FRAME_SAMPLES * OPUS_FRAME_SAMPLES
+        for i in range(0, len(self.samples), block):
+            pcm = self.samples[i:i + block].mean(axis=1, dtype=np.float32) / 32768
+            if len(pcm) % OPUS_FRAME_SAMPLES:
+                # the tail of the clip, padded with silence to a full frame
+                pcm = np.pad(pcm, (0, -len(pcm) % OPUS_FRAME_SAMPLES))
+            data = writer.append_pcm(pcm)
+            if data:
+                yield data
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """First and last byte of a single `Range: bytes=...` header, for a body of `size` bytes.
+
+    None for headers to ignore (multiple ranges, other units), as HTTP allows.
+    """
+    match = _RANGE_RE.match(header.strip())
+    if match is None or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first == "":
+        # suffix range, the last bytes
+        first, last = max(size - int(last), 0), size - 1
+    else:
+        first, last = int(first), min(int(last), size - 1) if last else size - 1
+    if first > last or first >= size:
+        raise ClipError(f"Range not satisfiable: {header}")
+    return first, last
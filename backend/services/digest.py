@@ -0,0 +1,87 @@
+import asyncio
+import json
+import logging
+import re
+from backend.models.meeting import Meeting, MeetingDigest
+from backend.services.llm_service import LLMService
+from backend.utils import cpu_pool
+
+logger = logging.getLogger(__name__)
+
+MAP_CHUNK_SIZE = 4000
+MAP_CHUNK_OVERLAP = 200
+MAX_CONCURRENT_MAPS = 4
+# bounds on the digest, so the chat context stays small for any meeting length
+MAX_SUMMARY_CHARS = 1500
+MAX_ITEMS = 10
+
+_MAP_PROMPT = """
+The source is one part of a meeting transcript, generated by a speech-to-text model.
+Write notes for this part only. Answer with a JSON object and nothing else:
+{"summary": "<a few sentences>", "action_items": ["<who does what>", ...], "decisions": ["<decision>", ...]}
+"""
+
+_REDUCE_PROMPT = """
+The sources are notes taken on consecutive parts of the same meeting.
+Merge them into notes for the whole meeting, removing duplicates.
+Answer with a JSON object and nothing else:
+{"summary": "<at most one paragraph>", "action_items": ["<who does what>", ...], "decisions": ["<decision>", ...]}
+"""
+
+
+def parse_digest(text: str) -> MeetingDigest:
+    """Parse the JSON answer of the LLM, falling back to plain text as summary."""
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    data = None
+    if match is not None:
+        try:
+            data = json.loads(match.group(0))
+        except json.JSONDecodeError:
+            pass
+    if not isinstance(data, dict):
+        return MeetingDigest(summary=text.strip()[:MAX_SUMMARY_CHARS])
+
+    def _items(key):
+        items = data.get(key) or []
+        if not isinstance(items, list):
+            items = [items]
+        return [str(item).strip() for item in items if str(item).strip()][:MAX_ITEMS]
+
+    return MeetingDigest(
+        summary=str(data.get("summary", "")).strip()[:MAX_SUMMARY_CHARS],
+        action_items=_items("action_items"),
+        decisions=_items("decisions"),
+    )
+
+
+class MeetingDigester:
+    """Map-reduce digest of a meeting transcript: summary, action items, decisions."""
+
+    def __init__(self, llm: LLMService):
+        self.llm = llm
+        self._semaphore = asyncio.Semaphore(MAX_CONCURRENT_MAPS)
+
+    async def _ask(self, prompt: str, texts: list[str]) -> MeetingDigest:
+        sources = [{"text": text, "metadata": {"part": i}} for i, text in enumerate(texts)]
+        async with self._semaphore:
+            answer = await self.llm.complete([{"role": "user", "content": prompt}], sources)
+        return parse_digest(answer)
+
+    async def digest(self, meeting: Meeting) -> MeetingDigest | None:
+        """Generate the digest of a finished meeting, None if there is nothing to digest."""
+        if not meeting.transcript or not meeting.transcript.strip():
+            return None
+
+        chunks = await cpu_pool.run(cpu_pool.split_text, meeting.transcript, MAP_CHUNK_SIZE, MAP_CHUNK_OVERLAP)
+        # map: notes for every part of the transcript
+        notes = await asyncio.gather(*(self._ask(_MAP_PROMPT, [chunk]) for chunk in chunks))
+        # reduce: merge notes until a single digest is left
+        while len(notes) > 1:
+            groups = [notes[i:i + MAX_CONCURRENT_MAPS] for i in range(0, len(notes), MAX_CONCURRENT_MAPS)]
+            notes = await asyncio.gather(*(self._reduce(group) for group in groups))
+        return notes[0]
+
+    async def _reduce(self, group: list[MeetingDigest]) -> MeetingDigest:
+        if len(group) == 1:
+            return group[0]
+        return await self._ask(_REDUCE_PROMPT, [note.model_dump_json() for note in group])
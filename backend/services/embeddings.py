@@ -0,0 +1,19 @@
+from langchain_core.embeddings import Embeddings
+from backend.utils.cpu_pool import PoolEncoder
+
+
+class PooledEmbeddings(Embeddings):
+    """Sentence-transformers embeddings computed in the CPU pool.
+
+    Produces the same vectors as `HuggingFaceEmbeddings` for the same model.
+    """
+
+    def __init__(self, model_name: str):
+        self.encoder = PoolEncoder(model_name)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        texts = [text.replace("\n", " ") for text in texts]
+        return self.encoder.encode(texts).tolist()
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
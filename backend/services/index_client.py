@@ -0,0 +1,137 @@
+import asyncio
+import logging
+
+import httpx
+import numpy as np
+
+from backend.models.meeting import Meeting
+from backend.services.meeting_memory import CHUNK_OVERLAP, CHUNK_SIZE, WARM_UP_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+
+class IndexClient:
+    """Async client of the index service, a drop-in for `MeetingMemory`.
+
+    It covers the async interface of `MeetingMemory` (the `a`-prefixed methods,
+    `version`, `is_ready` and `warm_up_error`), which is all the handlers and
+    `bulk_import` use; the blocking methods are not available remotely. The last
+    meeting comes from the `MeetingCatalog`, not from the index.
+
+    `url` is either `unix:/path/to.sock` for a service on the same host or an
+    `http://` base URL. `version` mirrors the store version returned by every call,
+    for the answer caches. Transcripts are still split locally.
+    """
+
+    def __init__(self, url: str, timeout: float = 30.0):
+        if url.startswith("unix:"):
+            transport = httpx.AsyncHTTPTransport(uds=url[len("unix:"):])
+            base_url = "http://index"
+        else:
+            transport = None
+            base_url = url.rstrip("/")
+        self.client = httpx.AsyncClient(base_url=base_url, transport=transport, timeout=timeout)
+        self.splitter = None
+        self.version = 0
+        self.is_ready = False
+        self.warm_up_error: BaseException | None = None
+
+    async def awarm_up(self, timeout: float = WARM_UP_TIMEOUT):
+        """Wait for the service to be ready."""
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+        # same splitter as the service, so that chunk numbering is the same
+        self.splitter = RecursiveCharacterTextSplitter(
+            chunk_size=CHUNK_SIZE,
+            chunk_overlap=CHUNK_OVERLAP,
+            separators=["\n\n", ".", "?", "!", " ", ""],
+        )
+        deadline = asyncio.get_running_loop().time() + timeout
+        while True:
+            try:
+                response = await self.client.get("/ready")
+                if response.status_code == 200:
+                    self._update_version(response.json())
+                    self.is_ready = True
+                    return
+                if response.json().get("status") == "failed":
+                    raise RuntimeError(f"Index service failed to warm up: {response.json().get('error')}")
+            except httpx.TransportError as e:
+                logger.info(f"Index service not reachable yet: {e}")
+            except RuntimeError as e:
+                self.warm_up_error = e
+                raise
+            if asyncio.get_running_loop().time() > deadline:
+                self.warm_up_error = TimeoutError("Index service not ready")
+                raise self.warm_up_error
+            await asyncio.sleep(0.5)
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    def _update_version(self, body: dict):
+        self.version = max(self.version, body.get("version", 0))
+
+    async def _post(self, path: str, payload: dict) -> dict:
+        response = await self.client.post(path, json=payload)
+        response.raise_for_status()
+        body = response.json()
+        self._update_version(body)
+        return body
+
+    async def aembed_query(self, query_text: str) -> np.ndarray:
+        body = await self._post("/embed_query", {"text": query_text})
+        return np.asarray(body["vector"], dtype=np.float32)
+
+    async def aquery(self, query_text: str, k: int = 3, query_vector: np.ndarray | None = None) -> list[dict]:
+        body = await self._post("/query", {
+            "text": query_text,
+            "k": k,
+            "vector": query_vector.tolist() if query_vector is not None else None,
+        })
+        return body["results"]
+
+    async def aadd_chunks(
+        self,
+        meeting: Meeting,
+        chunks: list[str],
+        start_index: int = 0,
+        provisional: bool = False,
+        times: list[tuple[float, float] | None] | None = None,
+    ):
+        if not chunks:
+            return
+        await self._post("/add_chunks", {
+            # the transcript and digest are not stored with the chunks
+            "meeting": {**meeting._to_dict(), "transcript": "", "digest": None},
+            "chunks": chunks,
+            "start_index": start_index,
+            "provisional": provisional,
+            "times": times,
+        })
+
+    async def acommit_meeting(self, meeting_id: str):
+        await self._post("/commit_meeting", {"meeting_id": meeting_id})
+
+    # Bulk import and re-indexing, see `backend.tools.bulk_import`
+
+    async def aembed_documents(self, texts: list[str]) -> np.ndarray:
+        body = await self._post("/embed_documents", {"texts": texts})
+        return np.asarray(body["vectors"], dtype=np.float32).reshape(len(texts), -1)
+
+    async def abulk_upsert(self, ids: list[str], texts: list[str], embeddings: np.ndarray, metadatas: list[dict]):
+        await self._post("/bulk_upsert", {
+            "ids": ids,
+            "texts": texts,
+            "embeddings": np.asarray(embeddings).tolist(),
+            "metadatas": metadatas,
+        })
+
+    async def adelete_chunks_from(self, meeting_id: str, n_chunks: int):
+        await self._post("/delete_chunks_from", {"meeting_id": meeting_id, "n_chunks": n_chunks})
+
+    async def aflush(self):
+        await self._post("/flush", {})
+
+    async def areset_collection(self):
+        await self._post("/reset_collection", {})
@@ -0,0 +1,172 @@
+"""Standalone index service, sharing one `MeetingMemory` between backend workers.
+
+The vector store lives on a local directory and can only be opened by one
+process. Running it here lets several uvicorn workers (or hosts, over HTTP)
+share it through `IndexClient`:
+
+    python -m backend.services.index_service --uds /run/meeting_index.sock
+    MEETING_INDEX_URL=unix:/run/meeting_index.sock WEB_CONCURRENCY=4 uvicorn backend.app:app
+
+Only the index is shared, see "Running several workers" in the README for the
+state that stays per worker.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+from typing import Any
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from backend.models.meeting import Meeting
+from backend.services.meeting_memory import MeetingMemory
+
+logger = logging.getLogger(__name__)
+
+app = FastAPI()
+
+
+class EmbedQueryRequest(BaseModel):
+    text: str
+
+
+class QueryRequest(BaseModel):
+    text: str
+    k: int = 3
+    vector: list[float] | None = None
+
+
+class AddChunksRequest(BaseModel):
+    meeting: Meeting
+    chunks: list[str]
+    start_index: int = 0
+    provisional: bool = False
+    times: list[tuple[float, float] | None] | None = None
+
+
+class CommitMeetingRequest(BaseModel):
+    meeting_id: str
+
+
+class EmbedDocumentsRequest(BaseModel):
+    texts: list[str]
+
+
+class BulkUpsertRequest(BaseModel):
+    ids: list[str]
+    texts: list[str]
+    embeddings: list[list[float]]
+    metadatas: list[dict[str, Any]]
+
+
+class DeleteChunksRequest(BaseModel):
+    meeting_id: str
+    n_chunks: int
+
+
+@app.on_event("startup")
+async def startup_event():
+    app.state.meeting_memory = MeetingMemory()
+    app.state.warm_up = asyncio.create_task(app.state.meeting_memory.awarm_up())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await app.state.meeting_memory.aclose()
+
+
+def _version() -> dict[str, Any]:
+    return {"version": app.state.meeting_memory.version}
+
+
+@app.get("/ready")
+async def ready():
+    memory = app.state.meeting_memory
+    if memory.warm_up_error is not None:
+        return JSONResponse({"status": "failed", "error": repr(memory.warm_up_error)}, status_code=503)
+    if not memory.is_ready:
+        return JSONResponse({"status": "warming_up"}, status_code=503)
+    return {"status": "ready", **_version()}
+
+
+@app.post("/embed_query")
+async def embed_query(request: EmbedQueryRequest):
+    vector = await app.state.meeting_memory.aembed_query(request.text)
+    return {"vector": vector.tolist(), **_version()}
+
+
+@app.post("/query")
+async def query(request: QueryRequest):
+    vector = np.asarray(request.vector, dtype=np.float32) if request.vector is not None else None
+    # read before searching, a write landing meanwhile must invalidate cached answers
+    version = _version()
+    results = await app.state.meeting_memory.aquery(request.text, request.k, vector)
+    return {"results": results, **version}
+
+
+@app.post("/add_chunks")
+async def add_chunks(request: AddChunksRequest):
+    await app.state.meeting_memory.aadd_chunks(
+        request.meeting, request.chunks, request.start_index, request.provisional, request.times
+    )
+    return _version()
+
+
+@app.post("/commit_meeting")
+async def commit_meeting(request: CommitMeetingRequest):
+    await app.state.meeting_memory.acommit_meeting(request.meeting_id)
+    return _version()
+
+
+@app.post("/embed_documents")
+async def embed_documents(request: EmbedDocumentsRequest):
+    vectors = await app.state.meeting_memory.aembed_documents(request.texts)
+    return {"vectors": vectors.tolist(), **_version()}
+
+
+@app.post("/bulk_upsert")
+async def bulk_upsert(request: BulkUpsertRequest):
+    embeddings = np.asarray(request.embeddings, dtype=np.float32)
+    await app.state.meeting_memory.abulk_upsert(request.ids, request.texts, embeddings, request.metadatas)
+    return _version()
+
+
+@app.post("/delete_chunks_from")
+async def delete_chunks_from(request: DeleteChunksRequest):
+    await app.state.meeting_memory.adelete_chunks_from(request.meeting_id, request.n_chunks)
+    return _version()
+
+
+@app.post("/flush")
+async def flush():
+    await app.state.meeting_memory.aflush()
+    return _version()
+
+
+@app.post("/reset_collection")
+async def reset_collection():
+    await app.state.meeting_memory.areset_collection()
+    return _version()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uds", help="Unix socket to listen on.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    args = parser.parse_args()
+    if args.uds:
+        if os.path.exists(args.uds):
+            os.unlink(args.uds)  # left over by a previous run
+        uvicorn.run(app, uds=args.uds)
+    else:
+        uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
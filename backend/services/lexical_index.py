@@ -0,0 +1,99 @@
+import heapq
+import math
+import re
+import threading
+from collections import defaultdict
+
+_TOKEN_RE = re.compile(r"\b\w+\b")
+
+# Function words carry no lexical signal and would make every chunk a candidate.
+STOPWORDS = frozenset(
+    "a an and are as at be but by did do does for from had has have he her his how i if in "
+    "is it its me my no not of on or our she so that the their them they this to was we "
+    "were what when where which who why will with you your".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Simple tokenizer, keeps names, project codes and numbers as single terms."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """In-memory BM25 inverted index over meeting chunks.
+
+    Posting lists map a term to `{doc_id: term_frequency}`, so a query only touches
+    the documents that share at least one term with it.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: dict[str, dict[str, int]] = defaultdict(dict)
+        self.doc_lengths: dict[str, int] = {}
+        self.total_length = 0
+        # chunks are added from worker threads while queries run on the event loop
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.doc_lengths
+
+    def add(self, doc_id: str, text: str):
+        """Index a document, replacing any previous version with the same id."""
+        tokens = tokenize(text)
+        counts: dict[str, int] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+
+        with self._lock:
+            if doc_id in self.doc_lengths:
+                self._remove_locked(doc_id)
+            for term, tf in counts.items():
+                self.postings[term][doc_id] = tf
+            self.doc_lengths[doc_id] = len(tokens)
+            self.total_length += len(tokens)
+
+    def remove(self, doc_id: str):
+        with self._lock:
+            if doc_id in self.doc_lengths:
+                self._remove_locked(doc_id)
+
+    def _remove_locked(self, doc_id: str):
+        # Terms of the old version are not stored, so scan the postings. Removal
+        # only happens on re-indexing, never on the query path.
+        for term in list(self.postings):
+            docs = self.postings[term]
+            if docs.pop(doc_id, None) is not None and not docs:
+                del self.postings[term]
+        self.total_length -= self.doc_lengths.pop(doc_id)
+
+    def search(self, query: str, k: int = 10) -> list[tuple[str, float]]:
+        """Return the `k` best `(doc_id, score)` pairs for the query."""
+        terms = set(tokenize(query))
+        with self._lock:
+            n_docs = len(self.doc_lengths)
+            if n_docs == 0 or not terms:
+                return []
+            avg_length = self.total_length / n_docs
+            scores: dict[str, float] = {}
+            for term in terms:
+                docs = self.postings.get(term)
+                if not docs:
+                    continue
+                idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+                for doc_id, tf in docs.items():
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+
+def reciprocal_rank_fusion(*rankings: list[str], k: int = 60) -> list[tuple[str, float]]:
+    """Fuse several ranked id lists into one, best first."""
+    fused: dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,127 @@
+import asyncio
+import logging
+from backend.models.meeting import Meeting
+from backend.services.meeting_memory import MeetingMemory, CHUNK_SIZE, CHUNK_OVERLAP
+from backend.utils import cpu_pool
+from backend.services.index_client import IndexClient
+
+logger = logging.getLogger(__name__)
+
+# Split once the pending text is this long, the last split chunk stays pending
+# because more text may still be appended to it.
+FLUSH_THRESHOLD = CHUNK_SIZE * 3 // 2
+
+ChunkTimes = list[tuple[float, float] | None]
+
+
+class LiveMeetingIndexer:
+    """Index a meeting transcript incrementally while it is being recorded.
+
+    Transcript segments are fed as the STT produces them. Every finished chunk is
+    embedded in the background and stored as provisional, so that the meeting is
+    searchable during the recording. `commit` only has to store the tail.
+
+    Chunks are stored with the start and end seconds of the segments they were
+    split from, to fetch the audio behind a retrieved chunk.
+    """
+
+    def __init__(self, meeting_memory: MeetingMemory | IndexClient):
+        self.meeting_memory = meeting_memory
+        self.splitter = meeting_memory.splitter
+        self.meeting: Meeting | None = None
+        self.pending = ""
+        # (offset in `pending`, start, end seconds) of the segments it is made of
+        self.segments: list[tuple[int, float, float]] = []
+        self.n_chunks = 0
+        self.tasks: set[asyncio.Task] = set()
+        self.failed: list[tuple[list[str], int, ChunkTimes]] = []
+
+    def start(self, meeting: Meeting):
+        self.meeting = meeting
+        self._maybe_flush()
+
+    def add_segment(self, text: str, start: float | None = None, end: float | None = None):
+        """Append a transcript segment spoken between `start` and `end` seconds."""
+        if start is not None and end is not None:
+            self.segments.append((len(self.pending) + 1, start, end))
+        self.pending += " " + text
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if self.meeting is None or len(self.pending) < FLUSH_THRESHOLD:
+            return
+        chunks = self.splitter.split_text(self.pending)
+        if len(chunks) < 2:
+            return
+        offsets = self._locate(chunks)
+        times = [self._span(offset, len(chunk)) for offset, chunk in zip(offsets[:-1], chunks)]
+        finished, self.pending = chunks[:-1], chunks[-1]
+        self._rebase_segments(offsets[-1])
+        start_index = self.n_chunks
+        self.n_chunks += len(finished)
+
+        task = asyncio.create_task(self._store(finished, start_index, times))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    def _locate(self, chunks: list[str]) -> list[int | None]:
+        """Offsets of split chunks in `pending`, None for a chunk the splitter altered."""
+        offsets, position = [], 0
+        for chunk in chunks:
+            offset = self.pending.find(chunk, position)
+            if offset < 0:
+                offsets.append(None)
+                continue
+            offsets.append(offset)
+            position = offset + 1
+        return offsets
+
+    def _overlapping(self, offset: int, length: int) -> list[int]:
+        """Indices of the segments overlapping `pending[offset:offset + length]`."""
+        return [
+            i for i, (segment_offset, _, _) in enumerate(self.segments)
+            if segment_offset < offset + length
+            and (i + 1 == len(self.segments) or self.segments[i + 1][0] > offset)
+        ]
+
+    def _span(self, offset: int | None, length: int) -> tuple[float, float] | None:
+        if offset is None:
+            return None
+        overlapping = self._overlapping(offset, length)
+        if not overlapping:
+            return None
+        return self.segments[overlapping[0]][1], self.segments[overlapping[-1]][2]
+
+    def _rebase_segments(self, offset: int | None):
+        """Keep the segments of the new `pending`, found at `offset` of the old one."""
+        overlapping = self._overlapping(offset, len(self.pending)) if offset is not None else []
+        self.segments = [
+            (max(self.segments[i][0] - offset, 0), *self.segments[i][1:]) for i in overlapping
+        ]
+
+    async def _store(self, chunks: list[str], start_index: int, times: ChunkTimes):
+        try:
+            await self.meeting_memory.aadd_chunks(self.meeting, chunks, start_index, True, times)
+        except Exception as e:
+            logger.warning(f"Live indexing failed, retrying at commit: {e}")
+            self.failed.append((chunks, start_index, times))
+
+    async def commit(self):
+        """Store the remaining tail and confirm the provisional chunks."""
+        if self.meeting is None:
+            return
+        if self.tasks:
+            await asyncio.gather(*self.tasks)
+        for chunks, start_index, times in self.failed:
+            await self.meeting_memory.aadd_chunks(self.meeting, chunks, start_index, True, times)
+        self.failed = []
+
+        tail = []
+        if self.pending.strip():
+            tail = await cpu_pool.run(cpu_pool.split_text, self.pending, CHUNK_SIZE, CHUNK_OVERLAP)
+        times = [self._span(offset, len(chunk)) for offset, chunk in zip(self._locate(tail), tail)]
+        self.pending = ""
+        self.segments = []
+        await self.meeting_memory.aadd_chunks(self.meeting, tail, self.n_chunks, False, times)
+        self.n_chunks += len(tail)
+        await self.meeting_memory.acommit_meeting(self.meeting.meeting_id)
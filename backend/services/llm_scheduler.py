@@ -0,0 +1,111 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from enum import IntEnum
+
+import numpy as np
+
+
+class Priority(IntEnum):
+    """Lower values are served first."""
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class LLMBusyError(Exception):
+    """The LLM server is saturated and the request waited too long for a slot."""
+
+
+class LLMScheduler:
+    """Admission control in front of the LLM server.
+
+    At most `max_concurrency` requests run upstream. The others wait in one queue
+    per priority, and inside a priority sessions are served round-robin so that a
+    single session can't hold all the slots. An interactive request that can't
+    start within `max_wait` seconds fails fast with `LLMBusyError`. Background
+    requests (digests, history summaries) have nobody waiting on them, they wait
+    `background_max_wait`, by default as long as it takes.
+    """
+
+    def __init__(self, max_concurrency: int = 4, max_wait: float = 10.0, background_max_wait: float | None = None):
+        self.max_concurrency = max_concurrency
+        self.max_wait = max_wait
+        self.background_max_wait = background_max_wait
+        self.active = 0
+        self.queues: dict[Priority, OrderedDict[str, deque[asyncio.Future]]] = {
+            priority: OrderedDict() for priority in Priority
+        }
+        self.n_admitted = 0
+        self.n_rejected = 0
+        self.queue_times: deque[float] = deque(maxlen=1024)
+
+    def n_queued(self) -> int:
+        return sum(
+            1 for queue in self.queues.values() for waiters in queue.values()
+            for fut in waiters if not fut.done()
+        )
+
+    @asynccontextmanager
+    async def slot(self, session_id: str, priority: Priority = Priority.INTERACTIVE, max_wait: float | None = None):
+        """Hold one of the upstream slots for the duration of the block."""
+        if max_wait is None:
+            max_wait = self.max_wait if priority == Priority.INTERACTIVE else self.background_max_wait
+        await self._acquire(session_id, priority, max_wait)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, session_id: str, priority: Priority, max_wait: float | None):
+        start = time.monotonic()
+        if self.active < self.max_concurrency and self.n_queued() == 0:
+            self.active += 1
+            self._admitted(0.0)
+            return
+
+        fut = asyncio.get_running_loop().create_future()
+        self.queues[priority].setdefault(session_id, deque()).append(fut)
+        try:
+            await asyncio.wait_for(fut, timeout=max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if fut.done() and not fut.cancelled():
+                # The slot was handed over just as we gave up on it
+                self._release()
+            if isinstance(e, asyncio.TimeoutError):
+                self.n_rejected += 1
+                raise LLMBusyError(f"No LLM slot available after {max_wait:.1f}s") from e
+            raise
+        self._admitted(time.monotonic() - start)
+
+    def _admitted(self, queue_time: float):
+        self.n_admitted += 1
+        self.queue_times.append(queue_time)
+
+    def _release(self):
+        """Hand the slot over to the next waiter, or free it."""
+        for priority in Priority:
+            queue = self.queues[priority]
+            while queue:
+                session_id, waiters = next(iter(queue.items()))
+                fut = waiters.popleft()
+                if waiters:
+                    queue.move_to_end(session_id)
+                else:
+                    del queue[session_id]
+                if not fut.done():
+                    fut.set_result(None)
+                    return
+        self.active -= 1
+
+    def stats(self) -> dict[str, float]:
+        queue_times = np.asarray(self.queue_times) if self.queue_times else np.zeros(1)
+        return {
+            "active": self.active,
+            "queued": self.n_queued(),
+            "admitted": self.n_admitted,
+            "rejected": self.n_rejected,
+            "queue_time_p50": float(np.percentile(queue_times, 50)),
+            "queue_time_p95": float(np.percentile(queue_times, 95)),
+            "queue_time_max": float(queue_times.max()),
+        }
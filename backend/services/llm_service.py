@@ -1,26 +1,99 @@
-import asyncio
-from openai import AsyncOpenAI, OpenAI
+import time
+import uuid
 from typing import Any, cast
 from backend.utils.utils import get_openai_client
-from backend.constants import LLM_SERVER
+from backend.constants import LLM_SERVER, LLM_MAX_CONCURRENCY_PER_WORKER, LLM_MAX_QUEUE_WAIT
+from backend.services.single_flight import StreamCoalescer, request_key
+from backend.services.llm_scheduler import LLMScheduler, Priority
+from backend.utils.metrics import REGISTRY
 
-class LLMService:
-    def __init__(self):
-        client_sync = OpenAI(api_key="EMPTY", base_url=LLM_SERVER + "v1")
+# Shared by all sessions of the process, not across workers
+STREAM_COALESCER = StreamCoalescer()
+LLM_SCHEDULER = LLMScheduler(max_concurrency=LLM_MAX_CONCURRENCY_PER_WORKER, max_wait=LLM_MAX_QUEUE_WAIT)
+
+LLM_TTFT = REGISTRY.histogram(
+    "llm_time_to_first_token_seconds", "Time from the request, including the wait for a slot, to the first delta."
+)
+LLM_TOKENS_PER_SECOND = REGISTRY.histogram(
+    "llm_tokens_per_second",
+    "Decoding speed of an upstream stream, in streamed deltas per second after the first one.",
+    buckets=(1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 200, 500),
+)
+LLM_TOKENS = REGISTRY.counter("llm_completion_tokens_total", "Deltas streamed from the LLM server.")
+for _name, _help in [
+    ("active", "LLM requests running upstream."),
+    ("queued", "LLM requests waiting for a slot."),
+    ("admitted", "LLM requests admitted since startup."),
+    ("rejected", "LLM requests rejected as busy since startup."),
+    ("queue_time_p95", "95th percentile of the recent waits for an LLM slot, in seconds."),
+]:
+    REGISTRY.gauge(f"llm_scheduler_{_name}", _help, lambda _name=_name: LLM_SCHEDULER.stats()[_name])
+REGISTRY.gauge("llm_upstream_streams", "LLM streams opened upstream since startup.", lambda: STREAM_COALESCER.n_upstream)
+REGISTRY.gauge("llm_coalesced_streams", "LLM streams served by an identical one in flight.", lambda: STREAM_COALESCER.n_coalesced)
+
+# id of the model served at LLM_SERVER, found once per process by `resolve_model`
+_model: str | None = None
 
-        #TODO wrap with try/except
-        models = client_sync.models.list()
+
+async def resolve_model() -> str:
+    """The model served by the LLM server, asked once and then cached."""
+    global _model
+    if _model is None:
+        models = await get_openai_client().models.list()
         if len(models.data) != 1:
             raise ValueError(f"No models or more than one model found at LLM API endpoint: {LLM_SERVER}")
-        self.model = models.data[0].id
+        _model = models.data[0].id
+    return _model
+
+
+class LLMService:
+    def __init__(self, model: str | None = None):
+        """`model` defaults to the one found by `resolve_model`, which must have run."""
+        if model is None:
+            if _model is None:
+                raise RuntimeError("The LLM model is not known yet, await resolve_model() first")
+            model = _model
+        self.model = model
         self.client = get_openai_client()
+        # sessions get a fair share of the LLM slots
+        self.session_id = uuid.uuid4().hex
         #self.client = None  # Placeholder since we are not actually connecting
-    
 
-    async def stream_response(self, messages, sources: list[dict[str, Any]] | None) -> Any:
-        """Async generator that yields response chunks from the LLM."""
-        payload = {
-            "messages": messages,}
+
+    async def stream_response(
+        self,
+        messages,
+        sources: list[dict[str, Any]] | None,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> Any:
+        """Async generator that yields response chunks from the LLM.
+
+        Identical requests in flight from several sessions share one upstream stream,
+        which waits for a slot of the scheduler. Raises `LLMBusyError` if it waits too
+        long.
+        """
+        key = request_key(self.model, messages, sources, int(priority))
+        async for delta in STREAM_COALESCER.stream(
+            key, lambda: self._stream_upstream(messages, sources, priority)
+        ):
+            yield delta
+
+    async def _stream_upstream(self, messages, sources: list[dict[str, Any]] | None, priority: Priority) -> Any:
+        start = time.perf_counter()
+        first_token = None
+        n_deltas = 0
+        async with LLM_SCHEDULER.slot(self.session_id, priority):
+            async for delta in self._stream_completion(messages, sources):
+                if first_token is None:
+                    first_token = time.perf_counter()
+                    LLM_TTFT.observe(first_token - start)
+                n_deltas += 1
+                yield delta
+        LLM_TOKENS.inc(n_deltas)
+        if first_token is not None and n_deltas > 1:
+            LLM_TOKENS_PER_SECOND.observe((n_deltas - 1) / max(time.perf_counter() - first_token, 1e-6))
+
+    async def _stream_completion(self, messages, sources: list[dict[str, Any]] | None) -> Any:
         async with self.client.chat.completions.stream(
             model=self.model,
             messages=cast(Any, messages),
@@ -46,4 +119,15 @@ class LLMService:
         # for char in simulated_response:
         #     await asyncio.sleep(0.01)  # Simulate delay
         #     yield char
-        
+
+    async def complete(
+        self,
+        messages,
+        sources: list[dict[str, Any]] | None = None,
+        priority: Priority = Priority.BACKGROUND,
+    ) -> str:
+        """Collect a whole response, for background jobs that don't stream."""
+        deltas = []
+        async for delta in self.stream_response(messages, sources, priority):
+            deltas.append(delta)
+        return "".join(deltas)
@@ -0,0 +1,204 @@
+"""Catalog of the stored meetings, `meetings.json` indexed in memory.
+
+The file stays the source of truth, shared by the workers: it is re-read only
+when its modification time changes. In memory, entries are indexed by id and
+kept sorted by start time, so that lookups and pages of the listing don't scan
+or validate the whole catalog.
+
+Transcripts are stored next to it, one file per meeting in `transcripts/`, and
+read when a meeting is asked for with its transcript: the index in memory
+stays small however long the meetings are. Transcripts still inside
+`meetings.json`, as it was written before, move to their files on the next
+write.
+
+All methods read or write files, on the event loop they belong in a thread.
+"""
+
+import base64
+import bisect
+import binascii
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterable
+from urllib.parse import quote
+
+from backend.models.meeting import Meeting
+
+TRANSCRIPTS_DIR = "transcripts"
+
+
+class CursorError(ValueError):
+    """The pagination cursor is malformed."""
+
+
+class MeetingCatalog:
+    """Meetings of a `meetings.json`, by id and by (start time, id)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.transcripts_dir = os.path.join(os.path.dirname(path), TRANSCRIPTS_DIR)
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict] = {}
+        self._order: list[tuple[str, str]] = []
+        # meetings whose transcript is still inside meetings.json
+        self._inline: set[str] = set()
+        self._stamp: tuple[int, int] | None = None  # (mtime, size) of the file loaded
+
+    @property
+    def version(self) -> str:
+        """Changes whenever the catalog does, usable as an ETag."""
+        self.refresh()
+        return "%x-%x" % self._stamp if self._stamp is not None else "empty"
+
+    def _file_stamp(self) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read(self) -> list[dict]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def refresh(self):
+        """Reload the file if another worker (or this one) changed it."""
+        stamp = self._file_stamp()
+        if stamp == self._stamp:
+            return
+        entries = self._read() if stamp is not None else []
+        with self._lock:
+            self._index(entries)
+            self._stamp = stamp
+
+    def _index(self, entries: Iterable[dict]):
+        self._entries, self._inline = {}, set()
+        for entry in entries:
+            if "id" not in entry:
+                continue
+            if entry.get("transcript"):
+                self._inline.add(entry["id"])
+            self._entries[entry["id"]] = {key: value for key, value in entry.items() if key != "transcript"}
+        self._order = sorted((entry.get("start_time", ""), meeting_id) for meeting_id, entry in self._entries.items())
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self._order)
+
+    def get(self, meeting_id: str) -> dict | None:
+        """The stored entry of a meeting, as in `meetings.json`, without its transcript."""
+        self.refresh()
+        return self._entries.get(meeting_id)
+
+    def _transcript_path(self, meeting_id: str) -> str:
+        # ids of imported meetings are file names, they can't be trusted as paths
+        return os.path.join(self.transcripts_dir, f"{quote(meeting_id, safe='')}.txt")
+
+    def transcript(self, meeting_id: str) -> str:
+        """The transcript of a stored meeting, empty if it has none."""
+        self.refresh()
+        if meeting_id in self._inline:
+            entry = next((entry for entry in self._read() if entry.get("id") == meeting_id), {})
+            if entry.get("transcript"):
+                return entry["transcript"]
+            # moved to its file meanwhile
+        try:
+            with open(self._transcript_path(meeting_id), "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return ""
+
+    def load(self, meeting_id: str) -> Meeting | None:
+        """A stored meeting with its transcript."""
+        entry = self.get(meeting_id)
+        if entry is None:
+            return None
+        return Meeting.from_dict({**entry, "transcript": self.transcript(meeting_id)})
+
+    def last(self) -> Meeting | None:
+        """The meeting that started last, with its transcript."""
+        self.refresh()
+        with self._lock:
+            if not self._order:
+                return None
+            meeting_id = self._order[-1][1]
+        return self.load(meeting_id)
+
+    def meetings(self) -> list[Meeting]:
+        """All meetings with their transcripts, oldest first."""
+        self.refresh()
+        with self._lock:
+            meeting_ids = [meeting_id for _, meeting_id in self._order]
+        meetings = [self.load(meeting_id) for meeting_id in meeting_ids]
+        return [meeting for meeting in meetings if meeting is not None]
+
+    def page(self, cursor: str | None = None, limit: int = 50) -> tuple[list[dict], str | None]:
+        """Entries newest first, starting after `cursor`, and the cursor of the next page."""
+        self.refresh()
+        with self._lock:
+            end = len(self._order) if cursor is None else bisect.bisect_left(self._order, decode_cursor(cursor))
+            keys = self._order[max(end - limit, 0):end][::-1]
+            entries = [self._entries[meeting_id] for _, meeting_id in keys]
+        next_cursor = encode_cursor(keys[-1]) if keys and end > limit else None
+        return entries, next_cursor
+
+    @contextmanager
+    def _locked(self):
+        """Serialize read-modify-write cycles of meetings.json across workers."""
+        with open(f"{self.path}.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _write_transcript(self, meeting_id: str, transcript: str):
+        os.makedirs(self.transcripts_dir, exist_ok=True)
+        path = self._transcript_path(meeting_id)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            f.write(transcript)
+        os.replace(f"{path}.tmp", path)
+
+    def put(self, meeting: Meeting):
+        """Add a meeting, or replace the stored one with the same id."""
+        with self._locked():
+            self.refresh()
+            if self._inline:
+                # rewritten without transcripts, move them out first
+                for entry in self._read():
+                    if entry.get("id") in self._inline:
+                        self._write_transcript(entry["id"], entry["transcript"])
+            self._write_transcript(meeting.meeting_id, meeting.transcript or "")
+            with self._lock:
+                entries = dict(self._entries)
+            entries[meeting.meeting_id] = {
+                key: value for key, value in meeting._to_dict().items() if key != "transcript"
+            }
+            ordered = sorted(entries.values(), key=lambda entry: (entry["start_time"], entry["id"]))
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(ordered, f, indent=2)
+            os.replace(tmp_path, self.path)
+            with self._lock:
+                self._index(ordered)
+                self._stamp = self._file_stamp()
+
+
+def encode_cursor(key: tuple[str, str]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, str]:
+    try:
+        start_time, meeting_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise CursorError(f"Invalid cursor: {cursor!r}") from e
+    if not isinstance(start_time, str) or not isinstance(meeting_id, str):
+        raise CursorError(f"Invalid cursor: {cursor!r}")
+    return start_time, meeting_id
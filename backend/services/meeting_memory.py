@@ -1,42 +1,197 @@
+import asyncio
+import fcntl
 import os
-from datetime import datetime
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
+import threading
+import numpy as np
 from backend.models.meeting import Meeting
+from backend.services.lexical_index import BM25Index, reciprocal_rank_fusion
+from backend.services.persistence import WriteBehindPersister, read_wal
+from backend.utils.metrics import REGISTRY
+from backend.utils import cpu_pool
 
 CHROMA_DIR = "./data/meetings"
+WAL_PATH = os.path.join(CHROMA_DIR, "pending.wal")
+# held by the process that has the store open, see `StoreLockedError`
+LOCK_PATH = os.path.join(CHROMA_DIR, "writer.lock")
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+CHUNK_SIZE = 1000   # ~750 tokens
+CHUNK_OVERLAP = 100 # maintain context between chunks
+# number of lexical hits handed to the vector store for re-ranking
+LEXICAL_CANDIDATES = 20
+# how long a caller waits for the warm-up before giving up
+WARM_UP_TIMEOUT = 300.0
+
+EMBED_QUERY_TIME = REGISTRY.histogram("embed_query_seconds", "Time to embed a chat query.")
+RETRIEVAL_TIME = REGISTRY.histogram(
+    "retrieval_seconds", "Time of the hybrid search of meeting chunks, excluding the query embedding."
+)
+INDEX_WRITE_TIME = REGISTRY.histogram(
+    "index_write_seconds", "Time to embed and store a batch of meeting chunks."
+)
+
+class StoreLockedError(RuntimeError):
+    """The vector store is already open in another process, e.g. the server or the index service."""
+
 
 class MeetingMemory:
+    """Vector store and lexical index of the meeting chunks.
+
+    Constructing it is cheap: langchain, Chroma and the embedding model are only
+    loaded by `warm_up`, which is meant to run in a worker thread while the server
+    already accepts requests. The other methods wait for the warm-up.
+    """
+
     def __init__(self, embedder=None):
+        self.embedder = embedder
+        self.db = None
+        self.splitter = None
+        self.lexical = BM25Index()
+        #bumped whenever indexed chunks change, except provisional ones, lets caches detect stale answers
+        self.version = 0
+        # writes run in worker threads, concurrently
+        self._version_lock = threading.Lock()
+        self.persister = None
+        self._lock_file = None
+        self.ready = threading.Event()
+        self.warm_up_error: BaseException | None = None
+
+    def warm_up(self):
+        """Load the embedding model and the vector store, replay pending writes."""
+        try:
+            self._warm_up()
+        except BaseException as e:
+            self.warm_up_error = e
+            raise
+        finally:
+            self.ready.set()
+
+    def _warm_up(self):
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+
         os.makedirs(CHROMA_DIR, exist_ok=True)
+        self._lock_store()
 
         #embedding model
-        if embedder is None:
-            self.embedder = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-        else:
-            self.embedder = embedder
+        if self.embedder is None and cpu_pool.enabled():
+            from backend.services.embeddings import PooledEmbeddings
+            self.embedder = PooledEmbeddings(EMBEDDING_MODEL)
+        elif self.embedder is None:
+            self.embedder = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
         #chroma db
-        self.db = Chroma(
-            persist_directory=CHROMA_DIR,
-            embedding_function=self.embedder,
-        )
+        self.db = self._open_store()
 
         #text splitter
         self.splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,   # ~750 tokens
-            chunk_overlap=100, # maintain context between chunks
+            chunk_size=CHUNK_SIZE,
+            chunk_overlap=CHUNK_OVERLAP,
             separators=["\n\n", ".", "?", "!", " ", ""],
         )
 
+        self._recover()
+
+    def _lock_store(self):
+        """Refuse to open a store that another process writes to, concurrent writers corrupt it."""
+        self._lock_file = open(LOCK_PATH, "w")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._lock_file.close()
+            self._lock_file = None
+            raise StoreLockedError(
+                f"The meeting store {CHROMA_DIR} is open in another process (the server or the index "
+                "service), go through the index service with MEETING_INDEX_URL or stop it first"
+            )
+
+    def _open_store(self):
+        from langchain_community.vectorstores import Chroma
+
+        return Chroma(
+            persist_directory=CHROMA_DIR,
+            embedding_function=self.embedder,
+        )
+
+    def _recover(self):
+        """Replay the writes left in the log by a crash, and open the log for new writes."""
+        #chunks written before a crash but never flushed
+        wal_records = read_wal(WAL_PATH)
+        for record in wal_records:
+            self._apply(record)
+
+        #lexical index, rebuilt from the persisted chunks
+        stored = self.db.get(include=["documents"])
+        for chunk_id, text in zip(stored["ids"], stored["documents"]):
+            self.lexical.add(chunk_id, text)
+
+        #write-ahead log and batched flushes of the store
+        self.persister = WriteBehindPersister(lambda: self.db.persist(), WAL_PATH)
+        if wal_records:
+            # replayed records are not pending in the persister, the store must
+            # still be persisted before the log is truncated
+            self.persister.flush(force=True)
+
+    @property
+    def is_ready(self) -> bool:
+        return self.ready.is_set() and self.warm_up_error is None
+
+    def wait_ready(self, timeout: float | None = WARM_UP_TIMEOUT):
+        """Block until the warm-up is done, raise if it failed or timed out."""
+        if not self.ready.wait(timeout):
+            raise RuntimeError("Meeting memory is still warming up")
+        if self.warm_up_error is not None:
+            raise RuntimeError("Meeting memory failed to warm up") from self.warm_up_error
+
     def add_meeting(
         self,
         meeting: Meeting,
     ):
         """Store a meeting transcript as chunks with metadata."""
+        self.wait_ready()
+        chunks = cpu_pool.run_sync(cpu_pool.split_text, meeting.transcript, CHUNK_SIZE, CHUNK_OVERLAP)
+        self.add_chunks(meeting, chunks)
+
+    def add_chunks(
+        self,
+        meeting: Meeting,
+        chunks: list[str],
+        start_index: int = 0,
+        provisional: bool = False,
+        times: list[tuple[float, float] | None] | None = None,
+    ):
+        """Store already split chunks of a meeting, numbered from `start_index`.
+
+        Provisional chunks come from a meeting that is still being recorded, they
+        are searchable right away and confirmed by `commit_meeting`. `times` are
+        the start and end seconds of the chunks in the recording, when known.
+        """
+        if not chunks:
+            return
+        self.wait_ready()
+        ids, metadatas = self.chunk_records(meeting, len(chunks), start_index, provisional, times)
 
-        chunks = self.splitter.split_text(meeting.transcript)
+        record = {"op": "add", "ids": ids, "texts": chunks, "metadatas": metadatas}
+        with INDEX_WRITE_TIME.time(), self.persister.write(record, n_chunks=len(chunks)):
+            self._apply(record)
+        for chunk_id, chunk in zip(ids, chunks):
+            self.lexical.add(chunk_id, chunk)
+        if not provisional:
+            # live chunks are new ids, a cached answer can't have used them; bumping
+            # here would drop the answer cache every few seconds during a recording
+            self._bump_version()
 
+    def _bump_version(self):
+        with self._version_lock:
+            self.version += 1
+
+    @staticmethod
+    def chunk_records(
+        meeting: Meeting,
+        n_chunks: int,
+        start_index: int = 0,
+        provisional: bool = False,
+        times: list[tuple[float, float] | None] | None = None,
+    ) -> tuple[list[str], list[dict]]:
+        """Ids and metadata of `n_chunks` chunks of a meeting, numbered from `start_index`."""
         metadatas = [
             {
                 "meeting_id": meeting.meeting_id,
@@ -44,56 +199,189 @@ class MeetingMemory:
                 "participants": ", ".join(meeting.participants),
                 "datetime": meeting.start_time.isoformat(),
                 "chunk_index": i,
+                "provisional": provisional,
             }
-            for i in range(len(chunks))
+            for i in range(start_index, start_index + n_chunks)
         ]
+        for metadata, span in zip(metadatas, times or []):
+            # the store has no null metadata, chunks without timings have no keys
+            if span is not None:
+                metadata["start_sec"], metadata["end_sec"] = span
+        return [f"{meeting.meeting_id}:{m['chunk_index']}" for m in metadatas], metadatas
 
-        self.db.add_texts(chunks, metadatas=metadatas)
-        self.db.persist()
+    def bulk_upsert(self, ids: list[str], texts: list[str], embeddings: np.ndarray, metadatas: list[dict]):
+        """Write already embedded chunks, replacing chunks with the same ids.
 
-    def query(self, query_text: str, k: int = 3):
-        """Retrieve semantically similar meeting chunks."""
-        results = self.db.similarity_search(query_text, k=k)
-        return [
-            {
-                "content": doc.page_content,
-                "metadata": doc.metadata,
-            }
-            for doc in results
-        ]
-    
-    def get_last_meeting(self) -> Meeting | None:
-        """Retrieve the most recent meeting based on start_time metadata."""
-        all_meetings = self.db.get_all_documents()
-        if not all_meetings:
-            return None
-        
-        # Extract unique meetings
-        meeting_dict = {}
-        for doc in all_meetings:
-            mid = doc.metadata["meeting_id"]
-            if mid not in meeting_dict:
-                meeting_dict[mid] = {
-                    "title": doc.metadata["title"],
-                    "participants": doc.metadata["participants"].split(", "),
-                    "start_time": doc.metadata["datetime"],
-                    "transcript_chunks": [],
-                }
-            meeting_dict[mid]["transcript_chunks"].append(doc.page_content)
-        
-        # Find the most recent meeting
-        latest_meeting = None
-        latest_time = None
-        for mid, data in meeting_dict.items():
-            start_time = datetime.fromisoformat(data["start_time"])
-            if latest_time is None or start_time > latest_time:
-                latest_time = start_time
-                latest_meeting = Meeting(
-                    meeting_id=mid,
-                    title=data["title"],
-                    participants=data["participants"],
-                    start_time=start_time,
-                    transcript="\n".join(data["transcript_chunks"]),
-                )
-        
-        return latest_meeting
+        For offline imports: it bypasses the write-ahead log, the caller is
+        expected to checkpoint and call `flush`.
+        """
+        self.wait_ready()
+        with INDEX_WRITE_TIME.time():
+            self.db._collection.upsert(
+                ids=ids, documents=texts, embeddings=np.asarray(embeddings).tolist(), metadatas=metadatas
+            )
+        for chunk_id, text in zip(ids, texts):
+            self.lexical.add(chunk_id, text)
+        self._bump_version()
+
+    def delete_chunks_from(self, meeting_id: str, n_chunks: int):
+        """Delete the chunks of a meeting numbered `n_chunks` and above, left over by a re-split."""
+        self.wait_ready()
+        stored = self.db.get(
+            where={"$and": [{"meeting_id": meeting_id}, {"chunk_index": {"$gte": n_chunks}}]},
+            include=[],
+        )
+        if stored["ids"]:
+            self.db._collection.delete(ids=stored["ids"])
+            for chunk_id in stored["ids"]:
+                self.lexical.remove(chunk_id)
+            self._bump_version()
+
+    def flush(self):
+        """Persist the store now, including the writes of `bulk_upsert` that bypass the log."""
+        self.wait_ready()
+        self.persister.flush(force=True)
+
+    def reset_collection(self):
+        """Drop every chunk and recreate the collection, e.g. for an embedding model of another dimension."""
+        self.wait_ready()
+        # nothing of the old collection is left to replay
+        self.persister.flush()
+        self.db.delete_collection()
+        self.db = self._open_store()
+        self.lexical = BM25Index()
+        self._bump_version()
+
+    def embed_documents(self, texts: list[str]) -> np.ndarray:
+        """The (n, dim) float32 embeddings of chunks, as stored."""
+        self.wait_ready()
+        return np.asarray(self.embedder.embed_documents(texts), dtype=np.float32)
+
+    def commit_meeting(self, meeting_id: str):
+        """Clear the provisional flag on all chunks of a finished meeting."""
+        self.wait_ready()
+        record = {"op": "commit", "meeting_id": meeting_id}
+        with self.persister.write(record):
+            self._apply(record)
+        self._bump_version()
+
+    def _apply(self, record: dict):
+        """Apply a write-ahead log record to the store, replaying is idempotent."""
+        if record["op"] == "add":
+            self.db.add_texts(record["texts"], metadatas=record["metadatas"], ids=record["ids"])
+        elif record["op"] == "commit":
+            stored = self.db.get(
+                where={"$and": [{"meeting_id": record["meeting_id"]}, {"provisional": True}]},
+                include=["metadatas"],
+            )
+            if stored["ids"]:
+                metadatas = [{**metadata, "provisional": False} for metadata in stored["metadatas"]]
+                self.db._collection.update(ids=stored["ids"], metadatas=metadatas)
+
+    def close(self):
+        """Flush pending writes, to be called on shutdown."""
+        if self.persister is not None:
+            self.persister.close()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    # Async interface, shared with `IndexClient` so that the handlers work the same
+    # with an in-process store and with the index service. The blocking calls run
+    # in worker threads, off the event loop.
+
+    async def awarm_up(self):
+        await asyncio.to_thread(self.warm_up)
+
+    async def aclose(self):
+        await asyncio.to_thread(self.close)
+
+    async def aembed_query(self, query_text: str) -> np.ndarray:
+        return await asyncio.to_thread(self.embed_query, query_text)
+
+    async def aquery(self, query_text: str, k: int = 3, query_vector: np.ndarray | None = None) -> list[dict]:
+        return await asyncio.to_thread(self.query, query_text, k, query_vector)
+
+    async def aadd_chunks(
+        self,
+        meeting: Meeting,
+        chunks: list[str],
+        start_index: int = 0,
+        provisional: bool = False,
+        times: list[tuple[float, float] | None] | None = None,
+    ):
+        await asyncio.to_thread(self.add_chunks, meeting, chunks, start_index, provisional, times)
+
+    async def acommit_meeting(self, meeting_id: str):
+        await asyncio.to_thread(self.commit_meeting, meeting_id)
+
+    async def aembed_documents(self, texts: list[str]) -> np.ndarray:
+        return await asyncio.to_thread(self.embed_documents, texts)
+
+    async def abulk_upsert(self, ids: list[str], texts: list[str], embeddings: np.ndarray, metadatas: list[dict]):
+        await asyncio.to_thread(self.bulk_upsert, ids, texts, embeddings, metadatas)
+
+    async def adelete_chunks_from(self, meeting_id: str, n_chunks: int):
+        await asyncio.to_thread(self.delete_chunks_from, meeting_id, n_chunks)
+
+    async def aflush(self):
+        await asyncio.to_thread(self.flush)
+
+    async def areset_collection(self):
+        await asyncio.to_thread(self.reset_collection)
+
+    def embed_query(self, query_text: str) -> np.ndarray:
+        """Embed a query after normalizing case and whitespace, L2-normalized."""
+        self.wait_ready()
+        normalized = " ".join(query_text.lower().split())
+        with EMBED_QUERY_TIME.time():
+            vector = np.asarray(self.embedder.embed_query(normalized), dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def query(self, query_text: str, k: int = 3, query_vector: np.ndarray | None = None):
+        """Retrieve meeting chunks with hybrid lexical + semantic search.
+
+        BM25 hits from the inverted index are re-ranked with their stored embeddings
+        and both rankings are fused. The full k-NN search is only used when the
+        lexical index has too few candidates. `query_vector` can be passed to reuse
+        an embedding from `embed_query`.
+        """
+        self.wait_ready()
+        if query_vector is None:
+            query_vector = self.embed_query(query_text)
+        with RETRIEVAL_TIME.time():
+            return self._search(query_text, k, query_vector)
+
+    def _search(self, query_text: str, k: int, query_vector: np.ndarray) -> list[dict]:
+        lexical_ids = [doc_id for doc_id, _ in self.lexical.search(query_text, k=LEXICAL_CANDIDATES)]
+        if len(lexical_ids) < k:
+            results = self.db.similarity_search_by_vector(query_vector.tolist(), k=k)
+            semantic = [
+                {"id": doc.id, "content": doc.page_content, "metadata": doc.metadata}
+                for doc in results
+            ]
+            if not lexical_ids:
+                return semantic
+            by_id = {r["id"]: r for r in semantic}
+            by_id.update(self._get_chunks(lexical_ids))
+            fused = reciprocal_rank_fusion(lexical_ids, [r["id"] for r in semantic])
+            return [by_id[doc_id] for doc_id, _ in fused[:k] if doc_id in by_id]
+
+        stored = self.db.get(ids=lexical_ids, include=["embeddings", "documents", "metadatas"])
+        embeddings = np.asarray(stored["embeddings"], dtype=np.float32)
+        similarity = embeddings @ query_vector / np.maximum(np.linalg.norm(embeddings, axis=1), 1e-12)
+        vector_ids = [stored["ids"][i] for i in np.argsort(-similarity)]
+
+        by_id = {
+            chunk_id: {"id": chunk_id, "content": text, "metadata": metadata}
+            for chunk_id, text, metadata in zip(stored["ids"], stored["documents"], stored["metadatas"])
+        }
+        fused = reciprocal_rank_fusion(lexical_ids, vector_ids)
+        return [by_id[doc_id] for doc_id, _ in fused[:k]]
+
+    def _get_chunks(self, ids: list[str]) -> dict[str, dict]:
+        stored = self.db.get(ids=ids, include=["documents", "metadatas"])
+        return {
+            chunk_id: {"id": chunk_id, "content": text, "metadata": metadata}
+            for chunk_id, text, metadata in zip(stored["ids"], stored["documents"], stored["metadatas"])
+        }
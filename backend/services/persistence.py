@@ -0,0 +1,115 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+def read_wal(path: str) -> list[dict]:
+    """Read the records of a write-ahead log, ignoring a torn last line."""
+    if not os.path.exists(path):
+        return []
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A crash in the middle of an append leaves a partial last line
+                logger.warning(f"Skipping corrupted record in {path}")
+    return records
+
+
+class WriteBehindPersister:
+    """Write-ahead log in front of the vector store, with batched store flushes.
+
+    Writes are journaled to the log before they reach the store. The store is
+    flushed and the log truncated once `max_pending` chunks were written since
+    the last flush, by the write that completes the batch, or on `flush`.
+    Records are always handed to the OS right away, `fsync` is batched every
+    `fsync_interval` seconds. On startup, whatever is left in the log must be
+    replayed with `read_wal`.
+
+    Stores that persist every write themselves (Chroma from 0.4 on, where
+    `persist` does nothing) only need the log for the writes in progress during
+    a crash; the flush then just keeps the log short.
+    """
+
+    def __init__(
+        self,
+        flush_fn: Callable[[], None],
+        wal_path: str,
+        max_pending: int = 256,
+        fsync_interval: float = 0.5,
+    ):
+        self.flush_fn = flush_fn
+        self.wal_path = wal_path
+        self.max_pending = max_pending
+        self.fsync_interval = fsync_interval
+
+        self._wal = open(wal_path, "a", encoding="utf-8")
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._pending = 0
+        self._last_fsync = time.monotonic()
+        self.n_flushes = 0
+
+    @contextmanager
+    def write(self, record: dict, n_chunks: int = 1):
+        """Journal `record`, then let the caller apply it to the store.
+
+        Flushes wait for writes in progress, so the log is never truncated before
+        the store has received the record.
+        """
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._cond:
+            self._wal.write(line)
+            self._wal.flush()
+            if time.monotonic() - self._last_fsync >= self.fsync_interval:
+                self._fsync_locked()
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._pending += n_chunks
+                # the last write in progress flushes, the others don't wait for it
+                flush_due = self._pending >= self.max_pending and self._in_flight == 0
+                self._cond.notify_all()
+            if flush_due:
+                try:
+                    self.flush()
+                except Exception as e:
+                    # the records stay in the log, the next flush retries
+                    logger.warning(f"Write-behind flush failed: {e}")
+
+    def flush(self, force: bool = False):
+        """Flush the store and truncate the write-ahead log.
+
+        The store is only flushed when writes are pending, or with `force` for
+        writes that did not go through `write` (a replayed log, bulk writes).
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._in_flight == 0)
+            if self._pending or force:
+                self.flush_fn()
+                self.n_flushes += 1
+            self._wal.seek(0)
+            self._wal.truncate()
+            self._fsync_locked()
+            self._pending = 0
+
+    def _fsync_locked(self):
+        self._wal.flush()
+        os.fsync(self._wal.fileno())
+        self._last_fsync = time.monotonic()
+
+    def close(self):
+        """Flush what is left."""
+        self.flush()
+        self._wal.close()
@@ -1,48 +1,96 @@
 import wave
 import os
 import asyncio
-import json
+from backend.configs import RECORDINGS_DIR, SAMPLE_RATE
 from backend.models.meeting import Meeting
+from backend.services.meeting_catalog import MeetingCatalog
+from backend.services.transcript_journal import TranscriptJournal
+from backend.services.uploads import SESSION_ID_RE
+from backend.utils import cpu_pool
+
+AUDIO_DIR = "audio"
+
+
+def audio_path(dir: str, meeting_id: str) -> str:
+    """Recording of a meeting, mono 16-bit wav at the rate it was received."""
+    if not SESSION_ID_RE.match(meeting_id):
+        raise ValueError(f"Invalid meeting id: {meeting_id!r}")
+    return os.path.join(dir, AUDIO_DIR, f"{meeting_id}.wav")
+
+
+def catalog_path(dir: str) -> str:
+    return os.path.join(dir, "meetings.json")
+
 
 class Recorder:
-    def __init__(self, dir="recordings"):
+    def __init__(self, dir=RECORDINGS_DIR, sample_rate=SAMPLE_RATE, catalog: MeetingCatalog | None = None):
         os.makedirs(dir, exist_ok=True)
         self.dir = dir
-        self.text_file = open(f"{dir}/transcript.txt", "w", encoding="utf-8")
-        self.audio_path = f"{dir}/audio.wav"
+        self.sample_rate = sample_rate
+        # created with the first segment, the catalog alone needs no journal
+        self.journal: TranscriptJournal | None = None
         self.audio_frames = []
-        self.last_meeting = self._get_last_meeting()
+        # shared by the sessions of a process, see `app.state.catalog`
+        self.catalog = catalog if catalog is not None else MeetingCatalog(catalog_path(dir))
+
+    async def last_meeting(self) -> Meeting | None:
+        """Last stored meeting, reloaded when another worker changed the catalog."""
+        return await asyncio.to_thread(self.catalog.last)
 
     async def add_audio(self, pcm):
         self.audio_frames.append(pcm.copy())
 
+    def _journal(self) -> TranscriptJournal:
+        if self.journal is None:
+            self.journal = TranscriptJournal.create(self.dir)
+        return self.journal
+
+    def start_meeting(self, meeting: Meeting):
+        """Journal the details of the meeting being recorded, to recover it after a crash."""
+        self._journal().write_meeting(meeting)
+
+    def add_segment(self, text: str, start: float | None = None, end: float | None = None):
+        """Journal a transcript segment, a segment listener of the STT."""
+        self._journal().append(text, start, end)
+
+    async def read_transcript(self) -> str:
+        """The transcript journaled so far."""
+        if self.journal is None:
+            return ""
+        return await asyncio.to_thread(self.journal.read_transcript)
+
+    async def remove_journal(self):
+        """Drop the journal once the meeting is stored and indexed, it stays locked until then."""
+        if self.journal is not None:
+            await asyncio.to_thread(self.journal.remove)
+
     async def add_meeting(self, meeting: Meeting):
-        """append a meeting to the json file"""
-        all_meetings = json.loads(open(f"{self.dir}/meetings.json", "r", encoding="utf-8").read()) if os.path.exists(f"{self.dir}/meetings.json") else []
-        all_meetings.append(meeting._to_dict())
-        with open(f"{self.dir}/meetings.json", "w", encoding="utf-8") as f:
-            json.dump(all_meetings, f, indent=2)
-        self.last_meeting = meeting
-
-    async def close(self):
-        import numpy as np
-        pcm = np.concatenate(self.audio_frames)
-        with wave.open(self.audio_path, "wb") as wf:
+        """add a meeting to the catalog"""
+        await asyncio.to_thread(self.catalog.put, meeting)
+
+    async def update_meeting(self, meeting: Meeting):
+        """replace a stored meeting, e.g. once its digest is generated"""
+        await asyncio.to_thread(self.catalog.put, meeting)
+
+    async def close(self, meeting_id: str | None = None):
+        """Write the recorded audio of the meeting, see `audio_path`."""
+        frames, self.audio_frames = self.audio_frames, []
+        if not frames or meeting_id is None:
+            return
+        # concatenated off the event loop, with the conversion
+        samples = await cpu_pool.float_to_int16(frames)
+        await asyncio.to_thread(self._write_wav, audio_path(self.dir, meeting_id), samples)
+
+    def _write_wav(self, path, samples):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".part"
+        with wave.open(tmp_path, "wb") as wf:
             wf.setnchannels(1)
             wf.setsampwidth(2)
-            wf.setframerate(16000)
-            wf.writeframes((pcm * 32767).astype("int16").tobytes())
-        self.text_file.close()
-    
-    def _get_last_meeting(self) -> Meeting | str | None:
-        """Retrieve the last saved meeting from the recorder's storage."""
-        meetings_file = f"{self.dir}/meetings.json"
-        if not os.path.exists(meetings_file):
-            return None
-
-        with open(meetings_file, "r", encoding="utf-8") as f:
-            meetings_data = json.load(f)
-            if not meetings_data:
-                return None
-            last_meeting_data = meetings_data[-1]
-            return Meeting.from_dict(last_meeting_data)
\ No newline at end of file
+            wf.setframerate(self.sample_rate)
+            wf.writeframes(samples.tobytes())
+        os.replace(tmp_path, path)
+
+    def load_meetings(self) -> list[Meeting]:
+        """All stored meetings, oldest first."""
+        return self.catalog.meetings()
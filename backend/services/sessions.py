@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import secrets
+from typing import TYPE_CHECKING
+from fastapi import WebSocket
+
+if TYPE_CHECKING:
+    from backend.handlers.main_handler import MeetingHandler
+    from backend.handlers.chat_handler import ChatHandler
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 24000
+
+
+class RealtimeSession:
+    """Server-side pipeline of one client, kept alive across reconnects.
+
+    The Opus decoder lives here rather than in the receive loop, so that a resumed
+    connection continues the same Ogg stream.
+    """
+
+    def __init__(self, token: str, handler: "MeetingHandler", chat_handler: "ChatHandler"):
+        import sphn
+
+        self.token = token
+        self.handler = handler
+        self.chat_handler = chat_handler
+        self.opus_reader = sphn.OpusStreamReader(SAMPLE_RATE)
+        self.wait_for_first_opus = True
+        # sequence number of the last audio page received, -1 before the first one
+        self.last_audio_seq = -1
+        self.finished = False
+        self.connection_id = 0
+        self.websocket: WebSocket | None = None
+        self.expiry_task: asyncio.Task | None = None
+
+    def accept_audio_seq(self, seq: int | None) -> bool:
+        """False for audio already received, replayed by the client after a reconnect."""
+        if seq is None:
+            return True
+        if seq <= self.last_audio_seq:
+            return False
+        self.last_audio_seq = seq
+        return True
+
+
+class SessionRegistry:
+    """Resumable sessions keyed by their token.
+
+    When the socket of a session drops, its pipeline is kept for `grace_period`
+    seconds, during which a new socket presenting the token takes it over.
+    """
+
+    def __init__(self, grace_period: float = 30.0):
+        self.grace_period = grace_period
+        self.sessions: dict[str, RealtimeSession] = {}
+
+    async def create(self, handler: "MeetingHandler", chat_handler: "ChatHandler") -> RealtimeSession:
+        await handler.__aenter__()
+        session = RealtimeSession(secrets.token_urlsafe(24), handler, chat_handler)
+        self.sessions[session.token] = session
+        return session
+
+    def resume(self, token: str) -> RealtimeSession | None:
+        session = self.sessions.get(token)
+        if session is None or session.finished:
+            return None
+        if session.expiry_task is not None:
+            session.expiry_task.cancel()
+            session.expiry_task = None
+        if session.websocket is not None:
+            # The server didn't notice the old socket is gone yet
+            asyncio.create_task(self._close_websocket(session.websocket))
+        return session
+
+    @staticmethod
+    async def _close_websocket(websocket: WebSocket):
+        try:
+            await websocket.close(code=4000, reason="Session resumed by another connection")
+        except Exception:
+            pass
+
+    def attach(self, session: RealtimeSession, websocket: WebSocket) -> int:
+        """Attach a connection, returns its id for `detach`."""
+        session.connection_id += 1
+        session.websocket = websocket
+        return session.connection_id
+
+    async def detach(self, session: RealtimeSession, connection_id: int):
+        """Close the session when it is finished, or keep it for the grace period."""
+        if connection_id != session.connection_id:
+            return  # another connection took the session over
+        session.websocket = None
+        if session.finished:
+            await self.close(session)
+        else:
+            session.expiry_task = asyncio.create_task(self._expire(session))
+
+    async def _expire(self, session: RealtimeSession):
+        await asyncio.sleep(self.grace_period)
+        logger.info(f"Session {session.token[:8]} not resumed, closing it")
+        session.expiry_task = None
+        await self.close(session)
+
+    async def close(self, session: RealtimeSession):
+        if self.sessions.pop(session.token, None) is None:
+            return
+        session.finished = True
+        try:
+            await session.chat_handler.close()
+        finally:
+            await session.handler.__aexit__(None, None, None)
+
+    async def close_all(self):
+        for session in list(self.sessions.values()):
+            if session.expiry_task is not None:
+                session.expiry_task.cancel()
+            await self.close(session)
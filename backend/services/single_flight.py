@@ -0,0 +1,91 @@
+import asyncio
+import hashlib
+import json
+from typing import Any, AsyncIterator, Callable
+
+
+def request_key(*parts: Any) -> str:
+    """Stable key of a request, e.g. model, messages and sources."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    """One upstream stream, buffered so that late subscribers can catch up."""
+
+    def __init__(self):
+        self.deltas: list[str] = []
+        self.finished = False
+        self.error: BaseException | None = None
+        self.subscribers = 0
+        self.task: asyncio.Task | None = None
+        self.updated = asyncio.Event()
+
+    def notify(self):
+        self.updated.set()
+        self.updated = asyncio.Event()
+
+    async def iterate(self) -> AsyncIterator[str]:
+        i = 0
+        while True:
+            # Single-threaded: nothing can be appended between this check and the wait
+            updated = self.updated
+            while i < len(self.deltas):
+                yield self.deltas[i]
+                i += 1
+            if self.finished:
+                if self.error is not None:
+                    raise self.error
+                return
+            await updated.wait()
+
+
+class StreamCoalescer:
+    """Single-flight layer for streamed responses.
+
+    Identical requests in flight at the same time share one upstream stream, every
+    subscriber receives all the deltas from the start. The upstream stream is
+    cancelled once nobody is listening to it anymore.
+    """
+
+    def __init__(self):
+        self.flights: dict[str, _Flight] = {}
+        self.n_upstream = 0
+        self.n_coalesced = 0
+
+    async def stream(self, key: str, open_stream: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        flight = self.flights.get(key)
+        if flight is None:
+            flight = _Flight()
+            self.flights[key] = flight
+            flight.task = asyncio.create_task(self._pump(key, flight, open_stream()))
+            self.n_upstream += 1
+        else:
+            self.n_coalesced += 1
+
+        flight.subscribers += 1
+        try:
+            async for delta in flight.iterate():
+                yield delta
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.finished:
+                # Nobody reads this answer anymore, free the LLM server
+                if self.flights.get(key) is flight:
+                    del self.flights[key]
+                flight.task.cancel()
+
+    async def _pump(self, key: str, flight: _Flight, upstream: AsyncIterator[str]):
+        try:
+            async for delta in upstream:
+                flight.deltas.append(delta)
+                flight.notify()
+        except asyncio.CancelledError as e:
+            flight.error = e
+        except Exception as e:
+            flight.error = e
+        finally:
+            flight.finished = True
+            flight.notify()
+            if self.flights.get(key) is flight:
+                del self.flights[key]
@@ -4,19 +4,37 @@ import httpx
 from fastrtc import audio_to_float32
 import asyncio
 import json
+import logging
+from typing import Callable
+from backend.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+STT_ROUND_TRIP = REGISTRY.histogram(
+    "stt_round_trip_seconds", "Time for the STT backend to transcribe a chunk of audio."
+)
+STT_REALTIME_LAG = REGISTRY.histogram(
+    "stt_realtime_lag_seconds",
+    "How far the transcript is behind the audio, since the first audio of the session was sent.",
+)
+
+SegmentListener = Callable[[str, float, float], None]
 
 class SpeechToText:
     """Speech to Text Service Wrapper"""
 
-    def __init__(self, api: str):
+    def __init__(self, api: str, sample_rate: int = 24000):
         """
         api: The URL of your STT backend (e.g. an ngrok endpoint)
         """
         self.api = api
+        self.sample_rate = sample_rate
         self.audio_queue = asyncio.Queue()
-        self.transcript_buffer = "" #buffer for partial transcripts
         self.sent_samples = 0
         self.received_words = 0
+        self.transcribed_samples = 0
+        # called with (text, start_sec, end_sec) for every transcribed segment
+        self.segment_listeners: list[SegmentListener] = []
         self.time_first_audio_sent = None  # fixed naming
         self.running = True
         self.audio_consume_task = asyncio.create_task(self._consume_audio_queue())
@@ -58,28 +76,37 @@ class SpeechToText:
                     big_chunk = np.concatenate(buffer)
                     buffer = []
                     last_send = time.time()
-
-                    response = await self._send({
-                        "type": "audio_chunk",
-                        "pcm": big_chunk.tolist()
-                    })
-                    if "text" in response:
-                        self.transcript_buffer += " " + response["text"]
+                    await self._transcribe(big_chunk)
 
             except asyncio.TimeoutError:
                 # flush any partial buffer if no new audio
                 if buffer:
                     big_chunk = np.concatenate(buffer)
                     buffer = []
-                    response = await self._send({
-                        "type": "audio_chunk",
-                        "pcm": big_chunk.tolist()
-                    })
-                    if "text" in response:
-                        self.transcript_buffer += " " + response["text"]
+                    await self._transcribe(big_chunk)
             if self.finalize_called and self.audio_queue.empty():
                 self.running = False
     
+    async def _transcribe(self, pcm: np.ndarray):
+        """Send a chunk of audio and dispatch the resulting segment."""
+        with STT_ROUND_TRIP.time():
+            response = await self._send({
+                "type": "audio_chunk",
+                "pcm": pcm.tolist()
+            })
+        start = self.transcribed_samples / self.sample_rate
+        self.transcribed_samples += len(pcm)
+        if self.time_first_audio_sent is not None:
+            elapsed = time.perf_counter() - self.time_first_audio_sent
+            STT_REALTIME_LAG.observe(max(0.0, elapsed - self.transcribed_samples / self.sample_rate))
+        if "text" in response:
+            end = self.transcribed_samples / self.sample_rate
+            for listener in self.segment_listeners:
+                try:
+                    listener(response["text"], start, end)
+                except Exception as e:
+                    logger.warning(f"Transcript segment listener failed: {e}")
+
     async def finalize(self):
         """Finalize the STT session, flushing any remaining audio."""
         self.finalize_called = True
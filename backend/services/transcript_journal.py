@@ -0,0 +1,182 @@
+"""Append-only journal of the transcript of a meeting, written while it is recorded.
+
+Every STT segment is appended as a JSON line as soon as it arrives and handed
+to the OS right away, `fsync` is batched every `fsync_interval` seconds. The
+journal of a meeting is removed once the meeting is stored and indexed; a
+journal left behind by a crash is replayed on startup by `recover_journals`.
+
+Records are `{"meeting": {...}}`, written when the meeting details are known,
+and `{"text": ..., "start": ..., "end": ...}` for segments.
+"""
+
+import asyncio
+import fcntl
+import glob
+import json
+import logging
+import os
+import time
+import uuid
+from typing import TYPE_CHECKING, Iterator
+
+from backend.configs import RECORDINGS_DIR
+from backend.models.meeting import Meeting
+from backend.services.persistence import read_wal
+
+if TYPE_CHECKING:
+    from backend.services.index_client import IndexClient
+    from backend.services.meeting_catalog import MeetingCatalog
+    from backend.services.meeting_memory import MeetingMemory
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_DIR = "journal"
+
+Segment = tuple[str, float | None, float | None]
+
+
+class TranscriptJournal:
+    """Journal of one meeting, locked while it is being written."""
+
+    def __init__(self, path: str, fsync_interval: float = 1.0):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.file = open(path, "a", encoding="utf-8")
+        try:
+            # recovery skips journals that a live recording (of any worker) holds
+            fcntl.flock(self.file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self.file.close()
+            raise
+        self._last_fsync = time.monotonic()
+        self._syncing = False
+
+    @classmethod
+    def create(cls, dir: str = RECORDINGS_DIR, **kwargs) -> "TranscriptJournal":
+        os.makedirs(os.path.join(dir, JOURNAL_DIR), exist_ok=True)
+        return cls(os.path.join(dir, JOURNAL_DIR, f"{uuid.uuid4().hex}.jsonl"), **kwargs)
+
+    @property
+    def closed(self) -> bool:
+        return self.file.closed
+
+    def write_meeting(self, meeting: Meeting):
+        self._append({"meeting": {**meeting._to_dict(), "transcript": "", "digest": None}})
+
+    def append(self, text: str, start: float | None = None, end: float | None = None):
+        self._append({"text": text, "start": start, "end": end})
+
+    def _append(self, record: dict):
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+        self._maybe_fsync()
+
+    def _maybe_fsync(self):
+        now = time.monotonic()
+        if self._syncing or now - self._last_fsync < self.fsync_interval:
+            return
+        self._last_fsync = now
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            os.fsync(self.file.fileno())
+            return
+        # off the event loop, segments arrive in its callbacks
+        self._syncing = True
+        future = loop.run_in_executor(None, os.fsync, self.file.fileno())
+        future.add_done_callback(self._fsync_done)
+
+    def _fsync_done(self, future: asyncio.Future):
+        self._syncing = False
+        if not future.cancelled() and future.exception() is not None and not self.closed:
+            logger.warning(f"Transcript journal fsync failed: {future.exception()}")
+
+    def segments(self) -> Iterator[Segment]:
+        return iter_segments(self.path)
+
+    def read_transcript(self) -> str:
+        """The transcript so far, as the concatenated segments."""
+        return "".join(" " + text for text, _, _ in self.segments())
+
+    def close(self):
+        if self.closed:
+            return
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+
+    def remove(self):
+        """Drop the journal, once its meeting is stored for good."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def iter_segments(path: str) -> Iterator[Segment]:
+    for record in read_wal(path):
+        if "text" in record:
+            yield record["text"], record.get("start"), record.get("end")
+
+
+def read_journal(path: str) -> tuple[Meeting | None, list[Segment | Meeting]]:
+    """The meeting of a journal and its records in order: segments, and the meeting where it was attached."""
+    meeting, records = None, []
+    for record in read_wal(path):
+        if "meeting" in record:
+            meeting = Meeting.from_dict(record["meeting"])
+            if meeting is not None:
+                records.append(meeting)
+        elif "text" in record:
+            records.append((record["text"], record.get("start"), record.get("end")))
+    return meeting, records
+
+
+async def recover_journals(
+    meeting_memory: "MeetingMemory | IndexClient",
+    dir: str = RECORDINGS_DIR,
+    catalog: "MeetingCatalog | None" = None,
+) -> int:
+    """Store and index the meetings of journals left by a crash, returns how many.
+
+    The segments are replayed through a `LiveMeetingIndexer` in the order they
+    were received: the chunks come out with the same ids and texts as the
+    provisional ones stored before the crash, and the missing tail is added.
+    """
+    from backend.services.live_indexer import LiveMeetingIndexer
+    from backend.services.recorder import Recorder
+
+    recorder = Recorder(dir, catalog=catalog)
+    recovered = 0
+    for path in sorted(glob.glob(os.path.join(dir, JOURNAL_DIR, "*.jsonl"))):
+        try:
+            journal = TranscriptJournal(path)
+        except BlockingIOError:
+            continue  # a recording in progress
+        try:
+            meeting, records = await asyncio.to_thread(read_journal, path)
+            if meeting is None:
+                if records:
+                    logger.warning(f"Transcript journal {path} has no meeting details, left in place")
+                    journal.close()
+                else:
+                    journal.remove()
+                continue
+
+            indexer = LiveMeetingIndexer(meeting_memory)
+            for record in records:
+                if isinstance(record, Meeting):
+                    indexer.start(meeting)
+                else:
+                    indexer.add_segment(*record)
+            await indexer.commit()
+
+            meeting.transcript = "".join(" " + r[0] for r in records if not isinstance(r, Meeting))
+            if await asyncio.to_thread(recorder.catalog.get, meeting.meeting_id) is None:
+                await recorder.add_meeting(meeting)
+            journal.remove()
+            recovered += 1
+            logger.info(f"Recovered meeting {meeting.meeting_id} from its transcript journal")
+        except Exception as e:
+            logger.warning(f"Recovery of transcript journal {path} failed: {e}")
+            journal.close()
+    return recovered
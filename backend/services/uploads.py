@@ -0,0 +1,235 @@
+import asyncio
+import contextlib
+import errno
+import json
+import logging
+import os
+import re
+import shutil
+import time
+import uuid
+from typing import AsyncIterator
+
+import numpy as np
+from datetime import datetime
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+UPLOADS_DIR = "uploads"
+SESSION_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+# Seconds of audio decoded at once from an assembled upload
+DECODE_WINDOW = 5.0
+# Frames handed to the STT at once, like the Opus pages of a live recording
+FRAME_SECONDS = 0.08
+
+
+class UploadedMeeting(BaseModel):
+    """Meeting details sent with `finish_upload`, all optional."""
+    title: str | None = None
+    participants: list[str] = []
+    start_time: datetime | None = None
+
+
+class UploadError(Exception):
+    """The upload is invalid or incomplete."""
+
+
+class ChunkedUpload:
+    """Chunks of one upload session, stored as files next to an append-only manifest.
+
+    The manifest (`manifest.jsonl`, one `{"index", "size"}` per line) replaces
+    directory listings and survives restarts. The chunks are kept until
+    `cleanup`, so that a failed `finish_upload` can be retried.
+    """
+
+    def __init__(self, session_id: str, root: str = UPLOADS_DIR):
+        if not SESSION_ID_RE.match(session_id):
+            raise UploadError(f"Invalid session id: {session_id!r}")
+        self.session_id = session_id
+        self.dir = os.path.join(root, session_id)
+        self.manifest_path = os.path.join(self.dir, "manifest.jsonl")
+        self.chunks: dict[int, int] = {}  # index -> size
+        self.lock = asyncio.Lock()
+        # requests using the upload, and when the last one ended, for `expired`
+        self.busy = 0
+        self.last_active = time.monotonic()
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line
+                    self.chunks[entry["index"]] = entry["size"]
+
+    @property
+    def next_index(self) -> int:
+        return max(self.chunks, default=-1) + 1
+
+    def chunk_path(self, index: int) -> str:
+        return os.path.join(self.dir, f"chunk_{index:06d}")
+
+    def expired(self, ttl: float, now: float | None = None) -> bool:
+        """Unused for `ttl` seconds, an abandoned upload."""
+        now = time.monotonic() if now is None else now
+        return self.busy == 0 and now - self.last_active > ttl
+
+    @contextlib.contextmanager
+    def active(self):
+        """Keep the upload from expiring while a request uses it."""
+        self.busy += 1
+        try:
+            yield
+        finally:
+            self.busy -= 1
+            self.last_active = time.monotonic()
+
+    async def write_chunk(self, body: AsyncIterator[bytes], index: int | None = None) -> int:
+        """Stream a request body to a chunk file, returns the chunk index.
+
+        A chunk sent again, e.g. retried by the client, replaces the previous
+        one atomically, concurrent writes of the same index don't mix.
+        """
+        with self.active():
+            return await self._write_chunk(body, index)
+
+    async def _write_chunk(self, body: AsyncIterator[bytes], index: int | None) -> int:
+        async with self.lock:
+            os.makedirs(self.dir, exist_ok=True)
+            if index is None:
+                index = self.next_index
+            if index < 0:
+                raise UploadError(f"Invalid chunk index: {index}")
+            # reserve the index, so that concurrent appends get the next ones
+            self.chunks.setdefault(index, -1)
+
+        # one temporary file per request, renamed over the chunk once complete
+        tmp_path = f"{self.chunk_path(index)}.{uuid.uuid4().hex}.part"
+        size = 0
+        try:
+            with open(tmp_path, "wb") as f:
+                async for data in body:
+                    await asyncio.to_thread(f.write, data)
+                    size += len(data)
+            os.replace(tmp_path, self.chunk_path(index))
+        except BaseException:
+            if self.chunks.get(index) == -1 and not os.path.exists(self.chunk_path(index)):
+                del self.chunks[index]
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        async with self.lock:
+            self.chunks[index] = size
+            with open(self.manifest_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"index": index, "size": size}) + "\n")
+        return index
+
+    def assemble(self, out_path: str) -> int:
+        """Concatenate the chunks in order into `out_path`, returns its size.
+
+        The copy happens in the kernel when possible, no chunk is read into memory.
+        """
+        if not self.chunks:
+            raise UploadError("No chunks uploaded")
+        indices = sorted(self.chunks)
+        missing = sorted(set(range(indices[-1] + 1)) - set(indices))
+        if missing or any(self.chunks[i] < 0 for i in indices):
+            raise UploadError(f"Upload incomplete, missing chunks: {missing or 'in progress'}")
+
+        total = 0
+        with open(out_path, "wb") as out:
+            for index in indices:
+                with open(self.chunk_path(index), "rb") as src:
+                    total += copy_file(src, out)
+        return total
+
+    def cleanup(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+def remove_stale_uploads(root: str, ttl: float, keep: set[str]) -> list[str]:
+    """Delete the upload directories not modified for `ttl` seconds, except `keep`.
+
+    For uploads abandoned before a restart, which are not in memory anymore.
+    Returns the session ids removed.
+    """
+    if not os.path.isdir(root):
+        return []
+    removed = []
+    now = time.time()
+    for session_id in os.listdir(root):
+        path = os.path.join(root, session_id)
+        if session_id in keep or not os.path.isdir(path):
+            continue
+        try:
+            mtime = max(os.stat(path).st_mtime, os.stat(os.path.join(path, "manifest.jsonl")).st_mtime)
+        except FileNotFoundError:
+            mtime = os.stat(path).st_mtime
+        if now - mtime > ttl:
+            shutil.rmtree(path, ignore_errors=True)
+            removed.append(session_id)
+    return removed
+
+
+def copy_file(src, dst) -> int:
+    """Append the content of file `src` to file `dst`.
+
+    Uses `copy_file_range` (no copy to user space, reflinks on some filesystems),
+    then `sendfile`, then a buffered copy when neither is supported.
+    """
+    size = os.fstat(src.fileno()).st_size
+    dst.flush()
+    copied = 0
+    for kernel_copy in (_copy_file_range, _sendfile):
+        try:
+            while copied < size:
+                n = kernel_copy(src.fileno(), dst.fileno(), copied, size - copied)
+                if n == 0:
+                    break
+                copied += n
+            return copied
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP):
+                raise
+            if copied:
+                raise  # the fallbacks can't resume a partial copy reliably
+        except AttributeError:
+            pass  # not available on this platform
+    src.seek(0)
+    shutil.copyfileobj(src, dst, length=1 << 20)
+    return size
+
+
+def _copy_file_range(src_fd: int, dst_fd: int, offset: int, count: int) -> int:
+    return os.copy_file_range(src_fd, dst_fd, count, offset)
+
+
+def _sendfile(src_fd: int, dst_fd: int, offset: int, count: int) -> int:
+    return os.sendfile(dst_fd, src_fd, offset, count)
+
+
+async def iter_audio_frames(path: str, sample_rate: int) -> AsyncIterator[np.ndarray]:
+    """Decode an audio file window by window, yield mono float32 frames at `sample_rate`.
+
+    Only `DECODE_WINDOW` seconds of audio are in memory at once.
+    """
+    import sphn
+
+    reader = await asyncio.to_thread(sphn.FileReader, path)
+    frame = int(FRAME_SECONDS * sample_rate)
+    start = 0.0
+    while start < reader.duration_sec:
+        pcm = await asyncio.to_thread(reader.decode, start, DECODE_WINDOW)
+        start += DECODE_WINDOW
+        if pcm.size == 0:
+            break
+        pcm = pcm.mean(axis=0)
+        if reader.sample_rate != sample_rate:
+            n_samples = round(len(pcm) * sample_rate / reader.sample_rate)
+            # the resampler pads its output, which would add up over the windows
+            pcm = sphn.resample(pcm, reader.sample_rate, sample_rate)[:n_samples]
+        pcm = pcm.astype(np.float32, copy=False)
+        for i in range(0, len(pcm), frame):
+            yield pcm[i:i + frame]
@@ -0,0 +1,352 @@
+"""Bulk import of archived recordings into the meeting memory, and re-indexing.
+
+Import: every audio file of `--audio-dir` (wav, ogg, mp3, ...) is a meeting
+whose id is the file name without extension. Its title, participants and start
+time come from the `meetings.json` of `--recordings-dir` when it has an entry
+with that id. The pipeline decodes files in parallel processes, transcribes
+them with bounded concurrency against the STT endpoint, then splits, embeds and
+writes the chunks to the store in batches. The meetings are added to
+`meetings.json` with their transcripts.
+
+Re-index (`--reindex`): re-embeds the transcripts of all meetings in
+`meetings.json`, e.g. after changing the embedding model. The collection is
+dropped and recreated first, the new embeddings may have another dimension.
+
+Every stage checkpoints to `--work-dir`, an interrupted run picks up where it
+stopped when started again with the same arguments.
+
+With `MEETING_INDEX_URL` set, the store is written through the index service.
+Without it the store is opened directly, which is refused while the server or
+the index service has it open.
+
+    python -m backend.tools.bulk_import --audio-dir archive/ --stt-url http://localhost:8001/stt
+    python -m backend.tools.bulk_import --reindex
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+from backend.constants import MEETING_INDEX_URL
+from backend.models.meeting import Meeting
+from backend.services.index_client import IndexClient
+from backend.services.meeting_memory import (
+    CHUNK_OVERLAP,
+    CHUNK_SIZE,
+    EMBEDDING_MODEL,
+    MeetingMemory,
+    StoreLockedError,
+)
+from backend.services.recorder import Recorder
+from backend.utils import cpu_pool
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 24000
+AUDIO_EXTENSIONS = {".wav", ".ogg", ".opus", ".mp3", ".flac", ".m4a"}
+
+
+class StageStats:
+    """Items, amount of work and busy time of a pipeline stage."""
+
+    def __init__(self, name: str, unit: str):
+        self.name = name
+        self.unit = unit
+        self.items = 0
+        self.amount = 0.0
+        self.start: float | None = None
+        self.end: float | None = None
+
+    def record(self, amount: float = 0.0):
+        now = time.perf_counter()
+        self.start = self.start or now
+        self.end = now
+        self.items += 1
+        self.amount += amount
+
+    def begin(self):
+        self.start = self.start or time.perf_counter()
+
+    def report(self) -> str:
+        elapsed = (self.end - self.start) if self.start and self.end else 0.0
+        if not self.items or elapsed <= 0:
+            return f"{self.name:>8}: {self.items} items"
+        return (f"{self.name:>8}: {self.items} items, {self.amount:.0f} {self.unit} in {elapsed:.1f}s, "
+                f"{self.amount / elapsed:.1f} {self.unit}/s")
+
+
+class Checkpoint:
+    """Meetings already written to the store, saved atomically after every batch."""
+
+    def __init__(self, path: Path, model: str):
+        self.path = path
+        self.model = model
+        self.done: set[str] = set()
+        if path.exists():
+            data = json.loads(path.read_text())
+            if data.get("model") == model:
+                self.done = set(data["done"])
+            else:
+                logger.info(f"Checkpoint was made with {data.get('model')}, starting over")
+
+    def save(self):
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"model": self.model, "done": sorted(self.done)}))
+        os.replace(tmp, self.path)
+
+
+def decode_audio(path: str, out_path: str) -> float:
+    """Decode an audio file to mono float32 PCM at 24kHz in a .npy file, returns its duration.
+
+    Runs in a worker process.
+    """
+    import sphn
+
+    pcm, _ = sphn.read(path, sample_rate=SAMPLE_RATE)
+    pcm = pcm.mean(axis=0).astype(np.float32) if pcm.ndim == 2 else pcm.astype(np.float32)
+    tmp = out_path + ".tmp.npy"
+    np.save(tmp, pcm)
+    os.replace(tmp, out_path)
+    return len(pcm) / SAMPLE_RATE
+
+
+class BulkImporter:
+    def __init__(self, args, memory: MeetingMemory | IndexClient | None = None):
+        self.args = args
+        self.work_dir = Path(args.work_dir)
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        self.recorder = Recorder(args.recordings_dir)
+        if memory is None:
+            memory = IndexClient(MEETING_INDEX_URL) if MEETING_INDEX_URL else MeetingMemory()
+        self.memory = memory
+        self.stats = {
+            "decode": StageStats("decode", "audio s"),
+            "stt": StageStats("stt", "audio s"),
+            "split": StageStats("split", "chunks"),
+            "embed": StageStats("embed", "chunks"),
+            "write": StageStats("write", "chunks"),
+        }
+        self.checkpoint: Checkpoint | None = None
+        # chunks waiting for a full batch: (meeting, chunk_index, text)
+        self.pending: list[tuple[Meeting, int, str]] = []
+        self.remaining: dict[str, int] = {}
+
+    # --- embedding and writing, shared by import and re-index ---
+
+    async def index_meeting(self, meeting: Meeting):
+        chunks = await cpu_pool.run(cpu_pool.split_text, meeting.transcript or "", CHUNK_SIZE, CHUNK_OVERLAP)
+        self.stats["split"].record(len(chunks))
+        # chunks left over from a previous, longer split
+        await self.memory.adelete_chunks_from(meeting.meeting_id, len(chunks))
+        if not chunks:
+            await self._meeting_done(meeting.meeting_id)
+            return
+        self.remaining[meeting.meeting_id] = len(chunks)
+        self.pending.extend((meeting, i, chunk) for i, chunk in enumerate(chunks))
+        while len(self.pending) >= self.args.batch_size:
+            await self.write_batch()
+
+    async def write_batch(self):
+        batch, self.pending = self.pending[:self.args.batch_size], self.pending[self.args.batch_size:]
+        if not batch:
+            return
+        texts = [text for _, _, text in batch]
+        self.stats["embed"].begin()
+        embeddings = await self.memory.aembed_documents(texts)
+        self.stats["embed"].record(len(batch))
+
+        ids, metadatas = [], []
+        for meeting, index, _ in batch:
+            chunk_ids, chunk_metadatas = MeetingMemory.chunk_records(meeting, 1, index)
+            ids += chunk_ids
+            metadatas += chunk_metadatas
+        self.stats["write"].begin()
+        await self.memory.abulk_upsert(ids, texts, embeddings, metadatas)
+        self.stats["write"].record(len(batch))
+
+        finished = []
+        for meeting, _, _ in batch:
+            self.remaining[meeting.meeting_id] -= 1
+            if self.remaining[meeting.meeting_id] == 0:
+                finished.append(meeting.meeting_id)
+        for meeting_id in finished:
+            await self._meeting_done(meeting_id)
+
+    async def _meeting_done(self, meeting_id: str):
+        self.remaining.pop(meeting_id, None)
+        self.checkpoint.done.add(meeting_id)
+        # the store must be on disk before the checkpoint says so
+        await self.memory.aflush()
+        self.checkpoint.save()
+
+    # --- re-index ---
+
+    async def reindex(self):
+        self.checkpoint = Checkpoint(self.work_dir / "reindex.json", EMBEDDING_MODEL)
+        if not self.checkpoint.done:
+            # not resuming: the old embeddings can't be mixed with the new ones
+            logger.info("Dropping the collection")
+            await self.memory.areset_collection()
+        meetings = [m for m in self.recorder.load_meetings() if m.meeting_id not in self.checkpoint.done]
+        logger.info(f"Re-indexing {len(meetings)} meetings")
+        for meeting in meetings:
+            await self.index_meeting(meeting)
+        while self.pending:
+            await self.write_batch()
+
+    # --- import ---
+
+    async def import_audio(self):
+        self.checkpoint = Checkpoint(self.work_dir / "import.json", EMBEDDING_MODEL)
+        known = {m.meeting_id: m for m in self.recorder.load_meetings()}
+        paths = sorted(
+            p for p in Path(self.args.audio_dir).iterdir()
+            if p.suffix.lower() in AUDIO_EXTENSIONS and p.stem not in self.checkpoint.done
+        )
+        logger.info(f"Importing {len(paths)} recordings")
+
+        transcribe_queue: asyncio.Queue = asyncio.Queue(maxsize=self.args.decode_workers * 2)
+        index_queue: asyncio.Queue = asyncio.Queue(maxsize=self.args.stt_concurrency)
+        stt_slots = asyncio.Semaphore(self.args.stt_concurrency)
+
+        async def decode_all():
+            loop = asyncio.get_running_loop()
+            remaining = iter(paths)
+            # spawn: this process runs threads (the to_thread workers), forking it is unsafe
+            with ProcessPoolExecutor(
+                max_workers=self.args.decode_workers, mp_context=multiprocessing.get_context("spawn")
+            ) as pool:
+                async def decode_worker():
+                    for path in remaining:
+                        out_path = self.work_dir / f"{path.stem}.npy"
+                        if not out_path.exists():
+                            self.stats["decode"].begin()
+                            duration = await loop.run_in_executor(pool, decode_audio, str(path), str(out_path))
+                            self.stats["decode"].record(duration)
+                        await transcribe_queue.put(path)
+
+                # one coroutine per worker process, not one task per file
+                await asyncio.gather(*(decode_worker() for _ in range(self.args.decode_workers)))
+            await transcribe_queue.put(None)
+
+        async def transcribe_all(client: httpx.AsyncClient):
+            async def transcribe_worker():
+                while (path := await transcribe_queue.get()) is not None:
+                    await transcribe(client, path)
+                await transcribe_queue.put(None)  # for the other workers
+
+            # a file holds its decoded audio in memory, at most `stt_concurrency` at once
+            await asyncio.gather(*(transcribe_worker() for _ in range(self.args.stt_concurrency)))
+            await index_queue.put(None)
+
+        async def transcribe(client: httpx.AsyncClient, path: Path):
+            transcript_path = self.work_dir / f"{path.stem}.txt"
+            if transcript_path.exists():
+                transcript = transcript_path.read_text(encoding="utf-8")
+            else:
+                pcm = np.load(self.work_dir / f"{path.stem}.npy", mmap_mode="r")
+                window = int(self.args.stt_window * SAMPLE_RATE)
+                self.stats["stt"].begin()
+                texts = await asyncio.gather(*(
+                    self._transcribe_window(client, stt_slots, np.asarray(pcm[i:i + window]))
+                    for i in range(0, len(pcm), window)
+                ))
+                self.stats["stt"].record(len(pcm) / SAMPLE_RATE)
+                transcript = " ".join(text for text in texts if text).strip()
+                tmp = transcript_path.with_suffix(".tmp")
+                tmp.write_text(transcript, encoding="utf-8")
+                os.replace(tmp, transcript_path)
+            await index_queue.put(self._meeting_for(path, known.get(path.stem), transcript))
+
+        async def index_all():
+            while (meeting := await index_queue.get()) is not None:
+                if meeting.meeting_id in known:
+                    await self.recorder.update_meeting(meeting)
+                else:
+                    await self.recorder.add_meeting(meeting)
+                await self.index_meeting(meeting)
+            while self.pending:
+                await self.write_batch()
+
+        async with httpx.AsyncClient(timeout=self.args.stt_timeout) as client:
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(decode_all())
+                tg.create_task(transcribe_all(client))
+                tg.create_task(index_all())
+
+    async def _transcribe_window(self, client: httpx.AsyncClient, slots: asyncio.Semaphore, pcm: np.ndarray) -> str:
+        for attempt in range(self.args.stt_retries + 1):
+            async with slots:
+                try:
+                    response = await client.post(self.args.stt_url, json={"type": "audio_chunk", "pcm": pcm.tolist()})
+                    response.raise_for_status()
+                    return response.json().get("text", "")
+                except httpx.HTTPError as e:
+                    if attempt == self.args.stt_retries:
+                        raise
+                    logger.warning(f"STT request failed ({e}), retrying")
+            await asyncio.sleep(2 ** attempt)
+        return ""
+
+    @staticmethod
+    def _meeting_for(path: Path, known: Meeting | None, transcript: str) -> Meeting:
+        if known is not None:
+            return known.model_copy(update={"transcript": transcript})
+        return Meeting(
+            id=path.stem,
+            title=path.stem.replace("_", " "),
+            participants=[],
+            start_time=datetime.fromtimestamp(path.stat().st_mtime),
+            transcript=transcript,
+        )
+
+    async def run(self):
+        await self.memory.awarm_up()
+        start = time.perf_counter()
+        try:
+            if self.args.reindex:
+                await self.reindex()
+            else:
+                await self.import_audio()
+        finally:
+            await self.memory.aclose()
+            print(f"total: {time.perf_counter() - start:.1f}s")
+            for stats in self.stats.values():
+                print(stats.report())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audio-dir", help="Directory of recordings to import.")
+    parser.add_argument("--reindex", action="store_true", help="Re-embed all meetings of meetings.json.")
+    parser.add_argument("--recordings-dir", default="recordings", help="Directory of meetings.json.")
+    parser.add_argument("--work-dir", default="data/bulk_import", help="Decoded audio, transcripts and checkpoints.")
+    parser.add_argument("--stt-url", default=os.environ.get("LLM_STT_URL", "http://localhost:8001/stt"))
+    parser.add_argument("--stt-concurrency", type=int, default=8, help="STT requests in flight.")
+    parser.add_argument("--stt-window", type=float, default=10.0, help="Seconds of audio per STT request.")
+    parser.add_argument("--stt-timeout", type=float, default=60.0)
+    parser.add_argument("--stt-retries", type=int, default=3)
+    parser.add_argument("--decode-workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--batch-size", type=int, default=256, help="Chunks per embedding batch and store write.")
+    args = parser.parse_args()
+    if not args.reindex and not args.audio_dir:
+        parser.error("--audio-dir or --reindex is required")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    try:
+        asyncio.run(BulkImporter(args).run())
+    except StoreLockedError as e:
+        parser.exit(1, f"{e}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""Process pool for the CPU-bound stages: embeddings, text splitting, PCM conversion.
+
+With `CPU_POOL_WORKERS` > 0 these run in worker processes and leave the GIL of
+the server process to the event loop. Arrays go through shared memory rather
+than being pickled. With 0 (the default) everything runs in threads of the
+server process, like before.
+"""
+
+import asyncio
+import functools
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Callable
+
+import numpy as np
+
+from backend.constants import CPU_POOL_WORKERS
+
+logger = logging.getLogger(__name__)
+
+SEPARATORS = ("\n\n", ".", "?", "!", " ", "")
+
+_pool: Executor | None = None
+_pool_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return CPU_POOL_WORKERS > 0
+
+
+def get_pool() -> Executor | None:
+    """The shared process pool, created on first use, None when disabled."""
+    global _pool
+    if not enabled():
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # spawn: workers must not inherit the server's threads and sockets
+            _pool = ProcessPoolExecutor(
+                max_workers=CPU_POOL_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"Started a pool of {CPU_POOL_WORKERS} CPU worker processes")
+    return _pool
+
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+async def run(fn: Callable[..., Any], *args) -> Any:
+    """Run `fn(*args)` in the pool, or in a thread when the pool is disabled."""
+    pool = get_pool()
+    if pool is None:
+        return await asyncio.to_thread(fn, *args)
+    return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+
+
+def run_sync(fn: Callable[..., Any], *args) -> Any:
+    """Blocking `run`, for code that already runs in a worker thread."""
+    pool = get_pool()
+    if pool is None:
+        return fn(*args)
+    return pool.submit(fn, *args).result()
+
+
+# Arrays are described by (shared memory name, shape, dtype) across processes
+
+SharedArray = tuple[str, tuple[int, ...], str]
+
+
+class _Shared:
+    """Shared memory block holding an array, unlinked on exit."""
+
+    def __init__(self, shape: tuple[int, ...], dtype: np.dtype | str):
+        dtype = np.dtype(dtype)
+        size = max(1, int(np.prod(shape)) * dtype.itemsize)
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        self.array = np.ndarray(shape, dtype=dtype, buffer=self.shm.buf)
+        self.descriptor: SharedArray = (self.shm.name, tuple(shape), dtype.str)
+
+    def __enter__(self) -> "_Shared":
+        return self
+
+    def __exit__(self, *exc):
+        del self.array
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _attach(descriptor: SharedArray) -> tuple[shared_memory.SharedMemory, np.ndarray]:
+    name, shape, dtype = descriptor
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def _float_to_int16(src: SharedArray, dst: SharedArray):
+    src_shm, pcm = _attach(src)
+    dst_shm, out = _attach(dst)
+    try:
+        np.multiply(np.clip(pcm, -1.0, 1.0), 32767, out=pcm)
+        out[:] = pcm
+    finally:
+        del pcm, out
+        src_shm.close()
+        dst_shm.close()
+
+
+def _convert(frames: list[np.ndarray]) -> np.ndarray:
+    pcm = np.concatenate(frames)
+    return (np.clip(pcm, -1.0, 1.0) * 32767).astype(np.int16)
+
+
+def _stage(frames: list[np.ndarray]) -> _Shared:
+    """Concatenate frames straight into a new shared memory block."""
+    shared = _Shared((sum(len(frame) for frame in frames),) + frames[0].shape[1:], np.float32)
+    try:
+        np.concatenate(frames, out=shared.array)
+    except BaseException:
+        shared.__exit__()
+        raise
+    return shared
+
+
+async def float_to_int16(pcm: np.ndarray | list[np.ndarray]) -> np.ndarray:
+    """Convert float PCM in [-1, 1] to int16, `pcm` can be a list of frames to concatenate.
+
+    The copies in and out of shared memory run in a thread like the conversion
+    itself, none of it is done on the event loop.
+    """
+    frames = pcm if isinstance(pcm, list) else [pcm]
+    if get_pool() is None:
+        return await asyncio.to_thread(_convert, frames)
+    src = await asyncio.to_thread(_stage, frames)
+    with src, _Shared(src.array.shape, np.int16) as dst:
+        await run(_float_to_int16, src.descriptor, dst.descriptor)
+        return await asyncio.to_thread(dst.array.copy)
+
+
+@functools.lru_cache(maxsize=8)
+def _splitter(chunk_size: int, chunk_overlap: int, separators: tuple[str, ...]):
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap, separators=list(separators)
+    )
+
+
+def split_text(text: str, chunk_size: int, chunk_overlap: int, separators: tuple[str, ...] = SEPARATORS) -> list[str]:
+    """Split a transcript like the rest of the backend does, meant for `run`."""
+    return _splitter(chunk_size, chunk_overlap, separators).split_text(text)
+
+
+@functools.lru_cache(maxsize=2)
+def _sentence_transformer(model_name: str):
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(model_name)
+
+
+def _embedding_dim(model_name: str) -> int:
+    return _sentence_transformer(model_name).get_sentence_embedding_dimension()
+
+
+def _encode(model_name: str, texts: list[str], dst: SharedArray):
+    shm, out = _attach(dst)
+    try:
+        out[:] = _sentence_transformer(model_name).encode(texts, convert_to_numpy=True)
+    finally:
+        del out
+        shm.close()
+
+
+class PoolEncoder:
+    """Sentence-transformers encoder running in the pool, each worker loads the model once."""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self._dim: int | None = None
+
+    @property
+    def dim(self) -> int:
+        if self._dim is None:
+            self._dim = run_sync(_embedding_dim, self.model_name)
+        return self._dim
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        """Blocking, the (n, dim) float32 embeddings of `texts`."""
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        with _Shared((len(texts), self.dim), np.float32) as dst:
+            run_sync(_encode, self.model_name, texts, dst.descriptor)
+            return dst.array.copy()
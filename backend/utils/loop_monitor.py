@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+import numpy as np
+
+from backend.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG = REGISTRY.histogram(
+    "event_loop_lag_seconds", "Delay of the loop lag sampler wake-ups over their schedule."
+)
+SLOW_CALLBACKS = REGISTRY.counter(
+    "event_loop_slow_callbacks_total", "Callbacks that blocked the event loop over the threshold."
+)
+
+
+class LoopMonitor:
+    """Watch the event loop for blocking calls.
+
+    A sampler task sleeps for `interval` and records how late it wakes up, which is
+    how long other callbacks held the loop. A watchdog thread checks the sampler's
+    heartbeat: when the loop is stuck for more than `threshold` seconds it logs the
+    stack of the loop thread, which points at the blocking call while it runs.
+    """
+
+    def __init__(self, threshold: float = 0.1, interval: float = 0.05, window: int = 2048):
+        self.threshold = threshold
+        self.interval = interval
+        self.recent_lags: deque[float] = deque(maxlen=window)
+        self.n_slow = 0
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: int | None = None
+        self._sampler_task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopped = threading.Event()
+        for q in (50, 95, 99):
+            REGISTRY.gauge(
+                f"event_loop_lag_p{q}_seconds", f"{q}th percentile of the recent event loop lag.",
+                lambda q=q: self.percentile(q),
+            )
+
+    def start(self):
+        """Start monitoring the running loop."""
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._sampler_task = asyncio.create_task(self._sample())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stopped.set()
+        if self._sampler_task is not None:
+            self._sampler_task.cancel()
+            try:
+                await self._sampler_task
+            except asyncio.CancelledError:
+                pass
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1.0)
+
+    def percentile(self, q: float) -> float:
+        if not self.recent_lags:
+            return 0.0
+        return float(np.percentile(np.asarray(self.recent_lags), q))
+
+    async def _sample(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            LOOP_LAG.observe(lag)
+            self.recent_lags.append(lag)
+            self._heartbeat = now
+
+    def _watch(self):
+        reported = None  # heartbeat of the stall that was already logged
+        while not self._stopped.wait(self.threshold / 2):
+            heartbeat = self._heartbeat
+            stalled = time.monotonic() - heartbeat - self.interval
+            if stalled < self.threshold or heartbeat == reported:
+                continue
+            reported = heartbeat
+            self.n_slow += 1
+            SLOW_CALLBACKS.inc()
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else "<unavailable>\n"
+            logger.warning(f"Event loop blocked for more than {stalled:.3f}s, loop thread stack:\n{stack}")
@@ -0,0 +1,130 @@
+import asyncio
+import time
+import weakref
+from collections import deque
+
+import backend.openai_realtime_api_events as ora
+
+# Consecutive deltas are merged into one event
+COALESCED_EVENTS = (ora.ResponseTextDelta, ora.ChatResponseTextDeltaReady)
+# Partial transcripts and audio acks are superseded by the next ones, old ones can be dropped
+DROPPABLE_EVENTS = (ora.ConversationItemInputAudioTranscriptionDelta, ora.InputAudioBufferAck)
+# End of stream markers and errors always get through, even over the bound
+NEVER_DROPPED_EVENTS = (ora.ResponseTextDone, ora.ResponseAudioDone, ora.Error)
+
+# All live queues, for metrics
+OUTBOUND_QUEUES: "weakref.WeakSet[OutboundQueue]" = weakref.WeakSet()
+
+
+class OutboundQueue:
+    """Bounded queue of server events for one connection.
+
+    When a slow client lets the queue fill up, text deltas are coalesced, stale
+    transcript partials are dropped and other producers wait for room. `done`
+    events and errors are never dropped. The consumer reports what it sends with
+    `record_sent`, which tracks the connection's send rate.
+    """
+
+    def __init__(self, maxsize: int = 256, name: str = ""):
+        self.maxsize = maxsize
+        self.name = name
+        self._items: deque[ora.ServerEvent] = deque()
+        self._changed = asyncio.Event()
+        self.n_coalesced = 0
+        self.n_dropped = 0
+        self.max_depth = 0
+        self.n_sent = 0
+        self.bytes_sent = 0
+        self.send_seconds = 0.0
+        self.send_rate = 0.0  # bytes/s, moving average
+        self._rate_window_start = time.monotonic()
+        self._rate_window_bytes = 0
+        OUTBOUND_QUEUES.add(self)
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def empty(self) -> bool:
+        return not self._items
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def _try_put(self, event: ora.ServerEvent) -> bool:
+        if isinstance(event, COALESCED_EVENTS) and self._items and type(self._items[-1]) is type(event):
+            self._items[-1].delta += event.delta
+            self.n_coalesced += 1
+            return True
+        if len(self._items) < self.maxsize or isinstance(event, NEVER_DROPPED_EVENTS):
+            self._items.append(event)
+        elif isinstance(event, DROPPABLE_EVENTS):
+            self.n_dropped += 1
+            stale = next((e for e in self._items if isinstance(e, DROPPABLE_EVENTS)), None)
+            if stale is None:
+                return True  # the incoming partial is the stale one
+            self._items.remove(stale)
+            self._items.append(event)
+        else:
+            return False
+        self.max_depth = max(self.max_depth, len(self._items))
+        self._notify()
+        return True
+
+    def put_nowait(self, event: ora.ServerEvent) -> bool:
+        """Queue `event` if the policy allows it without waiting."""
+        return self._try_put(event)
+
+    async def put(self, event: ora.ServerEvent):
+        """Queue `event`, waiting for room if its policy requires it."""
+        while not self._try_put(event):
+            await self._changed.wait()
+
+    def get_nowait(self) -> ora.ServerEvent:
+        if not self._items:
+            raise asyncio.QueueEmpty()
+        event = self._items.popleft()
+        self._notify()
+        return event
+
+    async def get(self, timeout: float | None = None) -> ora.ServerEvent | None:
+        """Next event, or None if nothing was queued within `timeout` seconds."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._items:
+            changed = self._changed
+            if deadline is None:
+                await changed.wait()
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                return None
+        return self.get_nowait()
+
+    def record_sent(self, n_bytes: int, seconds: float):
+        """Account for an event written to the socket."""
+        self.n_sent += 1
+        self.bytes_sent += n_bytes
+        self.send_seconds += seconds
+        self._rate_window_bytes += n_bytes
+        now = time.monotonic()
+        elapsed = now - self._rate_window_start
+        if elapsed >= 1.0:
+            rate = self._rate_window_bytes / elapsed
+            self.send_rate = rate if self.send_rate == 0 else 0.8 * self.send_rate + 0.2 * rate
+            self._rate_window_start = now
+            self._rate_window_bytes = 0
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "depth": len(self._items),
+            "max_depth": self.max_depth,
+            "coalesced": self.n_coalesced,
+            "dropped": self.n_dropped,
+            "sent": self.n_sent,
+            "bytes_sent": self.bytes_sent,
+            "send_rate": self.send_rate,
+        }
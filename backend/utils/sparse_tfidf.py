@@ -0,0 +1,138 @@
+import math
+import threading
+from collections import Counter
+
+import numpy as np
+
+from backend.services.lexical_index import tokenize
+
+
+def _reserve(array: np.ndarray, size: int) -> np.ndarray:
+    """`array`, or a copy with room for `size` elements, at least twice as large."""
+    if size <= len(array):
+        return array
+    grown = np.zeros(max(size, 2 * len(array)), dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class SparseTfidfIndex:
+    """TF-IDF cosine search over a vocabulary-indexed sparse matrix, numpy only.
+
+    Documents are rows of a CSR matrix of raw term counts (`indptr`, `indices`,
+    `data`), appended as they are added. The arrays have spare capacity that
+    doubles when full, so that appending rows copies the matrix only
+    O(log n) times. IDF weights and row norms depend on the whole collection,
+    they are recomputed lazily on the first search after an add. Only added
+    documents grow the vocabulary, query terms never do.
+    """
+
+    def __init__(self):
+        self.vocabulary: dict[str, int] = {}
+        self.doc_ids: list[str] = []
+        self._lock = threading.Lock()
+        # rows added since the last consolidation into the numpy arrays
+        self._pending_indices: list[int] = []
+        self._pending_data: list[float] = []
+        self._pending_lengths: list[int] = []
+        # CSR buffers, valid up to `_n_rows` rows and `_nnz` non-zeros
+        self._n_rows = 0
+        self._nnz = 0
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._indices = np.zeros(0, dtype=np.int32)
+        self._data = np.zeros(0, dtype=np.float32)
+        self._row_of = np.zeros(0, dtype=np.int64)  # row of every non-zero
+        self._df = np.zeros(0, dtype=np.int64)
+        # derived from the above, None when stale
+        self._idf: np.ndarray | None = None
+        self._norms: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    @property
+    def indptr(self) -> np.ndarray:
+        return self._indptr[:self._n_rows + 1]
+
+    @property
+    def indices(self) -> np.ndarray:
+        return self._indices[:self._nnz]
+
+    @property
+    def data(self) -> np.ndarray:
+        return self._data[:self._nnz]
+
+    @property
+    def df(self) -> np.ndarray:
+        return self._df[:len(self.vocabulary)]
+
+    def add(self, doc_id: str, text: str):
+        counts = Counter(tokenize(text))
+        with self._lock:
+            columns = []
+            for term in counts:
+                column = self.vocabulary.get(term)
+                if column is None:
+                    column = self.vocabulary[term] = len(self.vocabulary)
+                columns.append(column)
+            self.doc_ids.append(doc_id)
+            self._pending_indices.extend(columns)
+            self._pending_data.extend(counts.values())
+            self._pending_lengths.append(len(columns))
+            self._idf = self._norms = None
+
+    def _consolidate(self):
+        """Append the pending rows to the CSR arrays and refresh the derived arrays."""
+        if self._pending_lengths:
+            new_indices = np.asarray(self._pending_indices, dtype=np.int32)
+            lengths = np.asarray(self._pending_lengths, dtype=np.int64)
+            n_rows, nnz = self._n_rows + len(lengths), self._nnz + len(new_indices)
+            self._indptr = _reserve(self._indptr, n_rows + 1)
+            self._indices = _reserve(self._indices, nnz)
+            self._data = _reserve(self._data, nnz)
+            self._row_of = _reserve(self._row_of, nnz)
+            self._df = _reserve(self._df, len(self.vocabulary))
+
+            self._indptr[self._n_rows + 1:n_rows + 1] = self._nnz + np.cumsum(lengths)
+            self._indices[self._nnz:nnz] = new_indices
+            self._data[self._nnz:nnz] = self._pending_data
+            self._row_of[self._nnz:nnz] = np.repeat(np.arange(self._n_rows, n_rows, dtype=np.int64), lengths)
+            np.add.at(self._df, new_indices, 1)
+            self._n_rows, self._nnz = n_rows, nnz
+            self._pending_indices, self._pending_data, self._pending_lengths = [], [], []
+
+        if self._norms is None:
+            n_docs = self._n_rows
+            # smoothed idf, every term of the vocabulary is in at least one document
+            self._idf = (np.log((1 + n_docs) / (1 + self.df)) + 1).astype(np.float32)
+            weights = self.data * self._idf[self.indices]
+            self._norms = np.sqrt(np.bincount(self._row_of[:self._nnz], weights=weights * weights, minlength=n_docs))
+
+    def search(self, query: str, k: int = 3) -> list[tuple[str, float]]:
+        """Ids and cosine similarities of the `k` best matching documents with a positive score."""
+        if k <= 0:
+            return []
+        counts = Counter(tokenize(query))
+        with self._lock:
+            self._consolidate()
+            # views of the filled part, later adds write past it or into new buffers
+            rows, idf, norms = self._row_of[:self._nnz], self._idf, self._norms
+            indices, data, doc_ids = self.indices, self.data, self.doc_ids[:self._n_rows]
+            terms = {self.vocabulary[t]: n for t, n in counts.items() if t in self.vocabulary}
+        if not terms:
+            return []
+
+        query_weights = np.zeros(len(idf), dtype=np.float32)
+        columns = np.fromiter(terms.keys(), dtype=np.int64, count=len(terms))
+        query_weights[columns] = np.fromiter(terms.values(), dtype=np.float32, count=len(terms)) * idf[columns]
+        query_norm = float(np.linalg.norm(query_weights[columns]))
+
+        # dot products of every row with the query, one pass over the non-zeros
+        contributions = data * idf[indices] * query_weights[indices]
+        scores = np.bincount(rows, weights=contributions, minlength=len(doc_ids))
+        scores /= np.maximum(norms, 1e-12) * query_norm
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(doc_ids[i], float(scores[i])) for i in top if scores[i] > 0 and not math.isnan(scores[i])]
@@ -0,0 +1,77 @@
+import logging
+import threading
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# rough average for English text with BPE tokenizers
+CHARS_PER_TOKEN = 4
+# role markers and separators added by chat templates
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+# name -> tokenizer, None when it could not be loaded
+_tokenizers: dict[str, Any] = {}
+_loading: set[str] = set()
+_lock = threading.Lock()
+
+
+def _load_tokenizer(name: str):
+    try:
+        from transformers import AutoTokenizer
+
+        return AutoTokenizer.from_pretrained(name)
+    except Exception as e:
+        logger.info(f"No tokenizer for {name}, estimating token counts: {e}")
+        return None
+
+
+def _load_in_background(name: str):
+    tokenizer = _load_tokenizer(name)
+    with _lock:
+        _tokenizers[name] = tokenizer
+        _loading.discard(name)
+
+
+def preload_tokenizer(name: str):
+    """Start loading a tokenizer in a background thread, it may be a Hub download."""
+    with _lock:
+        if name in _tokenizers or name in _loading:
+            return
+        _loading.add(name)
+    threading.Thread(target=_load_in_background, args=(name,), name=f"tokenizer-{name}", daemon=True).start()
+
+
+class TokenCounter:
+    """Count tokens with the served model's tokenizer, or estimate them.
+
+    The tokenizer is loaded with `transformers` when it is installed and the model
+    name is known, otherwise counts are estimated from the text length. Loading
+    happens in the background, counts are estimated until it is done.
+    """
+
+    def __init__(self, tokenizer_name: str | None = None):
+        self.tokenizer_name = tokenizer_name
+        if tokenizer_name:
+            preload_tokenizer(tokenizer_name)
+
+    @property
+    def tokenizer(self):
+        return _tokenizers.get(self.tokenizer_name) if self.tokenizer_name else None
+
+    def count(self, text: str) -> int:
+        if self.tokenizer is not None:
+            return len(self.tokenizer.encode(text, add_special_tokens=False))
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+    def count_message(self, message: dict) -> int:
+        return self.count(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Keep the beginning of `text` that fits in `max_tokens`."""
+        if self.count(text) <= max_tokens:
+            return text
+        if self.tokenizer is not None:
+            ids = self.tokenizer.encode(text, add_special_tokens=False)[:max_tokens]
+            return self.tokenizer.decode(ids)
+        return text[:max_tokens * CHARS_PER_TOKEN]
@@ -1,9 +1,15 @@
-from openai import AsyncOpenAI
+from typing import TYPE_CHECKING
 from backend.constants import LLM_SERVER, LLM_API_KEY
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
 class WebSocketClosedError(Exception):
     """Remote web socket is closed, cannot send or receive data."""
 
 def get_openai_client(
-        server_url: str = LLM_SERVER, api_key: str | None = LLM_API_KEY) -> AsyncOpenAI:
+        server_url: str = LLM_SERVER, api_key: str | None = LLM_API_KEY) -> "AsyncOpenAI":
     """Create an OpenAI client with the given API key and base URL."""
-    return AsyncOpenAI(api_key=api_key or "EMPTY", base_url=server_url + "v1")
\ No newline at end of file
+    from openai import AsyncOpenAI  # imported on first use, it is slow to import
+
+    return AsyncOpenAI(api_key=api_key or "EMPTY", base_url=server_url + "v1")
@@ -0,0 +1,50 @@
+"""Micro-benchmark of streaming deltas into the chat history.
+
+Compares the previous `content += delta` accumulation with `ChatMessage`, for
+responses of increasing length.
+
+    python -m benchmarks.bench_chat_deltas
+"""
+
+import argparse
+import asyncio
+import time
+
+from backend.models.chatbot import Chatbot
+
+
+def bench_concat(deltas: list[str]) -> float:
+    message = {"role": "assistant", "content": ""}
+    history = [message]
+    start = time.perf_counter()
+    for delta in deltas:
+        # what the chat history used to do for every streamed token
+        history[-1]["content"] += delta
+    return time.perf_counter() - start
+
+
+async def bench_chatbot(deltas: list[str]) -> float:
+    chatbot = Chatbot()
+    await chatbot.add_chat_message_delta("user", "question")
+    start = time.perf_counter()
+    for delta in deltas:
+        await chatbot.add_chat_message_delta("assistant", delta)
+    chatbot.complete_message()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    args = parser.parse_args()
+
+    print(f"{'deltas':>10} {'concat (ms)':>12} {'ChatMessage (ms)':>17}")
+    for n in args.lengths:
+        deltas = [" token"] * n
+        concat = bench_concat(deltas)
+        chatbot = asyncio.run(bench_chatbot(deltas))
+        print(f"{n:>10} {concat * 1e3:>12.2f} {chatbot * 1e3:>17.2f}")
+
+
+if __name__ == "__main__":
+    main()
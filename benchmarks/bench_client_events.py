@@ -0,0 +1,58 @@
+"""Benchmark of client event parsing and server event creation, per core.
+
+Compares the full `ClientEvent` validation with the audio append fast path,
+and `random_id` with `monotonic_id` for server event ids.
+
+    python -m benchmarks.bench_client_events
+"""
+
+import argparse
+import base64
+import json
+import os
+import time
+from typing import Annotated, Callable
+
+from pydantic import Field, TypeAdapter
+
+import backend.openai_realtime_api_events as ora
+
+# same adapter as `backend.app`, without importing the whole server
+ClientEventAdapter = TypeAdapter(
+    Annotated[ora.ClientEvent, Field(discriminator="type")]
+)
+
+
+def events_per_second(fn: Callable[[], object], n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return n / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=100_000, help="events per measurement")
+    parser.add_argument("--page-bytes", type=int, default=160, help="size of an Opus page")
+    args = parser.parse_args()
+
+    # what the frontend sends for every Opus page
+    message = json.dumps(
+        {"type": "input_audio_buffer.append", "audio": base64.b64encode(os.urandom(args.page_bytes)).decode()},
+        separators=(",", ":"),
+    )
+    assert ora.parse_audio_append(message)[0] == ClientEventAdapter.validate_json(message).audio
+
+    results = {
+        "append: full validation": events_per_second(lambda: ClientEventAdapter.validate_json(message), args.n),
+        "append: fast path": events_per_second(lambda: ora.parse_audio_append(message), args.n),
+        "id: random_id": events_per_second(lambda: ora.random_id("event"), args.n),
+        "id: monotonic_id": events_per_second(lambda: ora.monotonic_id("event"), args.n),
+        "server event: ResponseTextDelta": events_per_second(lambda: ora.ResponseTextDelta(delta=" token"), args.n),
+    }
+    for name, rate in results.items():
+        print(f"{name:<36} {rate:>14,.0f} events/s/core")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Micro-benchmark of the legacy note search of `backend/app_2.py`.
+
+Compares the previous cosine similarity over `Counter` objects, computed note by
+note in Python, with `SparseTfidfIndex`, for collections of increasing size.
+
+    python -m benchmarks.bench_note_search
+"""
+
+import argparse
+import math
+import random
+import re
+import time
+from collections import Counter
+
+from backend.utils.sparse_tfidf import SparseTfidfIndex
+
+WORDS = [f"word{i}" for i in range(5000)]
+
+
+def make_notes(n: int, length: int = 300) -> list[str]:
+    rng = random.Random(0)
+    # Zipf-like word distribution, like real transcripts
+    weights = [1 / (i + 1) for i in range(len(WORDS))]
+    return [" ".join(rng.choices(WORDS, weights, k=length)) for _ in range(n)]
+
+
+def counter_search(vectors: list[Counter], query: str, k: int) -> list[int]:
+    """What `vector_search` used to do for every query."""
+    query_vector = Counter(re.findall(r"\b\w+\b", query.lower()))
+    scores = []
+    for i, vector in enumerate(vectors):
+        dot = sum(query_vector[t] * vector[t] for t in set(query_vector) & set(vector))
+        norms = math.sqrt(sum(v * v for v in query_vector.values())) * math.sqrt(sum(v * v for v in vector.values()))
+        scores.append((dot / norms if norms else 0, i))
+    scores.sort(reverse=True)
+    return [i for score, i in scores[:k] if score > 0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1_000, 10_000])
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    queries = [" ".join(rng.choices(WORDS[:500], k=8)) for _ in range(args.queries)]
+    print(f"{'notes':>8} {'Counter (ms/query)':>19} {'sparse (ms/query)':>18} {'index build (ms)':>17}")
+    for n in args.sizes:
+        notes = make_notes(n)
+        vectors = [Counter(re.findall(r"\b\w+\b", note.lower())) for note in notes]
+        start = time.perf_counter()
+        for query in queries:
+            counter_search(vectors, query, 3)
+        counter = (time.perf_counter() - start) / len(queries)
+
+        start = time.perf_counter()
+        index = SparseTfidfIndex()
+        for i, note in enumerate(notes):
+            index.add(str(i), note)
+        index.search(queries[0], 3)  # builds the arrays
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for query in queries:
+            index.search(query, 3)
+        sparse = (time.perf_counter() - start) / len(queries)
+        print(f"{n:>8} {counter * 1e3:>19.2f} {sparse * 1e3:>18.2f} {build * 1e3:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Benchmark of the backend cold start.
+
+Imports `backend.app` in a fresh interpreter with `-X importtime` and reports the
+total import time and the slowest modules. With `--serve`, also starts uvicorn
+and reports how long the server takes to answer `/ready` at all (accepting
+traffic) and to report ready (embedding model and vector store warm).
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --serve --port 8010
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+
+import httpx
+
+
+def import_times(module: str) -> list[tuple[str, int, int]]:
+    """(module, self us, cumulative us) of every import, from `-X importtime`."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+    times = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times.append((name.strip(), int(self_us), int(cumulative_us)))
+    return times
+
+
+def bench_imports(module: str, repeat: int, top: int):
+    totals = []
+    for _ in range(repeat):
+        times = import_times(module)
+        totals.append(next(cumulative for name, _, cumulative in times if name == module))
+    print(f"import {module}: best {min(totals) / 1000:.0f}ms, worst {max(totals) / 1000:.0f}ms over {repeat} runs")
+
+    top_level = {}
+    for name, _, cumulative in times:
+        root = name.split(".")[0]
+        top_level[root] = max(top_level.get(root, 0), cumulative)
+    print("slowest top-level packages:")
+    for root, cumulative in sorted(top_level.items(), key=lambda x: -x[1])[:top]:
+        print(f"  {cumulative / 1000:8.1f}ms  {root}")
+
+
+def bench_serve(port: int, timeout: float):
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.app:app", "--port", str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    accepting = None
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                response = httpx.get(f"http://127.0.0.1:{port}/ready", timeout=1.0)
+            except httpx.HTTPError:
+                time.sleep(0.05)
+                continue
+            if accepting is None:
+                accepting = time.perf_counter() - start
+                print(f"accepting traffic after {accepting:.2f}s")
+            if response.status_code == 200:
+                print(f"ready after {time.perf_counter() - start:.2f}s")
+                return
+            if response.json().get("status") == "failed":
+                print(f"warm-up failed: {response.json().get('error')}")
+                return
+            time.sleep(0.1)
+        print(f"not ready after {timeout:.0f}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="backend.app")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--serve", action="store_true", help="Also time uvicorn until /ready.")
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    args = parser.parse_args()
+
+    bench_imports(args.module, args.repeat, args.top)
+    if args.serve:
+        bench_serve(args.port, args.timeout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""Replay Ogg/Opus recordings through `/v1/realtime` over concurrent WebSockets.
+
+Every session sends the Ogg pages of a recording like the browser does, paced at
+`--speed` times real time (0 sends as fast as possible), asks a chat question
+halfway through and finalizes the meeting. Reports ingest throughput, transcript
+lag and LLM time to first token from the server's `/metrics`, chat time to
+first token as seen by the client, and the memory used per session.
+
+Offline setup, with the stand-ins of this directory:
+
+    python -m benchmarks.replay.fake_stt --port 8001 &
+    python -m benchmarks.replay.fake_llm --port 8002 &
+    LLM_STT_URL=http://localhost:8001/stt LLM_SERVER=http://localhost:8002/ \\
+        uvicorn backend.app:app --port 8000 --ws-per-message-deflate=false &
+    python -m benchmarks.replay.driver --sessions 8 --audio meeting.ogg
+
+Without `--audio`, a synthetic recording of `--synthetic-seconds` is used.
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import math
+import statistics
+import time
+import uuid
+from datetime import datetime, timezone
+
+import httpx
+import numpy as np
+import websockets
+
+OGG_SAMPLE_RATE = 48000  # Opus granule positions are always at 48kHz
+
+
+def split_ogg_pages(data: bytes) -> list[bytes]:
+    """Split an Ogg stream into its pages."""
+    pages = []
+    pos = 0
+    while pos + 27 <= len(data):
+        if data[pos:pos + 4] != b"OggS":
+            raise ValueError(f"Not an Ogg page at offset {pos}")
+        n_segments = data[pos + 26]
+        body_size = sum(data[pos + 27:pos + 27 + n_segments])
+        end = pos + 27 + n_segments + body_size
+        pages.append(data[pos:end])
+        pos = end
+    return pages
+
+
+def granule_seconds(page: bytes) -> float | None:
+    """Audio time at the end of the page, None for pages without a finished packet."""
+    granule = int.from_bytes(page[6:14], "little", signed=True)
+    return granule / OGG_SAMPLE_RATE if granule >= 0 else None
+
+
+def synthetic_recording(seconds: float, sample_rate: int = 24000) -> bytes:
+    """Ogg/Opus stream of a tone with pauses, encoded like the browser recorder does."""
+    import sphn
+
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    pcm = (0.1 * np.sin(2 * np.pi * 220 * t) * (np.sin(2 * np.pi * 0.5 * t) > 0)).astype(np.float32)
+    writer = sphn.OpusStreamWriter(sample_rate)
+    frame = sample_rate // 50
+    return b"".join(writer.append_pcm(pcm[i:i + frame]) or b"" for i in range(0, len(pcm), frame))
+
+
+def parse_metrics(text: str) -> dict[str, float]:
+    """Samples of a Prometheus text exposition, keyed by name and labels."""
+    samples = {}
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        name, _, value = line.rpartition(" ")
+        try:
+            samples[name] = float(value)
+        except ValueError:
+            continue
+    return samples
+
+
+def histogram_delta(before: dict[str, float], after: dict[str, float], name: str) -> dict[str, float]:
+    """Count, mean and quantiles of what a histogram observed between two scrapes.
+
+    Quantiles are the upper bound of the bucket they fall in.
+    """
+    prefix = f'{name}_bucket{{le="'
+    buckets = []
+    for key, value in after.items():
+        if key.startswith(prefix):
+            bound = key[len(prefix):-2]
+            buckets.append((math.inf if bound == "+Inf" else float(bound), value - before.get(key, 0.0)))
+    buckets.sort()
+    count = after.get(f"{name}_count", 0.0) - before.get(f"{name}_count", 0.0)
+    total = after.get(f"{name}_sum", 0.0) - before.get(f"{name}_sum", 0.0)
+    result = {"count": count, "mean": total / count if count else 0.0}
+    for q in (0.5, 0.95, 0.99):
+        result[f"p{int(q * 100)}"] = next((bound for bound, n in buckets if n >= q * count), 0.0) if count else 0.0
+    return result
+
+
+class SessionResult:
+    def __init__(self):
+        self.pages_sent = 0
+        self.bytes_sent = 0
+        self.audio_seconds = 0.0
+        self.send_seconds = 0.0
+        self.chat_ttft: float | None = None
+        self.chat_seconds: float | None = None
+        self.error: str | None = None
+
+
+async def run_session(index: int, url: str, pages: list[bytes], args, result: SessionResult):
+    query_done = asyncio.Event()
+    query_sent_at = None
+
+    async def receive(ws):
+        async for raw in ws:
+            message = json.loads(raw)
+            if message["type"] == "response.text.delta" and query_sent_at is not None and result.chat_ttft is None:
+                result.chat_ttft = time.perf_counter() - query_sent_at
+            elif message["type"] == "response.text.done" and query_sent_at is not None:
+                result.chat_seconds = time.perf_counter() - query_sent_at
+                query_done.set()
+            elif message["type"] == "error":
+                print(f"session {index}: {message}")
+
+    try:
+        async with websockets.connect(url, subprotocols=["realtime"], max_size=None) as ws:
+            json.loads(await ws.recv())  # session.resumable
+            receiver = asyncio.create_task(receive(ws))
+            await ws.send(json.dumps({
+                "type": "input_audio_buffer.start",
+                "meeting": {
+                    "id": str(uuid.uuid4()),
+                    "title": f"Replay {index}",
+                    "participants": ["Alice", "Bob"],
+                    "transcript": "",
+                    "start_time": datetime.now(timezone.utc).isoformat(),
+                },
+            }, separators=(",", ":")))
+
+            start = time.perf_counter()
+            query_page = len(pages) // 2
+            for seq, page in enumerate(pages):
+                audio_time = granule_seconds(page)
+                if args.speed > 0 and audio_time is not None:
+                    delay = start + audio_time / args.speed - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                await ws.send(json.dumps({
+                    "type": "input_audio_buffer.append",
+                    "audio": base64.b64encode(page).decode("ascii"),
+                    "seq": seq,
+                }, separators=(",", ":")))
+                result.pages_sent += 1
+                result.bytes_sent += len(page)
+                if audio_time is not None:
+                    result.audio_seconds = audio_time
+                if seq == query_page and args.query:
+                    query_sent_at = time.perf_counter()
+                    await ws.send(json.dumps({"type": "input_chat.query", "query": args.query}, separators=(",", ":")))
+            result.send_seconds = time.perf_counter() - start
+
+            if query_sent_at is not None:
+                try:
+                    await asyncio.wait_for(query_done.wait(), timeout=args.chat_timeout)
+                except asyncio.TimeoutError:
+                    print(f"session {index}: no chat answer after {args.chat_timeout}s")
+            await ws.send(json.dumps({"type": "input_audio_buffer.finalize"}, separators=(",", ":")))
+            await asyncio.sleep(args.linger)
+            receiver.cancel()
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+
+
+async def watch_rss(metrics_url: str, client: httpx.AsyncClient, peak: list[float], stop: asyncio.Event):
+    while not stop.is_set():
+        try:
+            samples = parse_metrics((await client.get(metrics_url)).text)
+            peak[0] = max(peak[0], samples.get("process_resident_memory_bytes", 0.0))
+        except httpx.HTTPError:
+            pass
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=0.5)
+        except asyncio.TimeoutError:
+            pass
+
+
+def _fmt(values: list[float]) -> str:
+    if not values:
+        return "n/a"
+    values = sorted(values)
+    p95 = values[min(len(values) - 1, int(0.95 * len(values)))]
+    return f"p50 {statistics.median(values) * 1000:.0f}ms, p95 {p95 * 1000:.0f}ms, max {values[-1] * 1000:.0f}ms"
+
+
+async def main_async(args):
+    if args.audio:
+        recordings = []
+        for path in args.audio:
+            with open(path, "rb") as f:
+                recordings.append(split_ogg_pages(f.read()))
+    else:
+        recordings = [split_ogg_pages(synthetic_recording(args.synthetic_seconds))]
+
+    ws_url = args.server.replace("http", "ws", 1).rstrip("/") + "/v1/realtime"
+    metrics_url = args.server.rstrip("/") + "/metrics"
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        before = parse_metrics((await client.get(metrics_url)).text)
+        rss_before = before.get("process_resident_memory_bytes", 0.0)
+        peak = [rss_before]
+        stop = asyncio.Event()
+        watcher = asyncio.create_task(watch_rss(metrics_url, client, peak, stop))
+
+        results = [SessionResult() for _ in range(args.sessions)]
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            run_session(i, ws_url, recordings[i % len(recordings)], args, results[i])
+            for i in range(args.sessions)
+        ))
+        wall = time.perf_counter() - start
+        stop.set()
+        await watcher
+        # transcripts of the tail of the audio land after the sockets are closed
+        await asyncio.sleep(args.settle)
+        after = parse_metrics((await client.get(metrics_url)).text)
+
+    failed = [r for r in results if r.error]
+    for r in failed:
+        print(f"failed session: {r.error}")
+    ok = [r for r in results if not r.error]
+    audio_seconds = sum(r.audio_seconds for r in ok)
+    send_seconds = max((r.send_seconds for r in ok), default=0.0) or wall
+    lag = histogram_delta(before, after, "stt_realtime_lag_seconds")
+    llm_ttft = histogram_delta(before, after, "llm_time_to_first_token_seconds")
+    decode = histogram_delta(before, after, "opus_decode_seconds")
+
+    print(f"sessions: {len(ok)}/{args.sessions} ok, wall time {wall:.1f}s")
+    print(f"ingest: {sum(r.pages_sent for r in ok) / send_seconds:.0f} pages/s, "
+          f"{sum(r.bytes_sent for r in ok) / send_seconds / 1024:.1f} KiB/s, "
+          f"{audio_seconds / send_seconds:.1f}x real time in total")
+    print(f"opus decode: mean {decode['mean'] * 1000:.2f}ms, p95 <= {decode['p95'] * 1000:.1f}ms "
+          f"over {decode['count']:.0f} pages")
+    print(f"transcript lag: mean {lag['mean']:.2f}s, p50 <= {lag['p50']}s, p95 <= {lag['p95']}s "
+          f"over {lag['count']:.0f} segments")
+    print(f"chat ttft (client): {_fmt([r.chat_ttft for r in ok if r.chat_ttft is not None])}")
+    print(f"chat answer time (client): {_fmt([r.chat_seconds for r in ok if r.chat_seconds is not None])}")
+    print(f"llm ttft (server): mean {llm_ttft['mean'] * 1000:.0f}ms, p95 <= {llm_ttft['p95'] * 1000:.0f}ms")
+    print(f"memory: {rss_before / 2**20:.0f} MiB before, {peak[0] / 2**20:.0f} MiB peak, "
+          f"{(peak[0] - rss_before) / max(len(ok), 1) / 2**20:.1f} MiB per session")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--server", default="http://localhost:8000", help="Backend base URL, without /api.")
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--audio", nargs="*", help="Ogg/Opus recordings, assigned to sessions round-robin.")
+    parser.add_argument("--synthetic-seconds", type=float, default=60.0)
+    parser.add_argument("--speed", type=float, default=1.0, help="Multiple of real time, 0 for no pacing.")
+    parser.add_argument("--query", default="What did the meeting decide about the release?",
+                        help="Chat question asked halfway through, empty to skip.")
+    parser.add_argument("--chat-timeout", type=float, default=60.0)
+    parser.add_argument("--linger", type=float, default=1.0, help="Seconds to keep the socket open after finalize.")
+    parser.add_argument("--settle", type=float, default=2.0, help="Seconds to wait before the last scrape.")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Local OpenAI-compatible stand-in for the LLM server, for offline benchmarks.
+
+Serves `/v1/models` with a single model and streams `/v1/chat/completions` as
+server-sent events, `--tokens` tokens at `--tokens-per-second` after a time to
+first token of `--ttft` seconds.
+
+    python -m benchmarks.replay.fake_llm --port 8002 --tokens-per-second 50
+    LLM_SERVER=http://localhost:8002/ uvicorn backend.app:app
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+MODEL = "fake-pleias"
+TOKENS = "According to the meeting notes the team decided to ship the release next week".split()
+
+
+def _chunk(completion_id: str, created: int, delta: dict, finish_reason: str | None = None) -> str:
+    chunk = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": created,
+        "model": MODEL,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(chunk)}\n\n"
+
+
+def make_app(ttft: float, tokens_per_second: float, n_tokens: int) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": MODEL, "object": "model", "created": 0, "owned_by": "benchmark"}]}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        tokens = [TOKENS[i % len(TOKENS)] + " " for i in range(n_tokens)]
+
+        if not body.get("stream"):
+            await asyncio.sleep(ttft + n_tokens / tokens_per_second)
+            return JSONResponse({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": MODEL,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(tokens)},
+                    "finish_reason": "stop",
+                }],
+            })
+
+        async def events():
+            await asyncio.sleep(ttft)
+            yield _chunk(completion_id, created, {"role": "assistant", "content": ""})
+            start = time.perf_counter()
+            for i, token in enumerate(tokens):
+                # paced against the start so that slow writes don't lower the rate
+                delay = start + i / tokens_per_second - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                yield _chunk(completion_id, created, {"content": token})
+            yield _chunk(completion_id, created, {}, finish_reason="stop")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--ttft", type=float, default=0.3, help="Time to first token, in seconds.")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--tokens", type=int, default=120, help="Tokens per answer.")
+    args = parser.parse_args()
+    app = make_app(args.ttft, args.tokens_per_second, args.tokens)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Local stand-in for the STT backend, for offline benchmarks.
+
+Speaks the `/stt` protocol of `SpeechToText`: a POST of
+`{"type": "audio_chunk", "pcm": [...]}` answered with `{"text": ...}`, one word
+per `--words-per-second` of audio, after `--latency` seconds plus
+`--latency-per-second` per second of audio.
+
+    python -m benchmarks.replay.fake_stt --port 8001 --latency 0.2
+    LLM_STT_URL=http://localhost:8001/stt uvicorn backend.app:app
+"""
+
+import argparse
+import asyncio
+import itertools
+
+import uvicorn
+from fastapi import FastAPI, Request
+
+SAMPLE_RATE = 24000
+WORDS = "the meeting agreed to ship the release next week and review the budget".split()
+
+
+def make_app(latency: float, latency_per_second: float, words_per_second: float) -> FastAPI:
+    app = FastAPI()
+    words = itertools.cycle(WORDS)
+
+    @app.post("/stt")
+    async def stt(request: Request):
+        payload = await request.json()
+        duration = len(payload.get("pcm", [])) / SAMPLE_RATE
+        await asyncio.sleep(latency + latency_per_second * duration)
+        n_words = max(1, round(duration * words_per_second))
+        return {"text": " ".join(next(words) for _ in range(n_words))}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.2, help="Fixed latency per request, in seconds.")
+    parser.add_argument("--latency-per-second", type=float, default=0.05,
+                        help="Extra latency per second of audio, in seconds.")
+    parser.add_argument("--words-per-second", type=float, default=2.5)
+    args = parser.parse_args()
+    app = make_app(args.latency, args.latency_per_second, args.words_per_second)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
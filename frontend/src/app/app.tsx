@@ -1,5 +1,5 @@
 "use client";
-import useWebSocket from "react-use-websocket";
+import useWebSocket, { ReadyState } from "react-use-websocket";
 import React, { useState, useEffect, useRef, useCallback } from 'react';
 import { BookOpen } from 'lucide-react';
 import { useAudioProcessor as useAudioProcessor } from "./useAudioProcessor";
@@ -35,7 +35,7 @@ const App = () => {
 
 
     //recording state
-    const { microphoneAccess, askMicrophoneAccess } = useMicrophoneAccess();
+    const { microphoneAccess, askMicrophoneAccess, mediaStream } = useMicrophoneAccess();
     const [shouldConnect, setShouldConnect] = useState(false);
 
     const backendServerUrl = useBackendServerUrl();
@@ -49,21 +49,56 @@ const App = () => {
         setAppState('ready');
     }, [backendServerUrl]);
 
+    // Session resumption: the server keeps our pipeline for a while after a
+    // disconnect, audio it has not acknowledged yet is replayed on reconnect.
+    const sessionTokenRef = useRef<string | null>(null);
+    const audioSeqRef = useRef(0);
+    const unackedAudioRef = useRef<{ seq: number; message: string }[]>([]);
+    // Pages go out live only once `session.resumable` has replayed the unacked
+    // ones on the current socket, the server drops seqs lower than the last one
+    const audioLiveRef = useRef(false);
+    const currentMeetingRef = useRef(currentMeeting);
+    currentMeetingRef.current = currentMeeting;
+
+    const getSocketUrl = useCallback(async () => {
+        if (!webSocketUrl) return "";
+        const token = sessionTokenRef.current;
+        return token
+            ? `${webSocketUrl}?session_token=${encodeURIComponent(token)}`
+            : webSocketUrl;
+    }, [webSocketUrl]);
+
     const { sendMessage, lastMessage, readyState } = useWebSocket(
-        webSocketUrl || null,
+        webSocketUrl ? getSocketUrl : null,
         {
         protocols: ["realtime"],
+        shouldReconnect: () => true,
+        reconnectAttempts: 20,
+        reconnectInterval: (attempt: number) => Math.min(500 * 2 ** attempt, 5000),
         },
         true//shouldConnect
     );
+
+    useEffect(() => {
+        if (readyState !== ReadyState.OPEN) {
+            audioLiveRef.current = false;
+        }
+    }, [readyState]);
+
     const onOpusRecorded = useCallback(
         (opus: Uint8Array) => {
-        sendMessage(
-            JSON.stringify({
+        const seq = audioSeqRef.current++;
+        const message = JSON.stringify({
             type: "input_audio_buffer.append",
             audio: base64EncodeOpus(opus),
-            })
-        );
+            seq: seq,
+        });
+        unackedAudioRef.current.push({ seq, message });
+        if (audioLiveRef.current) {
+            // not queued by react-use-websocket while the socket is down,
+            // the page is replayed in order after `session.resumable`
+            sendMessage(message, false);
+        }
         },
         [sendMessage]
     );
@@ -97,6 +132,23 @@ const App = () => {
     const { setupAudio, shutdownAudio, audioProcessor } =
         useAudioProcessor(onOpusRecorded);
     
+    // A new server session needs the meeting again, and a new Ogg stream: its
+    // decoder waits for the first page of a stream.
+    const restartRecording = async (stream: MediaStream) => {
+        await shutdownAudio();
+        unackedAudioRef.current = [];
+        audioSeqRef.current = 0;
+        audioLiveRef.current = true;
+        sendMessage(
+            JSON.stringify({
+            type: "input_audio_buffer.start",
+            meeting: currentMeetingRef.current,
+            }),
+            false
+        );
+        await setupAudio(stream);
+    };
+
     const onConnectButtonPress = async () => {
         if (!currentMeeting.title || currentMeeting.participants.length === 0) {
             alert("Please enter a meeting title and at least one participant.");
@@ -143,7 +195,34 @@ const App = () => {
             const messageData = JSON.parse(lastMessage.data);
             
             console.log("Received message:", messageData);
-            if (messageData.type === "response.text.delta") {
+            if (messageData.type === "session.resumable") {
+                sessionTokenRef.current = messageData.session_token;
+                if (!messageData.resumed) {
+                    // The server lost our session, the new one starts from scratch
+                    if (audioProcessor.current && mediaStream.current) {
+                        restartRecording(mediaStream.current);
+                    } else {
+                        unackedAudioRef.current = [];
+                        audioSeqRef.current = 0;
+                        audioLiveRef.current = true;
+                    }
+                    return;
+                }
+                unackedAudioRef.current = unackedAudioRef.current.filter(
+                    (packet) => packet.seq > messageData.last_audio_seq
+                );
+                // in seq order, before any page recorded from now on
+                for (const packet of unackedAudioRef.current) {
+                    sendMessage(packet.message, false);
+                }
+                audioLiveRef.current = true;
+            }
+            else if (messageData.type === "input_audio_buffer.ack") {
+                unackedAudioRef.current = unackedAudioRef.current.filter(
+                    (packet) => packet.seq > messageData.seq
+                );
+            }
+            else if (messageData.type === "response.text.delta") {
                 const deltaText = messageData.delta;
                 setChatHistory((prev: ChatMessage[]) : ChatMessage[] =>{
                     if (prev.length === 0 || prev[prev.length - 1].role !== 'assistant') {
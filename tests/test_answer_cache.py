@@ -0,0 +1,55 @@
+import numpy as np
+
+from backend.services import answer_cache
+from backend.services.answer_cache import AnswerCache
+
+SOURCES = frozenset({"m1:0", "m1:1"})
+
+
+def unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_similar_query_with_the_same_sources_and_history_hits():
+    cache = AnswerCache(threshold=0.95)
+    cache.store(unit(1, 0), SOURCES, "answer", version=1)
+    assert cache.lookup(unit(1, 0.1), SOURCES, version=1) == "answer"
+    assert cache.lookup(unit(1, 1), SOURCES, version=1) is None  # another question
+    assert cache.lookup(unit(1, 0), frozenset({"m1:0"}), version=1) is None  # other sources
+    assert cache.lookup(unit(1, 0), SOURCES, version=1, history="earlier turns") is None
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_answers_of_another_conversation_are_kept_apart():
+    cache = AnswerCache()
+    cache.store(unit(1, 0), SOURCES, "first answer", version=1)
+    cache.store(unit(1, 0), SOURCES, "follow-up answer", version=1, history="h1")
+    assert cache.lookup(unit(1, 0), SOURCES, version=1) == "first answer"
+    assert cache.lookup(unit(1, 0), SOURCES, version=1, history="h1") == "follow-up answer"
+
+
+def test_version_change_drops_every_answer():
+    cache = AnswerCache()
+    cache.store(unit(1, 0), SOURCES, "answer", version=1)
+    assert cache.lookup(unit(1, 0), SOURCES, version=2) is None
+    assert cache.size == 0
+    # and the old version doesn't come back
+    assert cache.lookup(unit(1, 0), SOURCES, version=1) is None
+
+
+def test_expired_and_evicted_answers(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(answer_cache.time, "monotonic", lambda: now[0])
+    cache = AnswerCache(ttl=10.0, max_entries=4)
+    for i in range(4):
+        now[0] = float(i)
+        cache.store(unit(1, i), frozenset({f"m:{i}"}), f"answer {i}", version=1)
+    now[0] = 4.0
+    cache.store(unit(1, 4), frozenset({"m:4"}), "answer 4", version=1)
+    # nothing had expired, the oldest half went
+    assert cache.size == 3
+    assert cache.lookup(unit(1, 0), frozenset({"m:0"}), version=1) is None
+    assert cache.lookup(unit(1, 3), frozenset({"m:3"}), version=1) == "answer 3"
+    now[0] = 20.0
+    assert cache.lookup(unit(1, 4), frozenset({"m:4"}), version=1) is None
@@ -0,0 +1,46 @@
+import wave
+
+import numpy as np
+import pytest
+
+from backend.services.audio_clips import AudioClip, ClipError, parse_range
+from backend.services.recorder import audio_path
+
+
+def test_audio_path_rejects_ids_that_are_paths():
+    assert audio_path("recordings", "3f2b-meeting_1").endswith("audio/3f2b-meeting_1.wav")
+    for meeting_id in ("../../x", "a/b", "", "..", "a\x00b"):
+        with pytest.raises(ValueError):
+            audio_path("recordings", meeting_id)
+
+
+def write_wav(path, samples, sample_rate=24000):
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(samples.astype("<i2").tobytes())
+
+
+def test_opus_clip_keeps_the_last_partial_frame(tmp_path):
+    sphn = pytest.importorskip("sphn")
+    path = tmp_path / "m.wav"
+    write_wav(path, (np.sin(np.arange(24000 * 2) / 5) * 8000))
+    clip = AudioClip(str(path), 0.0, 1.01)
+    decoded = sphn.OpusStreamReader(24000).append_bytes(b"".join(clip.iter_opus()))
+    assert len(decoded) >= len(clip.samples)
+
+
+def test_wav_clip_byte_ranges(tmp_path):
+    path = tmp_path / "m.wav"
+    samples = np.arange(24000 * 2) % 1000
+    write_wav(path, samples)
+    clip = AudioClip(str(path), 0.5, 1.0)
+    body = b"".join(clip.iter_wav())
+    assert len(body) == clip.wav_size
+    assert np.array_equal(np.frombuffer(body[44:], dtype="<i2"), samples[12000:24000])
+    first, last = parse_range("bytes=10-99", clip.wav_size)
+    assert b"".join(clip.iter_wav(first, last)) == body[10:100]
+    assert parse_range("bytes=-5", clip.wav_size) == (clip.wav_size - 5, clip.wav_size - 1)
+    with pytest.raises(ClipError):
+        parse_range(f"bytes={clip.wav_size}-", clip.wav_size)
@@ -0,0 +1,102 @@
+import argparse
+import asyncio
+import json
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from backend.models.meeting import Meeting
+from backend.services import meeting_memory
+from backend.services.meeting_memory import MeetingMemory, StoreLockedError
+from backend.services.recorder import Recorder
+from backend.tools.bulk_import import BulkImporter, Checkpoint
+from backend.utils import cpu_pool
+
+
+class FakeMemory:
+    """The store interface of the importer, failing on the `fail_at`-th upsert."""
+
+    def __init__(self, fail_at=None):
+        self.fail_at = fail_at
+        self.upserted = []
+        self.resets = 0
+        self.flushes = 0
+
+    async def awarm_up(self):
+        pass
+
+    async def aclose(self):
+        pass
+
+    async def aembed_documents(self, texts):
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+    async def abulk_upsert(self, ids, texts, embeddings, metadatas):
+        if self.fail_at is not None and len(self.upserted) + 1 == self.fail_at:
+            raise RuntimeError("store unavailable")
+        self.upserted.append(ids)
+
+    async def adelete_chunks_from(self, meeting_id, n_chunks):
+        pass
+
+    async def aflush(self):
+        self.flushes += 1
+
+    async def areset_collection(self):
+        self.resets += 1
+
+
+@pytest.fixture
+def recordings(tmp_path, monkeypatch):
+    monkeypatch.setattr(cpu_pool, "split_text", lambda text, *args: text.split("|"))
+    recorder = Recorder(str(tmp_path / "recordings"))
+    for day, transcript in ((1, "a|b"), (2, "c|d"), (3, "e")):
+        recorder.catalog.put(Meeting(
+            id=f"m{day}", title="t", participants=[], start_time=datetime(2026, 1, day), transcript=transcript,
+        ))
+    return argparse.Namespace(
+        recordings_dir=str(tmp_path / "recordings"), work_dir=str(tmp_path / "work"), batch_size=2, reindex=True,
+    )
+
+
+def test_interrupted_reindex_resumes_after_the_checkpoint(recordings):
+    memory = FakeMemory(fail_at=2)
+    with pytest.raises(RuntimeError):
+        asyncio.run(BulkImporter(recordings, memory=memory).run())
+    assert memory.resets == 1
+    checkpoint = Checkpoint(Path(recordings.work_dir) / "reindex.json", meeting_memory.EMBEDDING_MODEL)
+    assert checkpoint.done == {"m1"}
+
+    # resuming keeps the chunks written so far
+    memory = FakeMemory()
+    asyncio.run(BulkImporter(recordings, memory=memory).run())
+    assert memory.resets == 0
+    assert memory.upserted == [["m2:0", "m2:1"], ["m3:0"]]
+
+
+def test_checkpoint_of_another_model_starts_over(tmp_path):
+    path = tmp_path / "reindex.json"
+    path.write_text(json.dumps({"model": "old-model", "done": ["m1"]}))
+    assert Checkpoint(path, "old-model").done == {"m1"}
+    assert Checkpoint(path, "new-model").done == set()
+
+    checkpoint = Checkpoint(path, "new-model")
+    checkpoint.done.add("m2")
+    checkpoint.save()
+    assert Checkpoint(path, "new-model").done == {"m2"}
+
+
+def test_store_open_in_another_process_is_refused(tmp_path, monkeypatch):
+    monkeypatch.setattr(meeting_memory, "LOCK_PATH", str(tmp_path / "writer.lock"))
+    server = MeetingMemory()
+    server._lock_store()
+    try:
+        with pytest.raises(StoreLockedError):
+            MeetingMemory()._lock_store()
+    finally:
+        server.close()
+    importer = MeetingMemory()
+    importer._lock_store()
+    importer.close()
@@ -0,0 +1,87 @@
+import asyncio
+
+import numpy as np
+
+from backend.handlers.chat_handler import ChatHandler
+from backend.services.answer_cache import AnswerCache
+from backend.services.llm_scheduler import LLMBusyError
+
+
+class FakeMemory:
+    version = 0
+
+    async def aembed_query(self, text):
+        return np.full(4, 0.5, dtype=np.float32)  # normalized
+
+    async def aquery(self, text, k=3, query_vector=None):
+        return []
+
+
+class FakeRecorder:
+    async def last_meeting(self):
+        return None
+
+
+class FakeLLM:
+    """Streams the words of `answers[query]`, blocks on "slow" and rejects "busy"."""
+
+    model = None
+
+    def __init__(self):
+        self.requests = []
+
+    async def stream_response(self, messages, sources=None):
+        self.requests.append(messages)
+        query = messages[-1]["content"]
+        if query == "busy":
+            raise LLMBusyError("saturated")
+        if query == "slow":
+            await asyncio.Event().wait()
+        for word in f"answer to {query}".split():
+            yield word
+
+
+def roles_and_contents(handler):
+    return [(m.role, m.content) for m in handler.chatbot.chat_history[1:]]
+
+
+def test_preempted_query_does_not_merge_with_the_next_one():
+    async def main():
+        llm = FakeLLM()
+        handler = ChatHandler(FakeMemory(), FakeRecorder(), llm=llm)
+        await handler.submit_query("slow")
+        await asyncio.sleep(0.01)
+        await handler.submit_query("second")
+        await handler.generation_task
+        assert llm.requests[-1][-1] == {"role": "user", "content": "second"}
+        assert roles_and_contents(handler) == [("user", "second"), ("assistant", "answer to second")]
+
+    asyncio.run(main())
+
+
+def test_rejected_query_is_removed_from_the_history():
+    async def main():
+        llm = FakeLLM()
+        handler = ChatHandler(FakeMemory(), FakeRecorder(), llm=llm)
+        await handler.handle_query("busy")
+        await handler.handle_query("next")
+        assert llm.requests[-1][-1] == {"role": "user", "content": "next"}
+        assert roles_and_contents(handler) == [("user", "next"), ("assistant", "answer to next")]
+
+    asyncio.run(main())
+
+
+def test_cached_answers_are_not_reused_after_other_turns():
+    async def main():
+        cache = AnswerCache()
+        first = ChatHandler(FakeMemory(), FakeRecorder(), answer_cache=cache, llm=FakeLLM())
+        await first.handle_query("who decided?")
+
+        llm = FakeLLM()
+        second = ChatHandler(FakeMemory(), FakeRecorder(), answer_cache=cache, llm=llm)
+        await second.handle_query("who decided?")
+        assert llm.requests == []  # same question, no history: cached
+        await second.handle_query("who decided?")
+        assert len(llm.requests) == 1  # follow-up, the earlier turns matter
+
+    asyncio.run(main())
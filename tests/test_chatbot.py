@@ -0,0 +1,38 @@
+import asyncio
+
+from backend.models.chatbot import ChatMessage, Chatbot
+
+
+def test_deltas_are_joined_with_spaces_between_words():
+    message = ChatMessage("assistant")
+    for delta in ["The", " budget", "was", "", "approved ", "today."]:
+        message.append(delta)
+    assert message.content == "The budget was approved today."
+    message.append("Next")
+    assert message.content == "The budget was approved today. Next"
+
+
+def test_content_is_joined_once_until_the_next_delta():
+    message = ChatMessage("assistant", "a")
+    for _ in range(1000):
+        message.append("b")
+    assert len(message._parts) == 2001  # not joined while streaming
+    content = message.content
+    assert message._parts == [content] and message.content is content
+    assert content == "a" + " b" * 1000
+
+
+def test_deltas_of_another_role_start_a_message():
+    chatbot = Chatbot()
+
+    async def main():
+        await chatbot.add_chat_message_delta("user", "hello")
+        await chatbot.add_chat_message_delta("assistant", "hi")
+        await chatbot.add_chat_message_delta("assistant", "there")
+
+    asyncio.run(main())
+    assert [m.to_dict() for m in chatbot.chat_history[1:]] == [
+        {"role": "user", "content": "hello"},
+        {"role": "assistant", "content": "hi there"},
+    ]
+    assert chatbot.complete_message() == "hi there"
@@ -0,0 +1,35 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from backend.utils import cpu_pool
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(cpu_pool, "CPU_POOL_WORKERS", 1)
+    yield
+    cpu_pool.shutdown()
+
+
+def frames():
+    rng = np.random.default_rng(0)
+    # out of range samples are clipped
+    return [rng.uniform(-1.2, 1.2, size).astype(np.float32) for size in (960, 1920, 7)]
+
+
+def test_pool_conversion_matches_in_process(pool):
+    expected = (np.clip(np.concatenate(frames()), -1.0, 1.0) * 32767).astype(np.int16)
+    assert cpu_pool.get_pool() is not None
+    samples = asyncio.run(cpu_pool.float_to_int16(frames()))
+    assert samples.dtype == np.int16
+    np.testing.assert_array_equal(samples, expected)
+
+
+def test_thread_conversion_accepts_a_single_array():
+    pcm = np.concatenate(frames())
+    assert cpu_pool.get_pool() is None
+    np.testing.assert_array_equal(
+        asyncio.run(cpu_pool.float_to_int16(pcm)), asyncio.run(cpu_pool.float_to_int16(frames()))
+    )
@@ -0,0 +1,51 @@
+import asyncio
+import json
+from datetime import datetime
+
+from backend.models.meeting import Meeting, MeetingDigest
+from backend.services import digest
+from backend.services.digest import MAX_ITEMS, MAX_SUMMARY_CHARS, MeetingDigester, parse_digest
+from backend.utils import cpu_pool
+
+
+def test_json_answer_is_parsed_from_the_surrounding_text():
+    answer = 'Here are the notes:\n```json\n{"summary": " Q3 budget ", "action_items": ["Ann: send deck", ""], ' \
+             '"decisions": "ship on Monday"}\n```'
+    assert parse_digest(answer) == MeetingDigest(
+        summary="Q3 budget", action_items=["Ann: send deck"], decisions=["ship on Monday"]
+    )
+
+
+def test_invalid_json_becomes_the_summary():
+    assert parse_digest("  no notes {oops  ") == MeetingDigest(summary="no notes {oops")
+    assert parse_digest('["a list"]').summary == '["a list"]'
+
+
+def test_digest_is_bounded():
+    answer = json.dumps({"summary": "x" * 5000, "action_items": [f"item {i}" for i in range(50)]})
+    parsed = parse_digest(answer)
+    assert len(parsed.summary) == MAX_SUMMARY_CHARS
+    assert parsed.action_items == [f"item {i}" for i in range(MAX_ITEMS)]
+    assert parsed.decisions == []
+
+
+class FakeLLM:
+    def __init__(self):
+        self.n_calls = 0
+
+    async def complete(self, messages, sources=None, priority=None):
+        self.n_calls += 1
+        texts = [source["text"] for source in sources]
+        return json.dumps({"summary": "+".join(texts)[:40], "decisions": texts[:1]})
+
+
+def test_parts_are_merged_into_one_digest(monkeypatch):
+    monkeypatch.setattr(cpu_pool, "split_text", lambda text, *args: text.split("|"))
+    monkeypatch.setattr(digest, "MAX_CONCURRENT_MAPS", 2)
+    llm = FakeLLM()
+    meeting = Meeting(id="m1", title="t", participants=[], start_time=datetime(2026, 1, 1), transcript="a|b|c")
+    result = asyncio.run(MeetingDigester(llm).digest(meeting))
+    # 3 maps, then (a, b) and (c) reduced, then both
+    assert llm.n_calls == 5
+    assert isinstance(result, MeetingDigest) and result.decisions
+    assert asyncio.run(MeetingDigester(llm).digest(meeting.model_copy(update={"transcript": " "}))) is None
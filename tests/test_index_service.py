@@ -0,0 +1,126 @@
+import asyncio
+from datetime import datetime
+
+import httpx
+import numpy as np
+
+from backend.models.meeting import Meeting
+from backend.services import index_service
+from backend.services.index_client import IndexClient
+
+
+class FakeMemory:
+    """The async interface of `MeetingMemory`, over a dict of chunks."""
+
+    def __init__(self):
+        self.version = 0
+        self.is_ready = True
+        self.warm_up_error = None
+        self.chunks = {}
+        self.flushes = 0
+
+    async def aembed_query(self, text):
+        return np.full(4, 0.5, dtype=np.float32)
+
+    async def aquery(self, text, k=3, query_vector=None):
+        hits = [chunk_id for chunk_id, chunk in self.chunks.items() if text in chunk["content"]]
+        return [{"id": chunk_id, **self.chunks[chunk_id]} for chunk_id in hits[:k]]
+
+    async def aadd_chunks(self, meeting, chunks, start_index=0, provisional=False, times=None):
+        for i, chunk in enumerate(chunks, start_index):
+            self.chunks[f"{meeting.meeting_id}:{i}"] = {
+                "content": chunk,
+                "metadata": {"title": meeting.title, "provisional": provisional},
+            }
+        self.version += 1
+
+    async def acommit_meeting(self, meeting_id):
+        for chunk_id, chunk in self.chunks.items():
+            if chunk_id.startswith(f"{meeting_id}:"):
+                chunk["metadata"]["provisional"] = False
+        self.version += 1
+
+    async def aembed_documents(self, texts):
+        return np.arange(len(texts) * 2, dtype=np.float32).reshape(len(texts), 2)
+
+    async def abulk_upsert(self, ids, texts, embeddings, metadatas):
+        assert embeddings.shape == (len(ids), 2)
+        for chunk_id, text, metadata in zip(ids, texts, metadatas):
+            self.chunks[chunk_id] = {"content": text, "metadata": metadata}
+        self.version += 1
+
+    async def adelete_chunks_from(self, meeting_id, n_chunks):
+        for chunk_id in list(self.chunks):
+            name, index = chunk_id.rsplit(":", 1)
+            if name == meeting_id and int(index) >= n_chunks:
+                del self.chunks[chunk_id]
+        self.version += 1
+
+    async def aflush(self):
+        self.flushes += 1
+
+    async def areset_collection(self):
+        self.chunks.clear()
+        self.version += 1
+
+
+def connect(memory: FakeMemory) -> IndexClient:
+    """A client of the service app in this process, without its startup event."""
+    index_service.app.state.meeting_memory = memory
+    client = IndexClient("http://index")
+    client.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=index_service.app), base_url="http://index")
+    return client
+
+
+def test_client_round_trip():
+    memory = FakeMemory()
+    meeting = Meeting(id="m1", title="Standup", participants=["Ann"], start_time=datetime(2026, 1, 1))
+
+    async def main():
+        client = connect(memory)
+        try:
+            response = await client.client.get("/ready")
+            assert response.json() == {"status": "ready", "version": 0}
+
+            await client.aadd_chunks(meeting, ["budget review", "hiring plan"], provisional=True)
+            await client.acommit_meeting("m1")
+            assert memory.chunks["m1:1"] == {"content": "hiring plan", "metadata": {"title": "Standup", "provisional": False}}
+            assert client.version == 2
+
+            vector = await client.aembed_query("budget")
+            assert vector.dtype == np.float32 and vector.tolist() == [0.5] * 4
+            results = await client.aquery("budget", k=3, query_vector=vector)
+            assert [r["id"] for r in results] == ["m1:0"]
+
+            embeddings = await client.aembed_documents(["a", "b"])
+            assert embeddings.shape == (2, 2)
+            await client.abulk_upsert(["m2:0", "m2:1"], ["a", "b"], embeddings, [{"chunk_index": 0}, {"chunk_index": 1}])
+            await client.adelete_chunks_from("m2", 1)
+            assert sorted(memory.chunks) == ["m1:0", "m1:1", "m2:0"]
+
+            await client.aflush()
+            assert memory.flushes == 1
+            await client.areset_collection()
+            assert memory.chunks == {} and client.version == memory.version == 5
+        finally:
+            await client.aclose()
+
+    asyncio.run(main())
+
+
+def test_client_keeps_the_highest_version_seen():
+    memory = FakeMemory()
+
+    async def main():
+        client = connect(memory)
+        try:
+            client.version = 7
+            await client.aflush()
+            assert client.version == 7
+            memory.version = 9
+            await client.aflush()
+            assert client.version == 9
+        finally:
+            await client.aclose()
+
+    asyncio.run(main())
@@ -0,0 +1,67 @@
+import math
+
+import pytest
+
+from backend.services.lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+CHUNKS = {
+    "m1:0": "The budget for Q3 was approved by finance",
+    "m1:1": "Hiring plan: two engineers for the API team",
+    "m2:0": "Budget review, budget cuts and budget owners",
+    "m2:1": "Launch of project ORION-7 moved to next week",
+}
+
+
+@pytest.fixture
+def index():
+    index = BM25Index()
+    for doc_id, text in CHUNKS.items():
+        index.add(doc_id, text)
+    return index
+
+
+def bm25(query: str, k1: float = 1.5, b: float = 0.75) -> dict[str, float]:
+    """BM25 scores computed from the documents, without the inverted index."""
+    docs = {doc_id: tokenize(text) for doc_id, text in CHUNKS.items()}
+    avg_length = sum(map(len, docs.values())) / len(docs)
+    scores = {}
+    for doc_id, tokens in docs.items():
+        score = 0.0
+        for term in set(tokenize(query)):
+            df = sum(term in other for other in docs.values())
+            tf = tokens.count(term)
+            if tf:
+                idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+                score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(tokens) / avg_length))
+        if score:
+            scores[doc_id] = score
+    return scores
+
+
+def test_bm25_ranking(index):
+    for query in ["budget", "budget hiring", "orion launch", "API engineers"]:
+        expected = bm25(query)
+        results = index.search(query, k=10)
+        assert [doc_id for doc_id, _ in results] == sorted(expected, key=expected.get, reverse=True)
+        for doc_id, score in results:
+            assert score == pytest.approx(expected[doc_id])
+    # repeated terms weigh more, up to saturation
+    assert [doc_id for doc_id, _ in index.search("budget")] == ["m2:0", "m1:0"]
+    assert index.search("the of and") == []
+
+
+def test_replaced_and_removed_documents(index):
+    index.add("m2:0", "Retrospective notes")
+    assert [doc_id for doc_id, _ in index.search("budget")] == ["m1:0"]
+    index.remove("m1:0")
+    assert index.search("budget") == []
+    assert len(index) == 3 and "m1:0" not in index
+
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion(["a", "b", "c"], ["c", "a", "d"], k=60)
+    scores = dict(fused)
+    assert scores["a"] == pytest.approx(1 / 61 + 1 / 62)
+    assert scores["d"] == pytest.approx(1 / 63)
+    # in both rankings beats first in one
+    assert [doc_id for doc_id, _ in fused] == ["a", "c", "b", "d"]
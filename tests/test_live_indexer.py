@@ -0,0 +1,79 @@
+import asyncio
+import re
+from datetime import datetime
+
+import pytest
+
+from backend.models.meeting import Meeting
+from backend.services import live_indexer
+from backend.services.live_indexer import LiveMeetingIndexer
+from backend.utils import cpu_pool
+
+
+def split_sentences(text: str, *args) -> list[str]:
+    return [sentence.strip() for sentence in re.findall(r"[^.]+\.?", text) if sentence.strip()]
+
+
+class SentenceSplitter:
+    def split_text(self, text):
+        return split_sentences(text)
+
+
+class FakeMemory:
+    splitter = SentenceSplitter()
+
+    def __init__(self, fail_first=False):
+        self.fail_first = fail_first
+        self.added = []  # (chunks, start_index, provisional, times)
+        self.committed = []
+
+    async def aadd_chunks(self, meeting, chunks, start_index=0, provisional=False, times=None):
+        if self.fail_first:
+            self.fail_first = False
+            raise RuntimeError("store unavailable")
+        self.added.append((chunks, start_index, provisional, times))
+
+    async def acommit_meeting(self, meeting_id):
+        self.committed.append(meeting_id)
+
+
+@pytest.fixture(autouse=True)
+def short_chunks(monkeypatch):
+    monkeypatch.setattr(live_indexer, "FLUSH_THRESHOLD", 30)
+    monkeypatch.setattr(cpu_pool, "split_text", split_sentences)
+
+
+SEGMENTS = [("first sentence here.", 0.0, 1.0), ("second one.", 1.0, 2.0), ("third sentence now.", 2.0, 3.5)]
+
+
+def run(memory: FakeMemory) -> LiveMeetingIndexer:
+    async def main():
+        indexer = LiveMeetingIndexer(memory)
+        indexer.start(Meeting(id="m1", title="t", participants=[], start_time=datetime(2026, 1, 1)))
+        for text, start, end in SEGMENTS:
+            indexer.add_segment(text, start, end)
+            await asyncio.sleep(0)
+        await indexer.commit()
+        return indexer
+
+    return asyncio.run(main())
+
+
+def test_finished_chunks_are_stored_with_their_segment_times():
+    memory = FakeMemory()
+    indexer = run(memory)
+    assert memory.added == [
+        (["first sentence here."], 0, True, [(0.0, 1.0)]),
+        (["second one."], 1, True, [(1.0, 2.0)]),
+        (["third sentence now."], 2, False, [(2.0, 3.5)]),
+    ]
+    assert memory.committed == ["m1"]
+    assert indexer.n_chunks == 3
+
+
+def test_failed_chunks_are_stored_at_commit():
+    memory = FakeMemory(fail_first=True)
+    run(memory)
+    assert sorted(start for _, start, _, _ in memory.added) == [0, 1, 2]
+    assert (["first sentence here."], 0, True, [(0.0, 1.0)]) in memory.added
+    assert memory.added[-1][2] is False
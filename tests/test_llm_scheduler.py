@@ -0,0 +1,35 @@
+import asyncio
+
+import pytest
+
+from backend.services.llm_scheduler import LLMBusyError, LLMScheduler, Priority
+
+
+def test_background_requests_wait_past_the_interactive_timeout():
+    async def main():
+        scheduler = LLMScheduler(max_concurrency=1, max_wait=0.05)
+        release = asyncio.Event()
+
+        async def hold():
+            async with scheduler.slot("a"):
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        with pytest.raises(LLMBusyError):
+            async with scheduler.slot("b", Priority.INTERACTIVE):
+                pass
+
+        async def digest():
+            async with scheduler.slot("c", Priority.BACKGROUND):
+                pass
+
+        background = asyncio.create_task(digest())
+        await asyncio.sleep(0.2)
+        assert not background.done()
+        release.set()
+        await holder
+        await asyncio.wait_for(background, 1.0)
+        assert scheduler.active == 0
+
+    asyncio.run(main())
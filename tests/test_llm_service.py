@@ -0,0 +1,45 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from backend.services import llm_service
+
+
+class FakeModels:
+    def __init__(self, ids):
+        self.ids = ids
+        self.calls = 0
+
+    async def list(self):
+        self.calls += 1
+        return SimpleNamespace(data=[SimpleNamespace(id=model_id) for model_id in self.ids])
+
+
+@pytest.fixture
+def models(monkeypatch):
+    models = FakeModels(["served-model"])
+    monkeypatch.setattr(llm_service, "_model", None)
+    monkeypatch.setattr(llm_service, "get_openai_client", lambda: SimpleNamespace(models=models))
+    return models
+
+
+def test_model_is_listed_once(models):
+    with pytest.raises(RuntimeError):
+        llm_service.LLMService()
+
+    async def main():
+        return [await llm_service.resolve_model() for _ in range(3)]
+
+    assert asyncio.run(main()) == ["served-model"] * 3
+    assert models.calls == 1
+    assert llm_service.LLMService().model == "served-model"
+
+
+def test_ambiguous_server_is_retried(models):
+    models.ids = ["a", "b"]
+    with pytest.raises(ValueError):
+        asyncio.run(llm_service.resolve_model())
+    models.ids = ["b"]
+    assert asyncio.run(llm_service.resolve_model()) == "b"
+    assert models.calls == 2
@@ -0,0 +1,76 @@
+import json
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.app import app
+from backend.models.meeting import Meeting
+from backend.services.meeting_catalog import CursorError, MeetingCatalog
+
+
+def meeting(day, transcript=""):
+    return Meeting(id=f"m{day}", title=f"day {day}", participants=["ann"], start_time=datetime(2026, 1, day),
+                   transcript=transcript)
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = MeetingCatalog(str(tmp_path / "meetings.json"))
+    for day in range(1, 6):
+        catalog.put(meeting(day, f"transcript of day {day}"))
+    return catalog
+
+
+def test_pages_are_newest_first_and_chained_by_cursor(catalog):
+    ids, cursor = [], None
+    while True:
+        entries, cursor = catalog.page(cursor, limit=2)
+        ids.append([entry["id"] for entry in entries])
+        if cursor is None:
+            break
+    assert ids == [["m5", "m4"], ["m3", "m2"], ["m1"]]
+    with pytest.raises(CursorError):
+        catalog.page("not a cursor")
+
+
+def test_transcripts_are_read_on_demand(catalog):
+    assert "transcript" not in catalog.get("m3")
+    assert catalog.transcript("m3") == "transcript of day 3"
+    assert catalog.last().transcript == "transcript of day 5"
+    assert [m.transcript for m in catalog.meetings()][0] == "transcript of day 1"
+
+
+def test_inline_transcripts_move_to_files_on_write(tmp_path):
+    path = tmp_path / "meetings.json"
+    path.write_text(json.dumps([meeting(1, "old transcript")._to_dict()]))
+    catalog = MeetingCatalog(str(path))
+    assert "transcript" not in catalog.get("m1")
+    assert catalog.transcript("m1") == "old transcript"
+
+    catalog.put(meeting(2, "new transcript"))
+    assert all("transcript" not in entry for entry in json.loads(path.read_text()))
+    assert MeetingCatalog(str(path)).transcript("m1") == "old transcript"
+
+
+def test_listing_etag_revalidation(catalog):
+    app.state.catalog = catalog
+    client = TestClient(app)
+
+    response = client.get("/meetings", params={"limit": 2})
+    assert response.status_code == 200
+    assert [m["id"] for m in response.json()["meetings"]] == ["m5", "m4"]
+    assert "transcript" not in response.json()["meetings"][0]
+    etag = response.headers["etag"]
+
+    assert client.get("/meetings", params={"limit": 2}, headers={"If-None-Match": etag}).status_code == 304
+    detail = client.get("/meetings/m4", headers={"If-None-Match": etag})
+    assert detail.status_code == 304
+
+    catalog.put(meeting(6))
+    response = client.get("/meetings", params={"limit": 2}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert client.get("/meetings/m4").json()["transcript"] == "transcript of day 4"
+    assert client.get("/meetings/nope").status_code == 404
+    assert client.get("/meetings", params={"cursor": "bad"}).status_code == 400
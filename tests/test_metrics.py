@@ -0,0 +1,49 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.app import app
+from backend.utils.metrics import MetricsRegistry
+
+
+def test_text_exposition_format():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests served.")
+    registry.gauge("queue_depth", "Events queued.", lambda: 3)
+    latency = registry.histogram("latency_seconds", "Request latency.", buckets=(0.1, 1.0))
+    requests.inc(2)
+    for value in (0.05, 0.1, 0.5, 7.0):
+        latency.observe(value)
+
+    assert registry.render().splitlines() == [
+        "# HELP requests_total Requests served.",
+        "# TYPE requests_total counter",
+        "requests_total 2.0",
+        "# HELP queue_depth Events queued.",
+        "# TYPE queue_depth gauge",
+        "queue_depth 3.0",
+        "# HELP latency_seconds Request latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.1"} 2.0',  # bounds are inclusive
+        'latency_seconds_bucket{le="1.0"} 3.0',
+        'latency_seconds_bucket{le="+Inf"} 4.0',
+        "latency_seconds_sum 7.65",
+        "latency_seconds_count 4.0",
+    ]
+    assert latency.quantile(0.5) == 0.1
+    assert latency.quantile(0.99) == float("inf")
+
+
+def test_registration_is_idempotent_per_type():
+    registry = MetricsRegistry()
+    assert registry.counter("n", "help") is registry.counter("n", "help")
+    with pytest.raises(ValueError):
+        registry.gauge("n", "help")
+    registry.gauge("broken", "help", lambda: 1 / 0)
+    assert "# broken unavailable: division by zero" in registry.render()
+
+
+def test_metrics_endpoint():
+    response = TestClient(app).get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE process_resident_memory_bytes gauge" in response.text
@@ -0,0 +1,73 @@
+import asyncio
+
+import backend.openai_realtime_api_events as ora
+from backend.utils.outbound_queue import OutboundQueue
+
+
+def partial(text: str) -> ora.ConversationItemInputAudioTranscriptionDelta:
+    return ora.ConversationItemInputAudioTranscriptionDelta(delta=text, start_time=0.0)
+
+
+def created() -> ora.ResponseCreated:
+    return ora.ResponseCreated(response=ora.Response(status="in_progress", voice="none"))
+
+
+def drain(queue: OutboundQueue) -> list:
+    events = []
+    while not queue.empty():
+        events.append(queue.get_nowait())
+    return events
+
+
+def test_consecutive_text_deltas_are_coalesced():
+    queue = OutboundQueue(maxsize=4)
+    for delta in ["The ", "budget ", "passed"]:
+        assert queue.put_nowait(ora.ResponseTextDelta(delta=delta))
+    queue.put_nowait(ora.ResponseTextDone(delta=""))
+    queue.put_nowait(ora.ResponseTextDelta(delta="Next"))
+    events = drain(queue)
+    assert [(type(e), e.delta) for e in events] == [
+        (ora.ResponseTextDelta, "The budget passed"),
+        (ora.ResponseTextDone, ""),
+        (ora.ResponseTextDelta, "Next"),
+    ]
+    assert queue.n_coalesced == 2
+
+
+def test_full_queue_drops_stale_partials_and_keeps_done_events():
+    queue = OutboundQueue(maxsize=3)
+    queue.put_nowait(partial("one"))
+    queue.put_nowait(ora.InputAudioBufferAck(seq=1))
+    queue.put_nowait(ora.ResponseTextDelta(delta="answer"))
+    # full: the oldest droppable event makes room for the new partial
+    assert queue.put_nowait(partial("one two"))
+    # other events wait for room, done events and errors never do
+    assert not queue.put_nowait(created())
+    assert queue.put_nowait(ora.ResponseTextDone(delta=""))
+    assert queue.put_nowait(ora.Error(error=ora.ErrorDetails(type="server_error", message="boom")))
+
+    events = drain(queue)
+    assert [type(e) for e in events] == [
+        ora.InputAudioBufferAck,
+        ora.ResponseTextDelta,
+        ora.ConversationItemInputAudioTranscriptionDelta,
+        ora.ResponseTextDone,
+        ora.Error,
+    ]
+    assert events[2].delta == "one two"
+    assert queue.n_dropped == 1 and queue.max_depth == 5
+
+
+def test_producers_wait_for_room():
+    async def main():
+        queue = OutboundQueue(maxsize=1)
+        queue.put_nowait(ora.ResponseTextDone(delta=""))
+        put = asyncio.create_task(queue.put(created()))
+        await asyncio.sleep(0)
+        assert not put.done()
+        assert isinstance(await queue.get(), ora.ResponseTextDone)
+        await asyncio.wait_for(put, timeout=1)
+        assert isinstance(await queue.get(timeout=0.1), ora.ResponseCreated)
+        assert await queue.get(timeout=0.01) is None
+
+    asyncio.run(main())
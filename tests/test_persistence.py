@@ -0,0 +1,116 @@
+import json
+import threading
+from datetime import datetime
+
+from backend.models.meeting import Meeting
+from backend.services import meeting_memory
+from backend.services.meeting_memory import MeetingMemory
+from backend.services.persistence import WriteBehindPersister, read_wal
+
+
+class InMemoryStore:
+    """The parts of the Chroma store used by the write-ahead log replay."""
+
+    def __init__(self, wal_path):
+        self.wal_path = wal_path
+        self.chunks = {}
+        self.persisted = None
+        self.wal_at_persist = None
+
+    def add_texts(self, texts, metadatas=None, ids=None):
+        self.chunks.update(zip(ids, texts))
+
+    def get(self, include=()):
+        return {"ids": list(self.chunks), "documents": list(self.chunks.values())}
+
+    def persist(self):
+        self.persisted = dict(self.chunks)
+        self.wal_at_persist = read_wal(self.wal_path)
+
+
+def test_replayed_wal_is_persisted_before_truncation(tmp_path, monkeypatch):
+    wal_path = tmp_path / "pending.wal"
+    record = {"op": "add", "ids": ["m1:0"], "texts": ["hello"], "metadatas": [{"meeting_id": "m1"}]}
+    wal_path.write_text(json.dumps(record) + "\n", encoding="utf-8")
+    monkeypatch.setattr(meeting_memory, "WAL_PATH", str(wal_path))
+
+    memory = MeetingMemory()
+    memory.db = InMemoryStore(str(wal_path))
+    memory._recover()
+    try:
+        assert memory.db.persisted == {"m1:0": "hello"}
+        assert memory.db.wal_at_persist == [record]
+        assert read_wal(str(wal_path)) == []
+    finally:
+        memory.persister.close()
+
+
+
+def test_flush_persists_bulk_writes(tmp_path, monkeypatch):
+    monkeypatch.setattr(meeting_memory, "WAL_PATH", str(tmp_path / "pending.wal"))
+    memory = MeetingMemory()
+    memory.db = InMemoryStore(str(tmp_path / "pending.wal"))
+    memory._recover()
+    memory.ready.set()
+    try:
+        # `bulk_upsert` writes to the collection directly, outside of the log
+        memory.db.add_texts(["bulk"], ids=["m2:0"])
+        memory.flush()
+        assert memory.db.persisted == {"m2:0": "bulk"}
+    finally:
+        memory.persister.close()
+
+
+def test_provisional_chunks_keep_the_version(tmp_path, monkeypatch):
+    monkeypatch.setattr(meeting_memory, "WAL_PATH", str(tmp_path / "pending.wal"))
+    memory = MeetingMemory()
+    memory.db = InMemoryStore(str(tmp_path / "pending.wal"))
+    memory._recover()
+    memory.ready.set()
+    meeting = Meeting(id="m3", title="t", participants=[], start_time=datetime(2026, 1, 1))
+    try:
+        memory.add_chunks(meeting, ["live"], 0, provisional=True)
+        assert memory.version == 0
+        memory.add_chunks(meeting, ["tail"], 1)
+        assert memory.version == 1
+    finally:
+        memory.persister.close()
+
+
+def test_full_batch_flushes_without_a_thread(tmp_path):
+    wal_path = str(tmp_path / "pending.wal")
+    flushes = []
+    persister = WriteBehindPersister(lambda: flushes.append(read_wal(wal_path)), wal_path, max_pending=3)
+    try:
+        for i in range(4):
+            with persister.write({"op": "add", "ids": [f"m:{i}"]}):
+                pass
+        # the third write completed the batch, the fourth is still in the log
+        assert [[r["ids"] for r in batch] for batch in flushes] == [[["m:0"], ["m:1"], ["m:2"]]]
+        assert read_wal(wal_path) == [{"op": "add", "ids": ["m:3"]}]
+    finally:
+        persister.close()
+    assert len(flushes) == 2 and read_wal(wal_path) == []
+
+
+def test_concurrent_writes_count_every_version(tmp_path, monkeypatch):
+    monkeypatch.setattr(meeting_memory, "WAL_PATH", str(tmp_path / "pending.wal"))
+    memory = MeetingMemory()
+    memory.db = InMemoryStore(str(tmp_path / "pending.wal"))
+    memory._recover()
+    memory.ready.set()
+    meeting = Meeting(id="m4", title="t", participants=[], start_time=datetime(2026, 1, 1))
+
+    def write(thread: int):
+        for i in range(50):
+            memory.add_chunks(meeting, ["chunk"], thread * 50 + i)
+
+    try:
+        threads = [threading.Thread(target=write, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert memory.version == 400
+    finally:
+        memory.persister.close()
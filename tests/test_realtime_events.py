@@ -0,0 +1,38 @@
+import json
+
+from backend import openai_realtime_api_events as ora
+from backend.app import ClientEventAdapter
+
+AUDIO = "T2dnUwACAAAAAAAAAAA="
+
+
+def parse(message: str) -> tuple[str, int | None]:
+    """What the receive loop gets, through the fast path or the full validation."""
+    fast = ora.parse_audio_append(message)
+    if fast is not None:
+        return fast
+    event = ClientEventAdapter.validate_json(message)
+    assert isinstance(event, ora.InputAudioBufferAppend)
+    return event.audio, event.seq
+
+
+def test_compact_layout_takes_the_fast_path():
+    message = json.dumps({"type": "input_audio_buffer.append", "audio": AUDIO, "seq": 42}, separators=(",", ":"))
+    assert ora.parse_audio_append(message) == (AUDIO, 42)
+    no_seq = json.dumps({"type": "input_audio_buffer.append", "audio": AUDIO}, separators=(",", ":"))
+    assert ora.parse_audio_append(no_seq) == (AUDIO, None)
+
+
+def test_other_layouts_keep_the_sequence_number():
+    events = [
+        {"type": "input_audio_buffer.append", "seq": 42, "audio": AUDIO},
+        {"type": "input_audio_buffer.append", "audio": AUDIO, "event_id": "event_1", "seq": 42},
+        {"seq": 42, "type": "input_audio_buffer.append", "audio": AUDIO},
+    ]
+    for event in events:
+        for separators in [(",", ":"), (", ", ": ")]:
+            assert parse(json.dumps(event, separators=separators)) == (AUDIO, 42)
+
+    # seq after another field, the fast path must not report it missing
+    compact = json.dumps(events[1], separators=(",", ":"))
+    assert ora.parse_audio_append(compact) is None
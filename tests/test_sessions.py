@@ -0,0 +1,107 @@
+import asyncio
+import base64
+import json
+
+import numpy as np
+import pytest
+import sphn
+from fastapi import WebSocketDisconnect
+
+from backend.app import receive_loop
+from backend.services.sessions import SAMPLE_RATE, SessionRegistry
+from backend.utils.outbound_queue import OutboundQueue
+from backend.utils.utils import WebSocketClosedError
+
+
+class FakeHandler:
+    def __init__(self):
+        self.frames = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        pass
+
+    async def receive(self, frame):
+        self.frames.append(frame[1])
+
+
+class FakeChatHandler:
+    async def close(self):
+        pass
+
+
+class FakeWebSocket:
+    """Delivers `messages`, then disconnects."""
+
+    def __init__(self, messages):
+        self.messages = list(messages)
+
+    async def receive_text(self):
+        await asyncio.sleep(0)
+        if not self.messages:
+            raise WebSocketDisconnect(1001)
+        return self.messages.pop(0)
+
+
+def opus_pages(n):
+    writer = sphn.OpusStreamWriter(SAMPLE_RATE)
+    t = np.arange(1920 * n, dtype=np.float32) / SAMPLE_RATE
+    pcm = 0.3 * np.sin(2 * np.pi * 440 * t)
+    return [writer.append_pcm(pcm[i * 1920:(i + 1) * 1920]) for i in range(n)]
+
+
+def append(page, seq):
+    # the layout of `JSON.stringify` in the frontend
+    message = {"type": "input_audio_buffer.append", "audio": base64.b64encode(page).decode(), "seq": seq}
+    return json.dumps(message, separators=(",", ":"))
+
+
+def decoded(pages):
+    reader = sphn.OpusStreamReader(SAMPLE_RATE)
+    return np.concatenate([reader.append_bytes(page) for page in pages])
+
+
+async def run_connection(registry, session, messages):
+    connection_id = registry.attach(session, object())
+    with pytest.raises(WebSocketClosedError):
+        await receive_loop(FakeWebSocket(messages), session, OutboundQueue(name="test"))
+    await asyncio.sleep(0)  # let the decoded frames reach the handler
+    await registry.detach(session, connection_id)
+
+
+def test_resumed_session_skips_replayed_pages():
+    async def main():
+        pages = opus_pages(5)
+        registry = SessionRegistry(grace_period=10)
+        handler = FakeHandler()
+        session = await registry.create(handler, FakeChatHandler())
+
+        # the socket drops after page 2, pages 1 and 2 were not acknowledged yet
+        await run_connection(registry, session, [append(pages[i], i) for i in range(3)])
+        assert registry.resume(session.token) is session
+        assert session.last_audio_seq == 2
+
+        # the client replays the unacknowledged pages before the new ones
+        await run_connection(registry, session, [append(pages[i], i) for i in range(1, 5)])
+        np.testing.assert_array_equal(np.concatenate(handler.frames), decoded(pages))
+        await registry.close_all()
+
+    asyncio.run(main())
+
+
+def test_new_session_waits_for_the_first_page_of_a_stream():
+    async def main():
+        old_stream, new_stream = opus_pages(3), opus_pages(2)
+        registry = SessionRegistry(grace_period=10)
+        handler = FakeHandler()
+        session = await registry.create(handler, FakeChatHandler())
+
+        # pages of a stream started for a lost session can't be decoded alone
+        messages = [append(old_stream[2], 0), append(new_stream[0], 1), append(new_stream[1], 2)]
+        await run_connection(registry, session, messages)
+        np.testing.assert_array_equal(np.concatenate(handler.frames), decoded(new_stream))
+        await registry.close_all()
+
+    asyncio.run(main())
@@ -0,0 +1,77 @@
+import asyncio
+
+from backend.services.single_flight import StreamCoalescer, request_key
+
+
+class Upstream:
+    """Yields `deltas`, then waits forever unless `done` is set."""
+
+    def __init__(self, deltas):
+        self.deltas = deltas
+        self.opened = 0
+        self.cancelled = asyncio.Event()
+        self.done = asyncio.Event()
+
+    async def stream(self):
+        self.opened += 1
+        try:
+            for delta in self.deltas:
+                yield delta
+                await asyncio.sleep(0)
+            await self.done.wait()
+        except asyncio.CancelledError:
+            self.cancelled.set()
+            raise
+
+
+async def take(stream, n):
+    deltas = []
+    async for delta in stream:
+        deltas.append(delta)
+        if len(deltas) == n:
+            break
+    return deltas
+
+
+def test_identical_requests_share_one_stream():
+    async def main():
+        coalescer = StreamCoalescer()
+        upstream = Upstream(["a", "b", "c"])
+        key = request_key("model", [{"role": "user", "content": "q"}])
+        first = coalescer.stream(key, upstream.stream)
+        assert await take(first, 2) == ["a", "b"]
+        # joins late and still gets everything from the start
+        second = coalescer.stream(key, upstream.stream)
+        upstream.done.set()
+        assert [delta async for delta in second] == ["a", "b", "c"]
+        assert upstream.opened == 1
+        assert (coalescer.n_upstream, coalescer.n_coalesced) == (1, 1)
+        assert coalescer.flights == {}
+        await first.aclose()
+
+    asyncio.run(main())
+
+
+def test_upstream_is_cancelled_when_the_last_subscriber_leaves():
+    async def main():
+        coalescer = StreamCoalescer()
+        upstream = Upstream(["a"])
+        first = coalescer.stream("key", upstream.stream)
+        second = coalescer.stream("key", upstream.stream)
+        assert await take(first, 1) == ["a"]
+        assert await take(second, 1) == ["a"]
+
+        await first.aclose()
+        await asyncio.sleep(0)
+        assert not upstream.cancelled.is_set()  # still listened to
+
+        await second.aclose()
+        await asyncio.wait_for(upstream.cancelled.wait(), timeout=1)
+        assert coalescer.flights == {}
+
+        # the next identical request opens a new stream
+        upstream.deltas = ["b"]
+        assert await take(coalescer.stream("key", upstream.stream), 1) == ["b"]
+        assert upstream.opened == 2
+
+    asyncio.run(main())
@@ -0,0 +1,62 @@
+import math
+from collections import Counter
+
+import pytest
+
+from backend.services.lexical_index import tokenize
+from backend.utils.sparse_tfidf import SparseTfidfIndex
+
+WORDS = "budget roadmap hiring launch api latency q3 design review customer churn pricing".split()
+
+
+def brute_force(docs: dict[str, str], query: str) -> dict[str, float]:
+    """Cosine similarities of smoothed TF-IDF vectors, computed term by term."""
+    counts = {doc_id: Counter(tokenize(text)) for doc_id, text in docs.items()}
+    df = Counter(term for doc in counts.values() for term in doc)
+    idf = {term: math.log((1 + len(docs)) / (1 + n)) + 1 for term, n in df.items()}
+
+    def vector(terms: Counter) -> dict[str, float]:
+        return {term: n * idf[term] for term, n in terms.items() if term in idf}
+
+    def norm(v: dict[str, float]) -> float:
+        return math.sqrt(sum(w * w for w in v.values()))
+
+    q = vector(Counter(tokenize(query)))
+    scores = {}
+    for doc_id, doc in counts.items():
+        d = vector(doc)
+        dot = sum(w * d.get(term, 0.0) for term, w in q.items())
+        if dot > 0:
+            scores[doc_id] = dot / (norm(d) * norm(q))
+    return scores
+
+
+def test_ranking_matches_brute_force():
+    index = SparseTfidfIndex()
+    docs = {}
+    queries = ["budget review", "api latency launch", "customer churn pricing q3", "hiring"]
+    for i in range(40):
+        # documents of varying length, repeated terms, added between searches so the buffers grow
+        text = " ".join(WORDS[(i * j) % len(WORDS)] for j in range(1, 2 + i % 9))
+        docs[f"doc{i}"] = text
+        index.add(f"doc{i}", text)
+        if i % 7 == 0:
+            for query in queries:
+                expected = brute_force(docs, query)
+                results = index.search(query, k=len(docs))
+                assert {doc_id for doc_id, _ in results} == set(expected)
+                for doc_id, score in results:
+                    assert score == pytest.approx(expected[doc_id], rel=1e-4)
+                scores = [score for _, score in results]
+                assert scores == sorted(scores, reverse=True)
+
+    assert len(index) == 40
+    assert index.indptr[-1] == len(index.indices) == len(index.data)
+
+
+def test_unknown_query_terms_match_nothing():
+    index = SparseTfidfIndex()
+    index.add("a", "budget budget")
+    assert index.search("unrelated words") == []
+    assert index.search("budget", k=0) == []
+    assert index.search("budget") == [("a", pytest.approx(1.0))]
@@ -0,0 +1,31 @@
+import threading
+
+from backend.utils import tokens
+from backend.utils.tokens import TokenCounter
+
+
+class WordTokenizer:
+    def encode(self, text, add_special_tokens=False):
+        return text.split()
+
+
+def test_counts_are_estimated_until_the_tokenizer_is_loaded(monkeypatch):
+    release = threading.Event()
+    loaded = threading.Event()
+
+    def slow_load(name):
+        release.wait(5)
+        return WordTokenizer()
+
+    monkeypatch.setattr(tokens, "_load_tokenizer", slow_load)
+    monkeypatch.setattr(tokens, "_tokenizers", {})
+    original = tokens._load_in_background
+    monkeypatch.setattr(tokens, "_load_in_background", lambda name: (original(name), loaded.set()))
+
+    counter = TokenCounter("some/model")  # does not block on the download
+    assert counter.tokenizer is None
+    assert counter.count("a b c d e f g h") == 4  # 15 chars, estimated
+
+    release.set()
+    assert loaded.wait(5)
+    assert counter.count("a b c d e f g h") == 8
@@ -0,0 +1,72 @@
+import asyncio
+import os
+import re
+from datetime import datetime
+
+from backend.models.meeting import Meeting
+from backend.services.meeting_catalog import MeetingCatalog
+from backend.services.recorder import catalog_path
+from backend.services.transcript_journal import JOURNAL_DIR, TranscriptJournal, recover_journals
+from backend.utils import cpu_pool
+
+
+def split_sentences(text: str, *args) -> list[str]:
+    return [sentence.strip() for sentence in re.findall(r"[^.]+\.?", text) if sentence.strip()]
+
+
+class SentenceSplitter:
+    def split_text(self, text):
+        return split_sentences(text)
+
+
+class FakeMemory:
+    splitter = SentenceSplitter()
+
+    def __init__(self):
+        self.chunks = {}
+        self.committed = []
+
+    async def aadd_chunks(self, meeting, chunks, start_index=0, provisional=False, times=None):
+        for i, chunk in enumerate(chunks, start_index):
+            self.chunks[f"{meeting.meeting_id}:{i}"] = chunk
+
+    async def acommit_meeting(self, meeting_id):
+        self.committed.append(meeting_id)
+
+
+def crashed_journal(dir: str) -> str:
+    """A journal as a crash leaves it: not removed, with a torn last line."""
+    journal = TranscriptJournal.create(dir)
+    journal.append("Budget approved.", 0.0, 1.5)
+    journal.write_meeting(Meeting(id="m1", title="Standup", participants=["Ann"], start_time=datetime(2026, 1, 1)))
+    journal.append("Hiring next week.", 1.5, 3.0)
+    journal.close()
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"text": "cut sho')
+    return journal.path
+
+
+def test_crashed_meeting_is_recovered(tmp_path, monkeypatch):
+    monkeypatch.setattr(cpu_pool, "split_text", split_sentences)
+    path = crashed_journal(str(tmp_path))
+    memory = FakeMemory()
+    catalog = MeetingCatalog(catalog_path(str(tmp_path)))
+
+    assert asyncio.run(recover_journals(memory, str(tmp_path), catalog)) == 1
+    meeting = catalog.load("m1")
+    assert meeting.title == "Standup"
+    assert meeting.transcript == " Budget approved. Hiring next week."
+    assert sorted(memory.chunks.values()) == ["Budget approved.", "Hiring next week."]
+    assert memory.committed == ["m1"]
+    assert not os.path.exists(path)
+
+
+def test_journal_of_a_live_recording_is_skipped(tmp_path):
+    journal = TranscriptJournal.create(str(tmp_path))
+    journal.write_meeting(Meeting(id="m2", title="t", participants=[], start_time=datetime(2026, 1, 1)))
+    journal.append("still talking")
+    try:
+        assert asyncio.run(recover_journals(FakeMemory(), str(tmp_path))) == 0
+        assert os.listdir(tmp_path / JOURNAL_DIR) == [os.path.basename(journal.path)]
+    finally:
+        journal.remove()
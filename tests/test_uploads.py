@@ -0,0 +1,93 @@
+import asyncio
+import os
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import backend.app
+from backend.app import app
+from backend.services.uploads import ChunkedUpload, UploadError, remove_stale_uploads
+
+
+async def body(*parts, delay=0.0):
+    for part in parts:
+        await asyncio.sleep(delay)
+        yield part
+
+
+def assembled(upload, tmp_path):
+    out = tmp_path / "assembled"
+    upload.assemble(str(out))
+    return out.read_bytes()
+
+
+def test_chunks_are_assembled_in_index_order(tmp_path):
+    async def main():
+        upload = ChunkedUpload("s1", root=str(tmp_path))
+        for index in (2, 0):
+            await upload.write_chunk(body(f"<{index}>".encode()), index)
+        with pytest.raises(UploadError):
+            upload.assemble(str(tmp_path / "assembled"))  # chunk 1 is missing
+        await upload.write_chunk(body(b"<1>"), 1)
+        assert assembled(upload, tmp_path) == b"<0><1><2>"
+        # the manifest survives a restart
+        assert assembled(ChunkedUpload("s1", root=str(tmp_path)), tmp_path) == b"<0><1><2>"
+
+    asyncio.run(main())
+
+
+def test_duplicate_chunks_replace_each_other_whole(tmp_path):
+    async def main():
+        upload = ChunkedUpload("s2", root=str(tmp_path))
+        await upload.write_chunk(body(b"first"), 0)
+        # a retry racing the original request
+        await asyncio.gather(
+            upload.write_chunk(body(b"aa", b"aa", delay=0.01), 1),
+            upload.write_chunk(body(b"bb", b"bb", delay=0.01), 1),
+        )
+        assert assembled(upload, tmp_path) in (b"firstaaaa", b"firstbbbb")
+        assert not [name for name in os.listdir(upload.dir) if name.endswith(".part")]
+
+    asyncio.run(main())
+
+
+def test_failed_finish_keeps_the_chunks_for_a_retry(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    calls = []
+
+    async def transcribe_file(path, meeting):
+        calls.append(open(path, "rb").read())
+        if len(calls) == 1:
+            raise RuntimeError("STT unavailable")
+
+    monkeypatch.setattr(backend.app, "_transcribe_file", transcribe_file)
+    app.state.uploads = {}
+    client = TestClient(app, raise_server_exceptions=False)
+    assert client.put("/upload_chunk/s3/1", content=b"world").status_code == 200
+    assert client.put("/upload_chunk/s3/0", content=b"hello ").status_code == 200
+
+    assert client.post("/finish_upload/s3").status_code == 500
+    assert os.path.exists("uploads/s3/chunk_000000")
+
+    response = client.post("/finish_upload/s3")
+    assert response.status_code == 200
+    assert calls == [b"hello world", b"hello world"]
+    assert not os.path.exists("uploads/s3")
+    assert "s3" not in app.state.uploads
+
+
+def test_abandoned_uploads_expire(tmp_path):
+    upload = ChunkedUpload("s4", root=str(tmp_path))
+    assert not upload.expired(60)
+    with upload.active():
+        assert not upload.expired(60, now=time.monotonic() + 120)
+    assert upload.expired(60, now=time.monotonic() + 120)
+
+    for session_id in ("old", "recent", "kept"):
+        os.makedirs(tmp_path / session_id)
+    past = time.time() - 120
+    os.utime(tmp_path / "old", (past, past))
+    os.utime(tmp_path / "kept", (past, past))
+    assert remove_stale_uploads(str(tmp_path), 60, keep={"kept"}) == ["old"]
+    assert sorted(os.listdir(tmp_path)) == ["kept", "recent"]
@@ -0,0 +1,65 @@
+import subprocess
+import sys
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.app import app
+from backend.services.meeting_memory import MeetingMemory
+
+HEAVY_MODULES = (
+    "openai", "langchain_community", "chromadb", "sentence_transformers", "torch", "sphn",
+    "backend.handlers.main_handler", "backend.services.llm_service",
+)
+
+
+def test_importing_the_app_loads_no_heavy_module():
+    code = f"import sys, backend.app; print(*[m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    loaded = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert loaded.split() == []
+
+
+class SlowMemory(MeetingMemory):
+    """Warms up when `release` is set, fails if `error` is set."""
+
+    def __init__(self, error: Exception | None = None):
+        super().__init__()
+        self.release = threading.Event()
+        self.error = error
+
+    def _warm_up(self):
+        self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+
+
+def test_calls_wait_for_the_warm_up():
+    memory = SlowMemory()
+    thread = threading.Thread(target=memory.warm_up)
+    thread.start()
+    with pytest.raises(RuntimeError, match="still warming up"):
+        memory.wait_ready(timeout=0.01)
+    memory.release.set()
+    memory.wait_ready(timeout=5)
+    assert memory.is_ready
+    thread.join()
+
+
+def test_ready_probe():
+    client = TestClient(app)
+    app.state.meeting_memory = memory = SlowMemory(error=OSError("no model"))
+    assert client.get("/ready").json() == {"status": "warming_up"}
+
+    memory.release.set()
+    with pytest.raises(OSError):
+        memory.warm_up()
+    response = client.get("/ready")
+    assert response.status_code == 503 and response.json()["status"] == "failed"
+    with pytest.raises(RuntimeError, match="failed to warm up"):
+        memory.wait_ready()
+
+    app.state.meeting_memory = ready = SlowMemory()
+    ready.release.set()
+    ready.warm_up()
+    assert client.get("/ready").json() == {"status": "ready"}